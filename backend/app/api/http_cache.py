@@ -0,0 +1,54 @@
+import os
+import hashlib
+import datetime
+from typing import Dict, Optional, Tuple
+from fastapi import Request, Response
+
+from app.models.models import TaskStatus
+
+# Completed tasks never change, so browsers may reuse their responses this long
+COMPLETED_TASK_MAX_AGE_SECONDS = int(os.getenv("COMPLETED_TASK_MAX_AGE_SECONDS", "86400"))
+
+def task_etag(request: Request, task_id: int, status: str, updated_at: Optional[datetime.datetime]) -> str:
+    """Strong ETag for one representation of a task's data.
+
+    The task's id, status and updated_at identify the data version; the path
+    and sorted query string distinguish filters, pages and formats.
+    """
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    version = f"{task_id}:{status}:{updated_at.isoformat() if updated_at else ''}:{request.url.path}?{query}"
+    return '"' + hashlib.sha256(version.encode("utf-8")).hexdigest()[:32] + '"'
+
+def task_cache_headers(request: Request, task_id: int, status: str, updated_at: Optional[datetime.datetime]) -> Dict[str, str]:
+    """ETag plus Cache-Control: cacheable once COMPLETED, revalidate on every use before."""
+    if status == TaskStatus.COMPLETED:
+        cache_control = f"public, max-age={COMPLETED_TASK_MAX_AGE_SECONDS}"
+    else:
+        cache_control = "no-cache"
+    return {"ETag": task_etag(request, task_id, status, updated_at), "Cache-Control": cache_control}
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match already names `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag in candidates
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+def check_task_cache(request: Request, task_id: int, task_state) -> Tuple[Dict[str, str], Optional[Response]]:
+    """Return (cache headers, 304 response or None) for a task's (status, updated_at).
+
+    Unknown tasks (task_state None) get no cache headers so 404s stay uncached.
+    """
+    if task_state is None:
+        return {}, None
+    headers = task_cache_headers(request, task_id, *task_state)
+    if is_not_modified(request, headers["ETag"]):
+        return headers, not_modified_response(headers)
+    return headers, None
@@ -0,0 +1,77 @@
+import time
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.database import get_read_db
+from app.models.models import Job, JobStatus, TaskStatusCount
+from app.services import job_queue, scheduler
+from app.services.metrics import metrics, render_gauge, HTTP_REQUEST_SECONDS, PROMETHEUS_CONTENT_TYPE
+
+router = APIRouter()
+
+class RequestLatencyMiddleware:
+    """Record every HTTP request in the http_request_duration_seconds histogram.
+
+    A plain ASGI middleware, so streaming responses pass through untouched.
+    Requests are labelled with their route template ("/api/tasks/{task_id}")
+    rather than the raw path to keep the number of series bounded; the
+    duration runs until the last body chunk is sent, which for status
+    streams is the life of the stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            )
+
+def _runtime_gauges(db: Session) -> str:
+    """Gauges read at scrape time: queue depth, worker utilization and tasks per status."""
+    queued_jobs = db.query(func.count(Job.id)).filter(Job.status == JobStatus.QUEUED).scalar()
+    running = scheduler.scheduler
+    busy = running.active_tasks if running is not None else 0
+    capacity = running.max_concurrent_tasks if running is not None else 0
+    task_counts = db.query(TaskStatusCount.status, TaskStatusCount.count).order_by(TaskStatusCount.status).all()
+    return "".join([
+        render_gauge("task_queue_depth", "Tasks waiting for a worker.", [
+            ({"queue": "memory"}, job_queue.task_queue.qsize()),
+            ({"queue": "durable"}, queued_jobs),
+        ]),
+        render_gauge("task_workers", "Task slots of this process's scheduler, busy or idle.", [
+            ({"state": "busy"}, busy),
+            ({"state": "idle"}, max(capacity - busy, 0)),
+        ]),
+        render_gauge("tasks", "Tasks by status.", [({"status": status}, count) for status, count in task_counts]),
+    ])
+
+def render_metrics(db: Session) -> str:
+    """This process's metrics in the Prometheus text exposition format."""
+    return _runtime_gauges(db) + metrics.render()
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics(db: Session = Depends(get_read_db)):
+    """Process metrics in the Prometheus text exposition format."""
+    return Response(content=render_metrics(db), media_type=PROMETHEUS_CONTENT_TYPE)
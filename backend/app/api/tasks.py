@@ -1,63 +1,283 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.db.database import get_db
+from app.db.database import get_read_db, get_async_db, get_async_read_db
 from app.models.models import TaskStatus
 from app.schemas.schemas import TaskCreate, TaskResponse, RecordResponse, PaginatedTaskResponse
 from app.services import task_service
+from app.services.task_events import task_events, encode_sse, is_terminal
+from app.services.task_trace import TRACE_SUMMARY_TASKS
+from app.services.record_stream import iter_ndjson, iter_csv, encode_json, encode_record_rows
+from app.api.http_cache import check_task_cache
+from app.services.arrow_export import iter_parquet, iter_arrow_stream, PARQUET_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE
+import os
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MAX_RECORDS_PAGE_SIZE = 10000
+MAX_TASKS_PAGE_SIZE = 1000
+MAX_HISTOGRAM_BINS = 200
+MAX_TRACE_SUMMARY_TASKS = 5000
+# Encode record and analytics JSON straight from the rows with orjson instead
+# of validating every row through the response model
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "0") == "1"
+# Idle status streams send a comment this often and re-read the task, which
+# also picks up transitions made by workers in other processes
+TASK_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("TASK_EVENTS_KEEPALIVE_SECONDS", "15"))
+
+def _json_response(content: bytes, headers=None) -> Response:
+    return Response(content=content, media_type="application/json", headers=headers)
+
 @router.post("/tasks/", response_model=TaskResponse)
-def create_task(task: TaskCreate, db: Session = Depends(get_db)):
-    db_task = task_service.create_task(task, db)
+async def create_task(task: TaskCreate, db: AsyncSession = Depends(get_async_db)):
+    db_task = await task_service.create_task_async(task, db)
     if not db_task:
         raise HTTPException(status_code=400, detail="Task with this name already exists")
     return db_task
 
 @router.get("/tasks/", response_model=PaginatedTaskResponse)
-def get_tasks(
-    skip: int = 0, 
-    limit: int = 10,
-    db: Session = Depends(get_db)
+async def get_tasks(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=MAX_TASKS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[TaskStatus] = None,
+    name_prefix: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """List tasks newest first, optionally by status and name prefix.
+
+    Follow `next_cursor` for the next page; `skip` is kept for old clients.
+    `counts` holds the number of tasks in each status.
+    """
+    try:
+        return await task_service.get_tasks_async(skip, limit, db, cursor, status, name_prefix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/tasks/traces/summary")
+async def get_trace_summary(
+    limit: int = Query(TRACE_SUMMARY_TASKS, ge=1, le=MAX_TRACE_SUMMARY_TASKS),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    return task_service.get_tasks(skip, limit, db)
+    """p50/p95/max duration of each processing stage over the most recent traced tasks."""
+    return await task_service.get_trace_summary_async(db, limit)
 
 @router.get("/tasks/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, db: Session = Depends(get_db)):
-    task = task_service.get_task_by_id(task_id, db)
+async def get_task(task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    task = await task_service.get_task_by_id_async(task_id, db)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    cache_headers, not_modified = check_task_cache(request, task.id, (task.status, task.updated_at))
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers)
     return task
 
+async def _current_task_event(task_id: int, db: AsyncSession):
+    event = await task_service.get_task_status_event_async(task_id, db)
+    # Hand the read connection back between polls; a stream can stay open for minutes
+    await db.close()
+    return event
+
+async def _task_event_stream(task_id: int, db: AsyncSession):
+    with task_events.subscribe(task_id) as queue:
+        # Read the state only after subscribing so no transition falls in between
+        event = await _current_task_event(task_id, db)
+        last_sent = None
+        while event is not None:
+            if event != last_sent:
+                yield encode_sse(event)
+                last_sent = event
+                if is_terminal(event):
+                    return
+            try:
+                event = await asyncio.wait_for(queue.get(), TASK_EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                event = await _current_task_event(task_id, db)
+
+@router.get("/tasks/{task_id}/events")
+async def stream_task_events(task_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Stream a task's status and progress as Server-Sent Events.
+
+    Each `status` event carries the task's status plus rows_fetched and
+    rows_written while it runs; the stream ends after COMPLETED or FAILED.
+    """
+    if await _current_task_event(task_id, db) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return StreamingResponse(
+        _task_event_stream(task_id, db),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/tasks/{task_id}/trace")
+async def get_task_trace(task_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Timing trace of the task's last processing run: per-stage start and
+    duration, bytes and rows per source, and rows written with the insert rate.
+    """
+    trace = await task_service.get_task_trace_async(task_id, db)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return trace
+
 @router.get("/tasks/{task_id}/records", response_model=List[RecordResponse])
 def get_task_records(
     task_id: int,
+    request: Request,
+    response: Response,
     companies: List[str] = Query(None),
     model: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_RECORDS_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
+    db: Session = Depends(get_read_db)
 ):
-    return task_service.get_task_records(task_id, companies, model, start_date, end_date, db)
+    """Get a task's records as a JSON array, or stream them as NDJSON/CSV.
+
+    `after_id`/`limit` page through the records by id; when a page is full the
+    cursor for the next page is returned in the X-Next-After-Id header.
+    Responses carry an ETag; a matching If-None-Match gets a 304 without
+    querying the records.
+    """
+    task_state = task_service.get_task_state(task_id, db)
+    cache_headers, not_modified = check_task_cache(request, task_id, task_state)
+    if not_modified:
+        return not_modified
+    
+    if format != "json":
+        rows = task_service.iter_task_record_rows(
+            task_id, companies, model, start_date, end_date, db, after_id=after_id, limit=limit
+        )
+        if format == "csv":
+            return StreamingResponse(
+                iter_csv(rows),
+                media_type="text/csv",
+                headers={"Content-Disposition": f'attachment; filename="task_{task_id}_records.csv"', **cache_headers}
+            )
+        return StreamingResponse(iter_ndjson(rows), media_type="application/x-ndjson", headers=cache_headers)
+    
+    records = task_service.get_task_records(
+        task_id, companies, model, start_date, end_date, db, after_id=after_id, limit=limit
+    )
+    response.headers.update(cache_headers)
+    if limit is not None and len(records) == limit:
+        response.headers["X-Next-After-Id"] = str(records[-1].id)
+    if FAST_JSON_RESPONSES:
+        return _json_response(encode_record_rows(records), headers=dict(response.headers))
+    return records
+
+@router.get("/tasks/{task_id}/records.parquet")
+def export_task_records_parquet(
+    task_id: int,
+    companies: List[str] = Query(None),
+    model: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Export a task's filtered records as a Parquet file."""
+    batches = task_service.iter_task_record_batches(task_id, companies, model, start_date, end_date, db)
+    return StreamingResponse(
+        iter_parquet(batches),
+        media_type=PARQUET_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="task_{task_id}_records.parquet"'}
+    )
+
+@router.get("/tasks/{task_id}/records.arrow")
+def export_task_records_arrow(
+    task_id: int,
+    companies: List[str] = Query(None),
+    model: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Export a task's filtered records as an Arrow IPC stream."""
+    batches = task_service.iter_task_record_batches(task_id, companies, model, start_date, end_date, db)
+    return StreamingResponse(iter_arrow_stream(batches), media_type=ARROW_STREAM_MEDIA_TYPE)
 
 @router.get("/tasks/{task_id}/analytics/companies")
-def get_company_analytics(task_id: int, db: Session = Depends(get_db)):
+async def get_company_analytics(task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
     """Get sales analytics by company for a specific task."""
-    return task_service.get_company_analytics(task_id, db)
+    task_state = await task_service.get_task_state_async(task_id, db)
+    cache_headers, not_modified = check_task_cache(request, task_id, task_state)
+    if not_modified:
+        return not_modified
+    result = await task_service.get_company_analytics_async(task_id, db)
+    if FAST_JSON_RESPONSES:
+        return _json_response(encode_json(result), headers=cache_headers)
+    response.headers.update(cache_headers)
+    return result
 
 @router.get("/tasks/{task_id}/analytics/timeline")
-def get_timeline_analytics(task_id: int, db: Session = Depends(get_db)):
-    """Get sales timeline analytics for a specific task."""
-    return task_service.get_timeline_analytics(task_id, db)
+async def get_timeline_analytics(
+    task_id: int,
+    request: Request,
+    response: Response,
+    bucket: str = Query("month", pattern="^(day|week|month|quarter|year)$"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    companies: List[str] = Query(None),
+    max_points: Optional[int] = Query(None, ge=3),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get sales and revenue per time bucket and company for a specific task.
+
+    Buckets are labelled 'YYYY-MM-DD' (day, and week by its Monday),
+    'YYYY-MM', 'YYYY-Qn' or 'YYYY'. `max_points` downsamples each company's
+    series with LTTB for rendering; dropped buckets are not folded into the
+    kept ones.
+    """
+    task_state = await task_service.get_task_state_async(task_id, db)
+    cache_headers, not_modified = check_task_cache(request, task_id, task_state)
+    if not_modified:
+        return not_modified
+    result = await task_service.get_timeline_analytics_async(
+        task_id, db, bucket=bucket, start_date=start_date, end_date=end_date,
+        companies=companies, max_points=max_points
+    )
+    if FAST_JSON_RESPONSES:
+        return _json_response(encode_json(result), headers=cache_headers)
+    response.headers.update(cache_headers)
+    return result
+
+@router.get("/tasks/{task_id}/analytics/distribution")
+async def get_price_distribution(
+    task_id: int,
+    request: Request,
+    response: Response,
+    group_by: str = Query("company", pattern="^(company|model)$"),
+    bins: int = Query(20, ge=1, le=MAX_HISTOGRAM_BINS),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get price quartiles, whiskers, IQR outliers and a histogram per company or per company/model.
+
+    Served from price sketches built at ingestion; groups larger than
+    SKETCH_EXACT_MAX_VALUES report approximate statistics (`exact: false`).
+    """
+    task_state = await task_service.get_task_state_async(task_id, db)
+    cache_headers, not_modified = check_task_cache(request, task_id, task_state)
+    if not_modified:
+        return not_modified
+    result = await task_service.get_price_distribution_async(task_id, db, group_by=group_by, bins=bins)
+    if FAST_JSON_RESPONSES:
+        return _json_response(encode_json(result), headers=cache_headers)
+    response.headers.update(cache_headers)
+    return result
 
 @router.delete("/tasks/{task_id}", status_code=204)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a task and its associated records."""
-    success = task_service.delete_task(task_id, db)
+    success = await task_service.delete_task_async(task_id, db)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
     return None
\ No newline at end of file
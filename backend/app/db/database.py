@@ -1,14 +1,76 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./app.db"
+
+# SQLite tuning applied to every new connection (see apply_sqlite_pragmas)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "16384"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+    """Configure a new SQLite connection for concurrent readers and one writer.
+
+    WAL lets readers proceed while a write transaction is open, and
+    busy_timeout makes competing writers wait instead of failing with
+    "database is locked". synchronous=NORMAL is durable against application
+    crashes in WAL mode and only risks the last commits on power loss.
+    """
+    cursor = dbapi_connection.cursor()
+    if not read_only:
+        # Only takes effect on a new database file; lets the task reaper hand
+        # freed pages back with incremental_vacuum instead of a full VACUUM
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # journal_mode is stored in the database file, so the writer sets it once for everyone
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+def create_sqlite_engine(url: str, read_only: bool = False, **kwargs) -> Engine:
+    """Create an engine whose connections get apply_sqlite_pragmas on connect."""
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return engine
+
+def create_async_sqlite_engine(url: str, read_only: bool = False, **kwargs) -> AsyncEngine:
+    """Async (aiosqlite) counterpart of create_sqlite_engine with the same pragmas."""
+    engine = create_async_engine(url, **kwargs)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return engine
+
+# Writes (task creation, the job queue, ingestion, deletes) go through `engine`;
+# API reads use the read-only pool so they never queue behind a writer.
+engine = create_sqlite_engine(SQLALCHEMY_DATABASE_URL)
+read_engine = create_sqlite_engine(SQLALCHEMY_DATABASE_URL, read_only=True, pool_size=DB_READ_POOL_SIZE)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
-from sqlalchemy.orm import declarative_base
+# Async endpoints go through aiosqlite, so waiting on the database never
+# occupies one of Starlette's worker threads.
+async_engine = create_async_sqlite_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+async_read_engine = create_async_sqlite_engine(ASYNC_SQLALCHEMY_DATABASE_URL, read_only=True, pool_size=DB_READ_POOL_SIZE)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -17,4 +79,21 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Session on the read-only pool for endpoints that never write."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    """AsyncSession on the read-only pool for async endpoints."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,112 @@
+import logging
+import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.database import Base
+
+logger = logging.getLogger(__name__)
+
+# Applied migrations are recorded here; create_all never touches this table.
+_migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime, default=datetime.datetime.utcnow),
+)
+
+def _close_duplicate_open_jobs(connection: Connection):
+    # Earlier orphan sweeps could queue a task twice; keep one open job per
+    # task (a leased one over a queued one) so ux_jobs_open_task_id can be built
+    connection.execute(text(
+        "UPDATE jobs SET status = 'done', lease_owner = NULL, lease_expires_at = NULL "
+        "WHERE status IN ('queued', 'leased') AND id NOT IN ("
+        "SELECT (SELECT kept.id FROM jobs AS kept WHERE kept.task_id = open.task_id AND kept.status IN ('queued', 'leased') "
+        "ORDER BY kept.status = 'leased' DESC, kept.id LIMIT 1) "
+        "FROM jobs AS open WHERE open.status IN ('queued', 'leased'))"
+    ))
+
+def _create_missing_indexes(connection: Connection):
+    """Create model indexes that predate the database file.
+
+    create_all only creates indexes together with new tables, so databases
+    created before an index was declared never get it.
+    """
+    _close_duplicate_open_jobs(connection)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+def _analyze(connection: Connection):
+    # Give the SQLite planner row counts so it can choose between the indexes
+    connection.execute(text("ANALYZE"))
+
+def _records_access_path_indexes(connection: Connection):
+    _create_missing_indexes(connection)
+    _analyze(connection)
+
+def _task_list_indexes_and_status_counts(connection: Connection):
+    from app.models.models import TASK_STATUS_COUNT_TRIGGERS
+
+    _create_missing_indexes(connection)
+    for trigger in TASK_STATUS_COUNT_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    # Seed the counts once; the triggers keep them current from here on
+    connection.execute(text("DELETE FROM task_status_counts"))
+    connection.execute(text(
+        "INSERT INTO task_status_counts (status, count) SELECT status, COUNT(*) FROM tasks GROUP BY status"
+    ))
+    _analyze(connection)
+
+def _task_traces(connection: Connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("tasks")}
+    if "trace" not in columns:
+        connection.execute(text("ALTER TABLE tasks ADD COLUMN trace JSON"))
+
+def _open_job_uniqueness(connection: Connection):
+    _create_missing_indexes(connection)
+
+def _dataset_claims(connection: Connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("datasets")}
+    if "claimed_at" not in columns:
+        connection.execute(text("ALTER TABLE datasets ADD COLUMN claimed_at DATETIME"))
+
+# Append only: each entry runs exactly once per database, in order.
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_records_access_path_indexes", _records_access_path_indexes),
+    ("0002_task_list_indexes_and_status_counts", _task_list_indexes_and_status_counts),
+    ("0003_task_traces", _task_traces),
+    ("0004_open_job_uniqueness", _open_job_uniqueness),
+    ("0005_dataset_claims", _dataset_claims),
+]
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations and return the versions that ran."""
+    # Importing the models registers their tables and indexes on Base
+    import app.models.models  # noqa: F401
+
+    applied = []
+    with engine.begin() as connection:
+        _migration_metadata.create_all(connection)
+        done = set(connection.execute(select(schema_migrations.c.version)).scalars())
+        for version, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            logger.info(f"Applying schema migration {version}")
+            migrate(connection)
+            connection.execute(schema_migrations.insert().values(version=version))
+            applied.append(version)
+    return applied
+
+def main():
+    from app.db.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    logger.info(f"Applied {len(applied)} schema migrations")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,35 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import tasks
+from app.api import tasks, metrics
 from app.db.database import engine, get_db
 from app.models.models import Base
-from app.services.job_queue import start_worker
+from app.db.migrations import run_migrations
+from app.services.job_queue import source_cache
+from app.services.analytics_cache import analytics_cache
+from app.services.task_events import task_events
+from app.services.scheduler import start_scheduler, stop_scheduler
+from app.services.reaper import start_reaper, stop_reaper, reaper_stats
 
-# Create database tables
+# Create database tables and bring existing ones up to date
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
-app = FastAPI(title="Data Visualization API")
+# Set to 0 when tasks are processed by standalone workers (python -m app.worker)
+RUN_EMBEDDED_WORKER = os.getenv("RUN_EMBEDDED_WORKER", "1") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Run queued tasks on the shared asyncio scheduler for the lifetime of the app
+    if RUN_EMBEDDED_WORKER:
+        start_scheduler(get_db)
+        start_reaper(get_db)
+    yield
+    stop_reaper()
+    stop_scheduler()
+
+app = FastAPI(title="Data Visualization API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -17,13 +38,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After-Id"],
 )
 
+# Per-route request latency for /metrics
+app.add_middleware(metrics.RequestLatencyMiddleware)
+
 # Include routers
 app.include_router(tasks.router, prefix="/api", tags=["tasks"])
-
-# Start the worker thread
-start_worker(get_db)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
@@ -35,3 +58,31 @@ def health_check():
     Health check endpoint to verify the API is running
     """
     return {"status": "ok"}
+
+@app.get("/api/health/source-cache", tags=["health"])
+def source_cache_stats():
+    """
+    Hit/miss/eviction counters for the shared source data cache
+    """
+    return source_cache.stats()
+
+@app.get("/api/health/analytics-cache", tags=["health"])
+def analytics_cache_stats():
+    """
+    Hit/miss/eviction counters for the analytics result cache
+    """
+    return analytics_cache.stats()
+
+@app.get("/api/health/task-events", tags=["health"])
+def task_events_stats():
+    """
+    Publish counters and open subscriptions of the task status streams
+    """
+    return task_events.stats()
+
+@app.get("/api/health/reaper", tags=["health"])
+def task_reaper_stats():
+    """
+    Progress of the background reaper deleting the data of deleted tasks
+    """
+    return reaper_stats()
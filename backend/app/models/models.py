@@ -1,15 +1,26 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import event, text, Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Index, LargeBinary
+from sqlalchemy.orm import relationship, deferred
+from app.db.database import Base
 import enum
 import datetime
 
-Base = declarative_base()
-
 class TaskStatus(str, enum.Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    # Deleted from the API's point of view; the reaper is still removing its rows
+    DELETING = "deleting"
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+class DatasetStatus(str, enum.Enum):
+    BUILDING = "building"
+    READY = "ready"
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -20,8 +31,45 @@ class Task(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     parameters = Column(JSON)
+    # Timing trace of the last processing run (see app.services.task_trace); only loaded when asked for
+    trace = deferred(Column(JSON, nullable=True))
     
     records = relationship("Record", back_populates="task")
+    
+    # The task list pages newest first by (created_at, id), optionally within one status
+    __table_args__ = (
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_status_created_at_id", "status", "created_at", "id"),
+    )
+
+class TaskStatusCount(Base):
+    __tablename__ = "task_status_counts"
+    
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+# Triggers keep task_status_counts in step with tasks inside the writing
+# transaction, whichever process or code path inserts, updates or deletes.
+TASK_STATUS_COUNT_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS tasks_status_count_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_status_counts (status, count) VALUES (NEW.status, 1)
+        ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_status_count_update AFTER UPDATE OF status ON tasks
+    WHEN OLD.status IS NOT NEW.status BEGIN
+        UPDATE task_status_counts SET count = count - 1 WHERE status = OLD.status;
+        INSERT INTO task_status_counts (status, count) VALUES (NEW.status, 1)
+        ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_status_count_delete AFTER DELETE ON tasks BEGIN
+        UPDATE task_status_counts SET count = count - 1 WHERE status = OLD.status;
+    END""",
+)
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_task_status_count_triggers(target, connection, **kw):
+    for trigger in TASK_STATUS_COUNT_TRIGGERS:
+        connection.exec_driver_sql(trigger)
 
 class Record(Base):
     __tablename__ = "records"
@@ -34,4 +82,106 @@ class Record(Base):
     sale_date = Column(DateTime, index=True)
     price = Column(Float)
     
-    task = relationship("Task", back_populates="records")
\ No newline at end of file
+    task = relationship("Task", back_populates="records")
+    
+    # Every records query filters on task_id first. The trailing price column
+    # lets analytics and rollup builds read only the index, never the table.
+    __table_args__ = (
+        Index("ix_records_task_id_id", "task_id", "id"),
+        Index("ix_records_task_company_sale_date", "task_id", "company", "sale_date"),
+        Index("ix_records_task_sale_date_price", "task_id", "sale_date", "price"),
+        Index("ix_records_task_company_model_sale_date_price", "task_id", "company", "model", "sale_date", "price"),
+    )
+
+class CompanyRollup(Base):
+    __tablename__ = "company_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
+    company = Column(String)
+    total_sales = Column(Integer)
+    total_revenue = Column(Float)
+    min_price = Column(Float)
+    max_price = Column(Float)
+    sum_squares = Column(Float)
+    
+    __table_args__ = (
+        Index("ix_company_rollups_task_company", "task_id", "company"),
+    )
+
+class CompanyMonthRollup(Base):
+    __tablename__ = "company_month_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
+    company = Column(String)
+    month = Column(String)  # 'YYYY-MM'
+    total_sales = Column(Integer)
+    total_revenue = Column(Float)
+    
+    __table_args__ = (
+        Index("ix_company_month_rollups_task_month_company", "task_id", "month", "company"),
+    )
+
+class CompanyModelMonthRollup(Base):
+    __tablename__ = "company_model_month_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
+    company = Column(String)
+    model = Column(String)
+    month = Column(String)  # 'YYYY-MM'
+    total_sales = Column(Integer)
+    total_revenue = Column(Float)
+
+class PriceSketch(Base):
+    __tablename__ = "price_sketches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
+    company = Column(String)
+    model = Column(String)
+    count = Column(Integer)
+    sketch = Column(LargeBinary)  # QuantileSketch.to_bytes() of the group's prices
+    
+    __table_args__ = (
+        Index("ix_price_sketches_task_company_model", "task_id", "company", "model"),
+    )
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
+    status = Column(String, default=JobStatus.QUEUED, index=True)
+    attempts = Column(Integer, default=0)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    # At most one open job per task, so schedulers sweeping for orphaned
+    # tasks at the same time cannot queue (and run) a task twice
+    __table_args__ = (
+        Index("ux_jobs_open_task_id", "task_id", unique=True, sqlite_where=text("status IN ('queued', 'leased')")),
+    )
+
+class Dataset(Base):
+    __tablename__ = "datasets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    dataset_key = Column(String, unique=True, index=True)
+    parameters_hash = Column(String, index=True)
+    source_versions = Column(JSON)
+    status = Column(String, default=DatasetStatus.BUILDING)
+    data_task_id = Column(Integer, ForeignKey("tasks.id"))  # task whose records/rollups hold the data
+    ref_count = Column(Integer, default=0)
+    claimed_at = Column(DateTime, nullable=True)  # when data_task_id took the build claim (see dedup.claim_dataset)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class DatasetLink(Base):
+    __tablename__ = "dataset_links"
+    
+    task_id = Column(Integer, ForeignKey("tasks.id"), primary_key=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), index=True)
@@ -87,6 +87,8 @@ class RecordResponse(BaseModel):
 class PaginatedTaskResponse(BaseModel):
     items: List[TaskResponse]
     total: int
+    counts: Dict[str, int] = {}
+    next_cursor: Optional[str] = None
     
     model_config = {
         "from_attributes": True
@@ -0,0 +1,101 @@
+import math
+import logging
+import datetime
+from typing import Iterator, Dict, Any, List, Optional
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.orm import Session
+
+from app.models.models import Record
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_BUCKETS = ("day", "week", "month", "quarter", "year")
+
+def timeline_bucket(bucket: str, column):
+    """SQL expression labelling a datetime column with its timeline bucket.
+
+    Labels sort chronologically: 'YYYY-MM-DD' for days and for weeks (their
+    Monday), 'YYYY-MM', 'YYYY-Qn' and 'YYYY'.
+    """
+    if bucket == "day":
+        return func.strftime("%Y-%m-%d", column)
+    if bucket == "week":
+        # %w counts from Sunday = 0; step back to the ISO week's Monday
+        days_since_monday = (cast(func.strftime("%w", column), Integer) + 6) % 7
+        return func.date(column, func.printf("-%d days", days_since_monday))
+    if bucket == "month":
+        return func.strftime("%Y-%m", column)
+    if bucket == "quarter":
+        return func.printf("%s-Q%d", func.strftime("%Y", column), (cast(func.strftime("%m", column), Integer) + 2) / 3)
+    if bucket == "year":
+        return func.strftime("%Y", column)
+    raise ValueError(f"Unknown timeline bucket: {bucket}")
+
+def iter_company_price_stats(task_id: int, db: Session) -> Iterator[Dict[str, Any]]:
+    """Aggregate price statistics per company in the database.
+
+    Runs a single GROUP BY company query and yields one dict per company,
+    so only the aggregate rows ever leave the database.
+    """
+    logger.debug(f"Aggregating company price stats in SQL for task ID: {task_id}")
+    query = (
+        db.query(
+            Record.company,
+            func.count(Record.id).label("total_sales"),
+            func.sum(Record.price).label("total_revenue"),
+            func.avg(Record.price).label("average_price"),
+            func.min(Record.price).label("min_price"),
+            func.max(Record.price).label("max_price"),
+            func.avg(Record.price * Record.price).label("mean_square"),
+        )
+        .filter(Record.task_id == task_id)
+        .group_by(Record.company)
+        .order_by(Record.company)
+    )
+
+    for row in query:
+        average_price = row.average_price or 0
+        # SQLite has no STDDEV aggregate, so derive the population standard
+        # deviation from E[x^2] - E[x]^2 and clamp float rounding noise.
+        variance = max((row.mean_square or 0) - average_price * average_price, 0.0)
+        yield {
+            "company": row.company,
+            "total_sales": row.total_sales,
+            "total_revenue": row.total_revenue or 0,
+            "average_price": average_price,
+            "min_price": row.min_price,
+            "max_price": row.max_price,
+            "price_stddev": math.sqrt(variance),
+        }
+
+def iter_timeline_buckets(
+    task_id: int,
+    db: Session,
+    bucket: str = "month",
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    companies: Optional[List[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """Aggregate sales and revenue per time bucket and company in the database."""
+    logger.debug(f"Aggregating {bucket} timeline in SQL for task ID: {task_id}")
+    date = timeline_bucket(bucket, Record.sale_date).label("date")
+    query = db.query(
+        date,
+        Record.company,
+        func.count(Record.id).label("total_sales"),
+        func.sum(Record.price).label("total_revenue"),
+    ).filter(Record.task_id == task_id)
+    if companies:
+        query = query.filter(Record.company.in_(companies))
+    if start is not None:
+        query = query.filter(Record.sale_date >= start)
+    if end is not None:
+        query = query.filter(Record.sale_date <= end)
+
+    for row in query.group_by(date, Record.company).order_by(date, Record.company):
+        yield {
+            "date": row.date,
+            "company": row.company,
+            "total_sales": row.total_sales,
+            "total_revenue": row.total_revenue or 0
+        }
@@ -0,0 +1,164 @@
+import os
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Awaitable, Hashable
+
+from app.services.record_stream import encode_json
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_CACHE_MAX_BYTES = int(os.getenv("ANALYTICS_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+class ComputationInterrupted(Exception):
+    """The computation a cache miss was waiting on was cancelled before it finished."""
+
+class AnalyticsCache:
+    """Process-wide LRU cache of analytics results, bounded by their JSON size.
+
+    Keys are tuples whose second element is the task id, so everything cached
+    for a task can be dropped at once. Concurrent misses for the same key
+    share one computation (single-flight) for both thread and coroutine
+    callers. Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _begin(self, key: Hashable):
+        """Return (cached value or None, future, is_leader) for a lookup of `key`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, None, False
+
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+            return None, future, is_leader
+
+    def _finish(self, key: Hashable, future: Future, value=None, error: Exception = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is None:
+            self._store(key, value)
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+        except InvalidStateError:
+            # Already cancelled; the leader's own result is unaffected
+            logger.debug(f"Shared analytics future for {key[:2]} was already done")
+
+    def _fail(self, key: Hashable, future: Future, error: BaseException):
+        # Cancellation (or any BaseException) must not leave followers blocked on a future nobody resolves
+        self._finish(key, future, error=error if isinstance(error, Exception) else ComputationInterrupted(key))
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]):
+        """Return the cached value for `key`, calling `compute()` once on a miss."""
+        while True:
+            entry, future, is_leader = self._begin(key)
+            if entry is not None:
+                return entry[0]
+            if is_leader:
+                break
+            try:
+                return future.result()
+            except ComputationInterrupted:
+                logger.debug(f"In-flight analytics computation for {key[:2]} was interrupted, retrying")
+        try:
+            value = compute()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    async def get_or_compute_async(self, key: Hashable, compute: Callable[[], Awaitable[Any]]):
+        """Coroutine version of get_or_compute; `compute` returns an awaitable."""
+        while True:
+            entry, future, is_leader = self._begin(key)
+            if entry is not None:
+                return entry[0]
+            if is_leader:
+                break
+            try:
+                # Shielded: a disconnected follower must not cancel the computation the others share
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except ComputationInterrupted:
+                logger.debug(f"In-flight analytics computation for {key[:2]} was interrupted, retrying")
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    def _store(self, key: Hashable, value):
+        size_bytes = len(encode_json(value))
+        with self._lock:
+            if size_bytes > self.max_bytes:
+                logger.debug(f"Analytics result for {key[:2]} ({size_bytes} bytes) exceeds the cache budget, not caching")
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._entries[key] = (value, size_bytes)
+            self._total_bytes += size_bytes
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted[1]
+                self.evictions += 1
+
+    def invalidate_task(self, task_id: int) -> int:
+        """Drop every cached result for `task_id`."""
+        with self._lock:
+            stale = [key for key in self._entries if key[1] == task_id]
+            for key in stale:
+                self._total_bytes -= self._entries.pop(key)[1]
+            self.invalidations += len(stale)
+        if stale:
+            logger.debug(f"Invalidated {len(stale)} cached analytics results for task {task_id}")
+        return len(stale)
+
+    def clear(self):
+        """Drop every cached result and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            self.hits = self.misses = self.coalesced = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+analytics_cache = AnalyticsCache(ANALYTICS_CACHE_MAX_BYTES)
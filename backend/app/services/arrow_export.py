@@ -0,0 +1,86 @@
+import logging
+from typing import Iterable, Iterator, List, Sequence
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services.record_stream import RECORD_FIELDS
+
+logger = logging.getLogger(__name__)
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+_DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+
+RECORD_ARROW_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("task_id", pa.int64()),
+    ("source", _DICTIONARY),
+    ("company", _DICTIONARY),
+    ("model", _DICTIONARY),
+    ("sale_date", pa.timestamp("us")),
+    ("price", pa.float64()),
+])
+
+class _ChunkSink:
+    """Minimal writable file object whose contents are drained between batches."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def to_record_batch(rows: Sequence[Sequence]) -> pa.RecordBatch:
+    """Transpose a cursor batch of row tuples into a dictionary-encoded RecordBatch."""
+    columns = list(zip(*rows)) if rows else [()] * len(RECORD_FIELDS)
+    arrays = []
+    for field, values in zip(RECORD_ARROW_SCHEMA, columns):
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=RECORD_ARROW_SCHEMA)
+
+def iter_parquet(batches: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    """Encode cursor batches as a Parquet file, one row group per batch."""
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, RECORD_ARROW_SCHEMA, compression="snappy")
+    try:
+        for rows in batches:
+            writer.write_batch(to_record_batch(rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def iter_arrow_stream(batches: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    """Encode cursor batches in the Arrow IPC streaming format."""
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, RECORD_ARROW_SCHEMA)
+    try:
+        for rows in batches:
+            writer.write_batch(to_record_batch(rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
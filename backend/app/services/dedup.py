@@ -0,0 +1,228 @@
+import os
+import json
+import datetime
+import hashlib
+import logging
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import Dataset, DatasetLink, DatasetStatus, Task, TaskStatus
+from app.services.rollups import ROLLUP_MODELS
+
+logger = logging.getLogger(__name__)
+
+DEDUP_WAIT_SECONDS = float(os.getenv("DEDUP_WAIT_SECONDS", "120"))
+DEDUP_POLL_SECONDS = 0.5
+# A build claim this old is presumed dead even if its task still looks alive, and may be taken over
+DATASET_CLAIM_TIMEOUT_SECONDS = float(os.getenv("DATASET_CLAIM_TIMEOUT_SECONDS", "600"))
+
+_YEAR_FIELDS = ("start_year_a", "end_year_a", "start_year_b", "end_year_b")
+_COMPANY_FIELDS = ("companies_a", "companies_b")
+
+def canonical_parameters(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce task parameters to the form that determines which rows get stored.
+
+    Empty values mean "no filter", years compare as integers and company
+    lists are order- and duplicate-insensitive. Anything else in the
+    parameters (e.g. a previous error message) is ignored.
+    """
+    canonical = {}
+    for field in _YEAR_FIELDS:
+        value = params.get(field)
+        canonical[field] = int(value) if value not in (None, "") else None
+    for field in _COMPANY_FIELDS:
+        canonical[field] = sorted(set(params.get(field) or []))
+    return canonical
+
+def parameters_hash(params: Dict[str, Any]) -> str:
+    encoded = json.dumps(canonical_parameters(params), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def dataset_key(params: Dict[str, Any], source_versions: Dict[str, str]) -> str:
+    """Content address of a task's result: its canonical parameters plus source versions."""
+    encoded = json.dumps(
+        {"parameters": parameters_hash(params), "sources": source_versions},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def resolve_data_task_id(task_id: int, db: Session) -> int:
+    """Return the task id the records and rollups of `task_id` are stored under."""
+    row = (
+        db.query(Dataset.data_task_id)
+        .join(DatasetLink, DatasetLink.dataset_id == Dataset.id)
+        .filter(DatasetLink.task_id == task_id)
+        .first()
+    )
+    return row[0] if row else task_id
+
+def _claim_is_stale(dataset: Dataset, db: Session) -> bool:
+    """Whether the task holding a BUILDING claim can no longer finish it.
+
+    True once the builder is gone or no longer running (deleted, failed or
+    completed without marking the dataset ready), or once the claim has been
+    held longer than DATASET_CLAIM_TIMEOUT_SECONDS, e.g. by a task stuck
+    IN_PROGRESS in a worker that was killed.
+    """
+    builder_status = db.query(Task.status).filter(Task.id == dataset.data_task_id).scalar()
+    if builder_status not in (TaskStatus.PENDING, TaskStatus.IN_PROGRESS):
+        return True
+    claimed_at = dataset.claimed_at or dataset.created_at
+    age = (datetime.datetime.utcnow() - claimed_at).total_seconds()
+    return age > DATASET_CLAIM_TIMEOUT_SECONDS
+
+def _take_over_claim(dataset: Dataset, task_id: int, db: Session) -> bool:
+    # Compare-and-set on the current holder so of several waiters only one takes over
+    previous_task_id = dataset.data_task_id
+    taken = db.query(Dataset).filter(
+        Dataset.id == dataset.id,
+        Dataset.status == DatasetStatus.BUILDING,
+        Dataset.data_task_id == previous_task_id
+    ).update(
+        {Dataset.data_task_id: task_id, Dataset.claimed_at: datetime.datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    if taken:
+        logger.warning(f"Task {task_id} took over dataset {dataset.id} from stalled builder task {previous_task_id}")
+    db.refresh(dataset)
+    return bool(taken)
+
+def claim_dataset(task_id: int, params: Dict[str, Any], source_versions: Dict[str, str], db: Session) -> Tuple[Optional[Dataset], bool]:
+    """Find the dataset for these parameters/sources, or claim the right to build it.
+
+    Returns (dataset, is_builder). The claim is committed immediately and
+    guarded by the unique dataset_key, so of several identical tasks running
+    at once exactly one builds while the others wait for it. A claim already
+    held by `task_id` (a re-delivered job) is its own again, and a stale
+    claim (see _claim_is_stale) is taken over by the next task that asks.
+    (None, True) means the dataset is being released with its deleted
+    owner, so the task should store its own unshared copy.
+    """
+    key = dataset_key(params, source_versions)
+    existing = db.query(Dataset).filter(Dataset.dataset_key == key).populate_existing().first()
+    if existing is not None:
+        if existing.status != DatasetStatus.BUILDING:
+            owner_status = db.query(Task.status).filter(Task.id == existing.data_task_id).scalar()
+            if owner_status in (None, TaskStatus.DELETING):
+                logger.info(f"Dataset {existing.id} is being released with task {existing.data_task_id}, not reusing it")
+                return None, True
+            return existing, False
+        if existing.data_task_id == task_id:
+            logger.info(f"Task {task_id} resumes building dataset {existing.id}")
+            return existing, True
+        return existing, _claim_is_stale(existing, db) and _take_over_claim(existing, task_id, db)
+
+    dataset = Dataset(
+        dataset_key=key,
+        parameters_hash=parameters_hash(params),
+        source_versions=source_versions,
+        status=DatasetStatus.BUILDING,
+        data_task_id=task_id,
+        ref_count=0,
+        claimed_at=datetime.datetime.utcnow()
+    )
+    db.add(dataset)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return db.query(Dataset).filter(Dataset.dataset_key == key).populate_existing().first(), False
+    logger.info(f"Task {task_id} is building dataset {dataset.id}")
+    return dataset, True
+
+def link_task(task_id: int, dataset_id: int, db: Session) -> bool:
+    """Reference a ready dataset from a task. The caller owns the transaction.
+
+    Returns False, adding no link, if the dataset was released meanwhile
+    (e.g. by the reaper deleting its last owner).
+    """
+    referenced = db.query(Dataset).filter(
+        Dataset.id == dataset_id, Dataset.status == DatasetStatus.READY
+    ).update({Dataset.ref_count: Dataset.ref_count + 1}, synchronize_session=False)
+    if not referenced:
+        return False
+    db.add(DatasetLink(task_id=task_id, dataset_id=dataset_id))
+    return True
+
+def mark_dataset_ready(dataset_id: int, task_id: int, db: Session) -> bool:
+    """Publish a dataset built by `task_id`. The caller owns the transaction.
+
+    Returns False if another task took the claim over meanwhile; the rows
+    `task_id` wrote are then only its own.
+    """
+    return bool(db.query(Dataset).filter(
+        Dataset.id == dataset_id,
+        Dataset.status == DatasetStatus.BUILDING,
+        Dataset.data_task_id == task_id
+    ).update({Dataset.status: DatasetStatus.READY}, synchronize_session=False))
+
+def abandon_dataset(dataset_id: int, task_id: int, db: Session):
+    """Drop the claim `task_id` holds on a dataset whose build failed so a waiting task can take it over."""
+    claim = db.query(Dataset).filter(
+        Dataset.id == dataset_id,
+        Dataset.status == DatasetStatus.BUILDING,
+        Dataset.data_task_id == task_id
+    )
+    if claim.first() is None:
+        return
+    db.query(DatasetLink).filter(DatasetLink.dataset_id == dataset_id).delete()
+    claim.delete()
+
+def release_task_data(task_id: int, db: Session) -> Optional[int]:
+    """Hand on the dataset rows of a task about to be deleted.
+
+    Returns the task the records stored under `task_id` now belong to, or
+    None when nothing else uses them and they should be deleted. If the task
+    owns rows other (not deleting) tasks still reference, ownership and the
+    rollups move to one of those tasks here. The records are left for the
+    caller to move in chunks, so the task keeps its link until then (see
+    unlink_task) and a stopped reap resumes the move. The caller owns the
+    transaction.
+    """
+    link = db.get(DatasetLink, task_id)
+    if link is None:
+        return None
+
+    dataset = db.get(Dataset, link.dataset_id)
+    if dataset is None:
+        db.delete(link)
+        return None
+    if dataset.data_task_id != task_id:
+        # A task reusing the rows (it has none to move), or a move already under way
+        return dataset.data_task_id
+
+    new_owner = (
+        db.query(DatasetLink.task_id)
+        .join(Task, Task.id == DatasetLink.task_id)
+        .filter(DatasetLink.dataset_id == dataset.id, DatasetLink.task_id != task_id, Task.status != TaskStatus.DELETING)
+        .order_by(DatasetLink.task_id)
+        .first()
+    )
+    if new_owner is None:
+        logger.info(f"Dataset {dataset.id} is no longer referenced, freeing its rows")
+        db.query(DatasetLink).filter(DatasetLink.dataset_id == dataset.id).delete(synchronize_session=False)
+        db.delete(dataset)
+        return None
+
+    new_owner_id = new_owner[0]
+    logger.info(f"Moving dataset {dataset.id} rows from task {task_id} to task {new_owner_id}")
+    for model in ROLLUP_MODELS:
+        db.query(model).filter(model.task_id == task_id).update(
+            {model.task_id: new_owner_id}, synchronize_session=False
+        )
+    dataset.data_task_id = new_owner_id
+    return new_owner_id
+
+def unlink_task(task_id: int, db: Session):
+    """Drop a task's reference to its dataset once its rows have been handed on. The caller owns the transaction."""
+    link = db.get(DatasetLink, task_id)
+    if link is None:
+        return
+    dataset = db.get(Dataset, link.dataset_id)
+    db.delete(link)
+    if dataset is not None:
+        dataset.ref_count = max((dataset.ref_count or 1) - 1, 0)
+        logger.info(f"Task {task_id} released dataset {dataset.id}, {dataset.ref_count} references remain")
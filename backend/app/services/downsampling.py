@@ -0,0 +1,55 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps from a series.
+
+    The first and last points are always kept. The points between are split
+    into max_points - 2 equal buckets, and each bucket keeps the point that
+    forms the largest triangle with the previously kept point and the mean
+    of the next bucket, which preserves peaks and troughs that plain
+    decimation would drop. `x` must be sorted.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = max_points - 2
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+
+    for i in range(buckets):
+        # Integer bucket bounds, so the last bucket ends exactly at the final point
+        start = i * (n - 2) // buckets + 1
+        end = (i + 1) * (n - 2) // buckets + 1
+        # The last bucket looks ahead to the final point alone
+        next_end = min((i + 2) * (n - 2) // buckets + 1, n)
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+def downsample_timeline(points: List[Dict[str, Any]], max_points: int) -> List[Dict[str, Any]]:
+    """Keep at most `max_points` buckets per company with LTTB over revenue."""
+    dates = sorted({point["date"] for point in points})
+    position = {date: index for index, date in enumerate(dates)}
+    by_company = {}
+    for point in points:
+        by_company.setdefault(point["company"], []).append(point)
+
+    kept = []
+    for series in by_company.values():
+        x = np.fromiter((position[point["date"]] for point in series), dtype=np.float64, count=len(series))
+        y = np.fromiter((point["total_revenue"] or 0 for point in series), dtype=np.float64, count=len(series))
+        kept.extend(series[index] for index in lttb_indices(x, y, max_points))
+    kept.sort(key=lambda point: (point["date"], point["company"]))
+    return kept
@@ -0,0 +1,158 @@
+import os
+import socket
+import uuid
+import datetime
+import logging
+from typing import Optional
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+
+from app.models.models import Job, JobStatus, Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", "3"))
+CLAIM_CANDIDATES = 8
+
+def new_worker_id() -> str:
+    """A lease owner id that is unique across hosts, processes and restarts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def enqueue_job(task_id: int, db: Session) -> Job:
+    """Add a queued job for a task. The caller owns the transaction."""
+    job = Job(task_id=task_id, status=JobStatus.QUEUED, attempts=0)
+    db.add(job)
+    db.flush()
+    logger.debug(f"Queued job {job.id} for task {task_id}")
+    return job
+
+def claim_job(db: Session, worker_id: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Job]:
+    """Atomically lease the oldest queued job to `worker_id`.
+
+    Each candidate is taken with a compare-and-set UPDATE that only matches
+    while the job is still queued, so concurrent workers (threads or
+    processes) can never lease the same job twice.
+    """
+    candidates = (
+        db.query(Job.id)
+        .filter(Job.status == JobStatus.QUEUED)
+        .order_by(Job.id)
+        .limit(CLAIM_CANDIDATES)
+        .all()
+    )
+    for (job_id,) in candidates:
+        now = datetime.datetime.utcnow()
+        claimed = (
+            db.query(Job)
+            .filter(Job.id == job_id, Job.status == JobStatus.QUEUED)
+            .update({
+                Job.status: JobStatus.LEASED,
+                Job.lease_owner: worker_id,
+                Job.lease_expires_at: now + datetime.timedelta(seconds=lease_seconds),
+                Job.attempts: Job.attempts + 1,
+                Job.updated_at: now
+            }, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            job = db.get(Job, job_id)
+            logger.info(f"Worker {worker_id} leased job {job_id} for task {job.task_id} (attempt {job.attempts})")
+            return job
+    return None
+
+def heartbeat_job(job_id: int, worker_id: str, db: Session, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+    """Extend a lease still held by `worker_id`. Returns False if the lease was lost."""
+    now = datetime.datetime.utcnow()
+    extended = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.status == JobStatus.LEASED, Job.lease_owner == worker_id)
+        .update({
+            Job.lease_expires_at: now + datetime.timedelta(seconds=lease_seconds),
+            Job.updated_at: now
+        }, synchronize_session=False)
+    )
+    db.commit()
+    return bool(extended)
+
+def finish_job(job_id: int, worker_id: str, db: Session, status: JobStatus = JobStatus.DONE) -> bool:
+    """Mark a leased job as finished. Returns False if the lease was lost."""
+    finished = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.status == JobStatus.LEASED, Job.lease_owner == worker_id)
+        .update({
+            Job.status: status,
+            Job.lease_owner: None,
+            Job.lease_expires_at: None,
+            Job.updated_at: datetime.datetime.utcnow()
+        }, synchronize_session=False)
+    )
+    db.commit()
+    return bool(finished)
+
+def _expired_leases(now: datetime.datetime, db: Session):
+    return (
+        db.query(Job.id, Job.task_id, Job.attempts, Job.lease_owner)
+        .filter(Job.status == JobStatus.LEASED, Job.lease_expires_at < now)
+        .all()
+    )
+
+def requeue_expired_jobs(db: Session, max_attempts: int = MAX_JOB_ATTEMPTS) -> int:
+    """Return jobs whose lease expired to the queue, failing those out of attempts.
+
+    Each job is released with a compare-and-set UPDATE that only matches
+    while its lease is still expired, so a lease renewed or re-taken since
+    the expired ones were read is left alone. Returns the number of jobs
+    re-queued.
+    """
+    now = datetime.datetime.utcnow()
+    requeued = 0
+    for job in _expired_leases(now, db):
+        out_of_attempts = job.attempts >= max_attempts
+        released = (
+            db.query(Job)
+            .filter(Job.id == job.id, Job.status == JobStatus.LEASED, Job.lease_expires_at < now)
+            .update({
+                Job.status: JobStatus.FAILED if out_of_attempts else JobStatus.QUEUED,
+                Job.lease_owner: None,
+                Job.lease_expires_at: None,
+                Job.updated_at: now
+            }, synchronize_session=False)
+        )
+        if not released:
+            continue
+        if out_of_attempts:
+            logger.error(f"Job {job.id} for task {job.task_id} lost its lease {job.attempts} times, giving up")
+            task = db.get(Task, job.task_id)
+            if task is not None and task.status not in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.DELETING):
+                task.status = TaskStatus.FAILED
+                task.parameters = {**(task.parameters or {}), "error_message": "Task worker stopped responding too many times"}
+        else:
+            logger.warning(f"Lease on job {job.id} held by {job.lease_owner} expired, re-queueing task {job.task_id}")
+            requeued += 1
+    db.commit()
+    return requeued
+
+def enqueue_orphaned_tasks(db: Session) -> int:
+    """Queue jobs for unfinished tasks that have no open job (e.g. created before the durable queue).
+
+    Several schedulers may sweep at once; the unique index on open jobs makes
+    the loser's INSERT OR IGNORE a no-op instead of a second job for the task.
+    """
+    open_jobs = db.query(Job.task_id).filter(or_(Job.status == JobStatus.QUEUED, Job.status == JobStatus.LEASED))
+    orphans = (
+        db.query(Task.id)
+        .filter(Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]))
+        .filter(Task.id.not_in(open_jobs))
+        .all()
+    )
+    queued = 0
+    for (task_id,) in orphans:
+        result = db.execute(
+            insert(Job).prefix_with("OR IGNORE").values(task_id=task_id, status=JobStatus.QUEUED, attempts=0)
+        )
+        queued += result.rowcount
+    db.commit()
+    if queued:
+        logger.info(f"Queued {queued} unfinished tasks that had no job")
+    return queued
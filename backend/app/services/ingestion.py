@@ -0,0 +1,55 @@
+import os
+import logging
+from typing import Callable, Iterable, Optional
+from sqlalchemy.orm import Session
+
+from app.models.models import Record
+from app.services.normalization import NormalizedSource
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "5000"))
+
+def write_records(
+    task_id: int,
+    sources: Iterable[NormalizedSource],
+    db: Session,
+    batch_size: int = INGEST_BATCH_SIZE,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """Insert normalized source columns into the records table.
+
+    Rows go through chunked Core INSERT executemany on the session's
+    connection, so they join the task's transaction without creating ORM
+    instances or touching the identity map. The caller owns the commit.
+    `on_progress` is called with the running total after every batch.
+    Returns the number of rows written.
+    """
+    connection = db.connection()
+    statement = Record.__table__.insert()
+    written = 0
+
+    for normalized in sources:
+        companies, models, sale_dates, prices = normalized.columns()
+        for start in range(0, len(companies), batch_size):
+            end = start + batch_size
+            rows = [
+                {
+                    "task_id": task_id,
+                    "source": normalized.source,
+                    "company": company,
+                    "model": model,
+                    "sale_date": sale_date,
+                    "price": price
+                }
+                for company, model, sale_date, price in zip(
+                    companies[start:end], models[start:end], sale_dates[start:end], prices[start:end]
+                )
+            ]
+            connection.execute(statement, rows)
+            written += len(rows)
+            if on_progress is not None:
+                on_progress(written)
+        logger.debug(f"Wrote {len(companies)} Source {normalized.source} records for task {task_id}")
+
+    return written
@@ -2,18 +2,26 @@ import queue
 import threading
 import time
 import random
-import json
-import pandas as pd
-import datetime
 import os
-import requests
 import asyncio
 import aiohttp
 import logging
-from io import StringIO
+import functools
+import hashlib
+from typing import Optional, Tuple
+from collections import OrderedDict
 from sqlalchemy.orm import Session
-from app.models.models import Task, Record, TaskStatus
-from concurrent.futures import ThreadPoolExecutor
+from app.models.models import Task, TaskStatus, DatasetStatus
+from app.services.rollups import build_rollups
+from app.services.normalization import NormalizedSource, parse_source_a_payload, parse_source_b_payload
+from app.services.parse_pool import run_parse
+from app.services.ingestion import write_records, INGEST_BATCH_SIZE
+from app.services.durable_queue import enqueue_job
+from app.services import dedup
+from app.services.task_events import task_events
+from app.services.metrics import TASK_STAGE_SECONDS, TASKS_PROCESSED
+from app.services.task_trace import TaskTrace
+from concurrent.futures import ThreadPoolExecutor, Future
 
 logger = logging.getLogger(__name__)
 
@@ -22,39 +30,211 @@ NUM_WORKERS = 4
 workers_running = True
 worker_threads = []
 
+# Point these at a local stand-in (benchmarks/source_server.py) to run offline
+SOURCE_A_URL = os.getenv("SOURCE_A_URL", "https://gist.githubusercontent.com/AmishaMe24/f4aadff1bcabac79f6e882d1637d7401/raw")
+SOURCE_B_URL = os.getenv("SOURCE_B_URL", "https://gist.githubusercontent.com/AmishaMe24/d97130df157eb2c978ed5f838903033e/raw")
+
+def parse_delay_range(value: str) -> Tuple[float, float]:
+    """Parse "min,max" seconds; a single number means a fixed delay."""
+    bounds = tuple(float(bound) for bound in value.split(","))
+    if len(bounds) == 1:
+        return bounds[0], bounds[0]
+    if len(bounds) != 2:
+        raise ValueError(f"Expected 'seconds' or 'min,max' seconds, got {value!r}")
+    return bounds
+
+# Simulated waits before and during processing, drawn uniformly from "min,max" seconds
+SIMULATED_DELAY_SECONDS = parse_delay_range(os.getenv("SIMULATED_DELAY_SECONDS", "5,10"))
+SOURCE_CACHE_TTL_SECONDS = float(os.getenv("SOURCE_CACHE_TTL_SECONDS", "300"))
+SOURCE_CACHE_MAX_BYTES = int(os.getenv("SOURCE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+
+# Blocking SQLAlchemy work from task coroutines runs here, never on the event loop
+db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="TaskDB")
+
+# Pooled HTTP sessions keyed by the event loop that owns them (see register_http_session)
+_http_sessions = {}
+
+async def run_db(fn, *args):
+    """Run blocking database work on the dedicated DB executor so the event loop stays free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(fn, *args))
+
+def _load_task(task_id: int, db: Session):
+    return db.query(Task).filter(Task.id == task_id).first()
+
+def _is_deleting(task_id: int, db: Session) -> bool:
+    # Read the column rather than the loaded task, which predates any delete request
+    return db.query(Task.status).filter(Task.id == task_id).scalar() == TaskStatus.DELETING
+
+def _mark_failed(task: Task, error_message: str, db: Session, dataset_id: Optional[int] = None) -> bool:
+    """Mark the task FAILED; returns False if it was deleted meanwhile and keeps DELETING."""
+    if dataset_id is not None:
+        dedup.abandon_dataset(dataset_id, task.id, db)
+    if _is_deleting(task.id, db):
+        db.commit()
+        return False
+    task.status = TaskStatus.FAILED
+    task.parameters = {**task.parameters, "error_message": error_message}
+    db.commit()
+    return True
+
+def _complete_task(task: Task, dataset_id: Optional[int], db: Session, build: bool) -> bool:
+    """Mark the task COMPLETED; returns False if it was deleted meanwhile.
+
+    A deleted task stays DELETING so the reaper removes the rows it wrote,
+    and a dataset it built is abandoned rather than offered for reuse.
+    """
+    if _is_deleting(task.id, db):
+        if dataset_id is not None and build:
+            dedup.abandon_dataset(dataset_id, task.id, db)
+        db.commit()
+        return False
+    if dataset_id is not None and build:
+        if dedup.mark_dataset_ready(dataset_id, task.id, db):
+            dedup.link_task(task.id, dataset_id, db)
+        else:
+            logger.warning(f"Task {task.id} lost its claim on dataset {dataset_id}, keeping its rows unshared")
+    task.status = TaskStatus.COMPLETED
+    db.commit()
+    return True
+
+def _release_claim(dataset_id: int, task_id: int, db: Session):
+    # A fresh session: after a cancellation `db` may still be in use on another executor thread
+    with Session(bind=db.get_bind()) as session:
+        dedup.abandon_dataset(dataset_id, task_id, session)
+        session.commit()
+
+async def _acquire_dataset(task_id: int, params, sources, db: Session):
+    """Return (dataset_id, build) for a task about to store `sources`.
+
+    build is True when this task must write the rows itself. A task whose
+    parameters and source versions match a finished dataset reuses it; one
+    matching a dataset still being built waits up to DEDUP_WAIT_SECONDS for
+    it. (None, True) means sharing is not possible and the task stores its
+    own unshared copy.
+    """
+    source_versions = {normalized.source: normalized.version for normalized in sources}
+    if not all(source_versions.values()):
+        return None, True
+
+    deadline = time.monotonic() + dedup.DEDUP_WAIT_SECONDS
+    while True:
+        dataset, is_builder = await run_db(dedup.claim_dataset, task_id, params, source_versions, db)
+        if is_builder:
+            return (dataset.id if dataset is not None else None), True
+        if dataset.status == DatasetStatus.READY:
+            logger.info(f"Task {task_id} reuses dataset {dataset.id} stored by task {dataset.data_task_id}")
+            return dataset.id, False
+        if time.monotonic() >= deadline:
+            logger.warning(f"Task {task_id} gave up waiting for dataset {dataset.id}, storing its own copy")
+            return None, True
+        logger.debug(f"Task {task_id} waiting for task {dataset.data_task_id} to finish building dataset {dataset.id}")
+        await asyncio.sleep(dedup.DEDUP_POLL_SECONDS)
+
+def _store_trace(task_id: int, trace, db: Session):
+    # updated_at is left alone: the trace is not part of any cached task response
+    db.query(Task).filter(Task.id == task_id).update(
+        {Task.trace: trace, Task.updated_at: Task.updated_at}, synchronize_session=False
+    )
+    db.commit()
+
+async def _timed_stage(trace: TaskTrace, stage: str, awaitable):
+    with trace.stage(stage):
+        return await awaitable
+
+def _finish_task(task: Task, dataset_id: Optional[int], build: bool, sources, trace: TaskTrace, db: Session) -> bool:
+    """Write the records and rollups a building task owes (or link a reusing one), then complete it.
+
+    Runs as one DB executor call because the write transaction spans all
+    three steps: handing the executor back in between would let tasks
+    waiting on the write lock take every executor thread, leaving the lock
+    holder unable to reach its commit until their busy timeout ran out.
+    Returns _complete_task's result.
+    """
+    task_id = task.id
+    if dataset_id is not None and not build and not dedup.link_task(task_id, dataset_id, db):
+        # Released since it was found (its last owner was reaped): store the rows after all
+        logger.warning(f"Dataset {dataset_id} was released before task {task_id} could reuse it, storing its own copy")
+        dataset_id, build = None, True
+        trace.reused_dataset = False
+    if build:
+        try:
+            with trace.stage("insert"):
+                trace.rows_written = write_records(
+                    task_id, sources, db, INGEST_BATCH_SIZE,
+                    lambda written: task_events.publish(task_id, TaskStatus.IN_PROGRESS, rows_written=written)
+                )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Database error while saving records for task {task_id}: {str(e)}")
+            raise Exception(f"Database error while saving records: {str(e)}")
+
+        try:
+            with trace.stage("rollups"):
+                build_rollups(task_id, db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to build analytics rollups for task {task_id}: {str(e)}")
+            raise Exception(f"Failed to build analytics rollups: {str(e)}")
+
+    logger.info(f"Updating task {task_id} status to COMPLETED")
+    try:
+        with trace.stage("commit"):
+            return _complete_task(task, dataset_id, db, build)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to commit completed status for task {task_id}: {str(e)}")
+        raise Exception(f"Failed to commit completed status: {str(e)}")
+
 async def process_task_async(task_id: int, db: Session):
     """Process a task from the queue asynchronously."""
     logger.info(f"Starting to process task {task_id}")
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = await run_db(_load_task, task_id, db)
     if not task:
         logger.error(f"Task {task_id} not found")
         return
+    if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.DELETING):
+        # A re-delivered job whose previous run already finished the task, or a deleted task
+        logger.info(f"Task {task_id} already {task.status}, skipping")
+        return
+    trace = TaskTrace()
+    if task.status == TaskStatus.PENDING and task.created_at is not None:
+        trace.add_stage("queue_wait", task.created_at, (trace.started_at - task.created_at).total_seconds())
     
-    delay = random.uniform(5, 10)
+    delay = random.uniform(*SIMULATED_DELAY_SECONDS)
     logger.debug(f"Task {task_id} waiting in PENDING state for {delay:.2f} seconds")
-    await asyncio.sleep(delay)
+    await _timed_stage(trace, "pending_delay", asyncio.sleep(delay))
+    if await run_db(_is_deleting, task_id, db):
+        logger.info(f"Task {task_id} was deleted before it started, skipping")
+        return
     
     logger.info(f"Updating task {task_id} status to IN_PROGRESS")
     task.status = TaskStatus.IN_PROGRESS
     try:
-        db.commit()
+        await run_db(db.commit)
     except Exception as e:
-        db.rollback()
+        await run_db(db.rollback)
         logger.error(f"Failed to update task status to IN_PROGRESS: {str(e)}")
         return
+    task_events.publish(task_id, TaskStatus.IN_PROGRESS, rows_fetched=0, rows_written=0)
     
-    processing_delay = random.uniform(5, 10)
+    processing_delay = random.uniform(*SIMULATED_DELAY_SECONDS)
     logger.debug(f"Task {task_id} processing for {processing_delay:.2f} seconds")
-    await asyncio.sleep(processing_delay)
+    await _timed_stage(trace, "processing_delay", asyncio.sleep(processing_delay))
     
+    built_dataset_id = None
+    outcome, error_message = "completed", None
     try:
-        params = task.parameters
+        params = await run_db(getattr, task, "parameters")
         logger.info(f"Task {task_id} parameters: {params}")
         
         try:
             logger.info(f"Fetching data from sources for task {task_id}")
-            source_a_task = fetch_source_a_data_async(params)
-            source_b_task = fetch_source_b_data_async(params)
+            source_a_task = _timed_stage(trace, "fetch_a", fetch_source_a_frame_async(params))
+            source_b_task = _timed_stage(trace, "fetch_b", fetch_source_b_frame_async(params))
             
             source_a_data, source_b_data = await asyncio.gather(
                 source_a_task, 
@@ -77,73 +257,61 @@ async def process_task_async(task_id: int, db: Session):
             logger.error(f"Data fetching error for task {task_id}: {str(e)}")
             raise Exception(f"Data fetching error: {str(e)}")
         
-        records_to_add = []
-        
-        # Process source A records
-        for record in source_a_data:
-            try:
-                db_record = Record(
-                    task_id=task_id,
-                    source="A",
-                    company=record["company"],
-                    model=record["model"],
-                    sale_date=datetime.datetime.strptime(record["sale_date"], "%Y-%m-%d"),
-                    price=float(record["price"])
+        sources = (source_a_data, source_b_data)
+        for normalized in sources:
+            trace.record_source(normalized)
+            if normalized.rejected:
+                logger.warning(
+                    f"Source {normalized.source} had {normalized.rejected} malformed rows rejected for task {task_id}, "
+                    f"sample: {normalized.rejected_sample}"
                 )
-                records_to_add.append(db_record)
-            except (KeyError, ValueError, TypeError) as e:
-                logger.warning(f"Error processing Source A record for task {task_id}: {str(e)}, Record: {record}")
         
-        # Process source B records
-        for record in source_b_data:
-            try:
-                db_record = Record(
-                    task_id=task_id,
-                    source="B",
-                    company=record["company"],
-                    model=record["model"],
-                    sale_date=datetime.datetime.strptime(record["sale_date"], "%Y-%m-%d"),
-                    price=float(record["price"])
-                )
-                records_to_add.append(db_record)
-            except (KeyError, ValueError, TypeError) as e:
-                logger.warning(f"Error processing Source B record for task {task_id}: {str(e)}, Record: {record}")
-        
-        if not records_to_add:
+        total_records = sum(len(normalized) for normalized in sources)
+        task_events.publish(task_id, TaskStatus.IN_PROGRESS, rows_fetched=total_records)
+        if not total_records:
             logger.error(f"No valid records found to save for task {task_id}")
             raise Exception("No valid records found to save after filtering and processing")
         
-        logger.info(f"Saving {len(records_to_add)} records for task {task_id}")
-        try:
-            db.bulk_save_objects(records_to_add)
-            db.flush()
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Database error while saving records for task {task_id}: {str(e)}")
-            raise Exception(f"Database error while saving records: {str(e)}")
-        
-        logger.info(f"Updating task {task_id} status to COMPLETED")
-        task.status = TaskStatus.COMPLETED
-        try:
-            db.commit()
+        dataset_id, build = await _timed_stage(trace, "dataset", _acquire_dataset(task_id, params, sources, db))
+        trace.reused_dataset = not build
+        if build:
+            built_dataset_id = dataset_id
+            logger.info(f"Saving {total_records} records for task {task_id}")
+        if await run_db(_finish_task, task, dataset_id, build, sources, trace, db):
+            task_events.publish(task_id, TaskStatus.COMPLETED, reused_dataset=trace.reused_dataset)
+            TASKS_PROCESSED.inc(outcome="completed")
             logger.info(f"Task {task_id} completed successfully")
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Failed to commit completed status for task {task_id}: {str(e)}")
-            raise Exception(f"Failed to commit completed status: {str(e)}")
+        else:
+            outcome = "deleted"
+            TASKS_PROCESSED.inc(outcome="deleted")
+            logger.info(f"Task {task_id} was deleted while running, leaving its rows to the reaper")
             
     except Exception as e:
-        error_message = str(e)
+        outcome, error_message = "failed", str(e)
         logger.error(f"Task {task_id} failed: {error_message}")
         
         try:
-            task.status = TaskStatus.FAILED
-            task.parameters = {**task.parameters, "error_message": error_message}
-            db.commit()
-            logger.info(f"Updated task {task_id} status to FAILED with error message")
+            if await run_db(_mark_failed, task, error_message, db, built_dataset_id):
+                task_events.publish(task_id, TaskStatus.FAILED, error_message=error_message)
+                TASKS_PROCESSED.inc(outcome="failed")
+                logger.info(f"Updated task {task_id} status to FAILED with error message")
         except Exception as commit_error:
-            db.rollback()
+            await run_db(db.rollback)
             logger.error(f"Failed to update task {task_id} failure status: {str(commit_error)}")
+    except BaseException:
+        # Cancelled mid-build (e.g. at shutdown): free the claim so identical tasks need not wait it out
+        if built_dataset_id is not None:
+            try:
+                await run_db(_release_claim, built_dataset_id, task_id, db)
+            except Exception as e:
+                logger.error(f"Failed to release the dataset claim of cancelled task {task_id}: {str(e)}")
+        raise
+    
+    try:
+        await run_db(_store_trace, task_id, trace.to_dict(outcome, error_message), db)
+    except Exception as e:
+        await run_db(db.rollback)
+        logger.error(f"Failed to store the execution trace of task {task_id}: {str(e)}")
 
 def process_task(task_id: int, db: Session):
     """Process a task from the queue (synchronous wrapper for async function)."""
@@ -154,77 +322,243 @@ def process_task(task_id: int, db: Session):
     finally:
         loop.close()
 
-async def fetch_source_a_data_async(params):
-    """Fetch data from source A (JSON API) asynchronously."""
-    url = "https://gist.githubusercontent.com/AmishaMe24/f4aadff1bcabac79f6e882d1637d7401/raw"
-    
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                
-                text_content = await response.text()
-                
-                try:
-                    data = json.loads(text_content)
-                except json.JSONDecodeError as json_err:
-                    raise Exception(f"Invalid JSON format: {str(json_err)}. Content: {text_content[:100]}...")
-                
-                filtered_data = []
-                start_year = params.get("start_year_a")
-                end_year = params.get("end_year_a")
-                companies = params.get("companies_a", [])
-                
-                for record in data:
-                    sale_date = datetime.datetime.strptime(record["sale_date"], "%Y-%m-%d")
-                    
-                    if start_year and sale_date.year < int(start_year):
-                        continue
-                    if end_year and sale_date.year > int(end_year):
-                        continue
-                        
-                    if companies and record["company"] not in companies:
-                        continue
-                        
-                    filtered_data.append(record)
-                
-                return filtered_data
+def create_http_session() -> aiohttp.ClientSession:
+    """Create a connection-pooled HTTP session with per-host limits and DNS caching."""
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_SIZE,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=300
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+def register_http_session(loop, session: aiohttp.ClientSession):
+    """Share `session` with every source fetch running on `loop`."""
+    _http_sessions[loop] = session
+
+def unregister_http_session(loop):
+    return _http_sessions.pop(loop, None)
+
+def shared_http_session():
+    """Return the pooled session owned by the running loop, if it has one."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return _http_sessions.get(loop)
+
+class SourceCacheEntry:
+    """A parsed source payload plus the validators needed to revalidate it.
+
+    `version` is a content hash of the downloaded body, so it only changes
+    when the source data itself does.
+    """
+
+    def __init__(self, payload, etag, last_modified, size_bytes, version, parse_seconds=None):
+        self.payload = payload
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size_bytes = size_bytes
+        self.version = version
+        self.parse_seconds = parse_seconds
+        self.fetched_at = time.monotonic()
+
+class DownloadInterrupted(Exception):
+    """The download a cache miss was waiting on was cancelled before it finished."""
+
+class SourceCache:
+    """Process-wide cache of parsed source payloads shared by all tasks.
+
+    Entries younger than `ttl_seconds` are served directly; older entries are
+    revalidated with If-None-Match/If-Modified-Since and reused on a 304.
+    Concurrent misses for the same URL share one download (single-flight),
+    including across the per-worker event loops. The cache is bounded by the
+    size of the downloaded bodies and evicts least recently used entries.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get(self, url: str, parse):
+        """Return the parsed payload for `url`, downloading it at most once at a time."""
+        entry, _ = await self.get_entry(url, parse)
+        return entry.payload
+
+    async def get_entry(self, url: str, parse) -> Tuple[SourceCacheEntry, bool]:
+        """Like get(), but return the whole cache entry including its version.
+
+        The second value is True only for the caller that downloaded the body:
+        hits, revalidations and callers coalesced onto another download get False.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(url)
+                if entry is not None and time.monotonic() - entry.fetched_at < self.ttl_seconds:
+                    self._entries.move_to_end(url)
+                    self.hits += 1
+                    return entry, False
                 
+                future = self._inflight.get(url)
+                is_leader = future is None
+                if is_leader:
+                    future = Future()
+                    self._inflight[url] = future
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+            
+            if is_leader:
+                return await self._lead_download(url, parse, entry, future)
+            
+            logger.debug(f"Waiting for in-flight download of {url}")
+            try:
+                # Shielded: a cancelled waiter must not cancel the download the others share
+                return await asyncio.shield(asyncio.wrap_future(future)), False
+            except DownloadInterrupted:
+                # The leader was cancelled; one of the waiters takes over the download
+                logger.debug(f"In-flight download of {url} was interrupted, retrying")
+
+    async def _lead_download(self, url: str, parse, entry, future: Future) -> Tuple[SourceCacheEntry, bool]:
+        """Download `url` on behalf of every waiter on `future`, which is always resolved."""
+        try:
+            fetched = await self._fetch(url, parse, entry)
+            future.set_result(fetched)
+            # A 304 hands back the stale entry without a body
+            return fetched, fetched is not entry
         except Exception as e:
-            raise Exception(f"Failed to fetch data from Source A: {str(e)}")
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # Cancellation must not leave the waiters blocked on a future nobody resolves
+            future.set_exception(DownloadInterrupted(url))
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    async def _fetch(self, url: str, parse, stale_entry):
+        headers = {}
+        if stale_entry is not None:
+            if stale_entry.etag:
+                headers["If-None-Match"] = stale_entry.etag
+            if stale_entry.last_modified:
+                headers["If-Modified-Since"] = stale_entry.last_modified
+        
+        session = shared_http_session()
+        if session is not None:
+            return await self._request(session, url, parse, stale_entry, headers)
+        
+        async with aiohttp.ClientSession() as session:
+            return await self._request(session, url, parse, stale_entry, headers)
+
+    async def _request(self, session, url: str, parse, stale_entry, headers):
+        async with session.get(url, headers=headers) as response:
+            if stale_entry is not None and response.status == 304:
+                logger.debug(f"Source {url} not modified, reusing cached payload")
+                with self._lock:
+                    self.revalidations += 1
+                    stale_entry.fetched_at = time.monotonic()
+                    if url in self._entries:
+                        self._entries.move_to_end(url)
+                return stale_entry
+            
+            response.raise_for_status()
+            # Read the body once: its bytes are what the cache budget and version count
+            body = await response.read()
+            parse_started = time.perf_counter()
+            payload = await run_parse(parse, body.decode(response.get_encoding()))
+            parse_seconds = time.perf_counter() - parse_started
+            TASK_STAGE_SECONDS.observe(parse_seconds, stage="parse")
+            entry = SourceCacheEntry(
+                payload,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                len(body),
+                hashlib.sha256(body).hexdigest(),
+                parse_seconds
+            )
+            self._store(url, entry)
+            return entry
+
+    def _store(self, url: str, entry: SourceCacheEntry):
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._total_bytes -= previous.size_bytes
+            if entry.size_bytes > self.max_bytes:
+                logger.warning(f"Source {url} ({entry.size_bytes} bytes) exceeds the cache budget, not caching")
+                return
+            self._entries[url] = entry
+            self._total_bytes += entry.size_bytes
+            while self._total_bytes > self.max_bytes:
+                evicted_url, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size_bytes
+                self.evictions += 1
+                logger.debug(f"Evicted cached source {evicted_url}")
+
+    def clear(self):
+        """Drop every cached payload and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            self.hits = self.misses = self.revalidations = self.coalesced = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+source_cache = SourceCache(SOURCE_CACHE_TTL_SECONDS, SOURCE_CACHE_MAX_BYTES)
+
+async def fetch_source_a_frame_async(params) -> NormalizedSource:
+    """Fetch source A (JSON API) as typed columns filtered by the task's parameters."""
+    try:
+        entry, downloaded = await source_cache.get_entry(SOURCE_A_URL, parse_source_a_payload)
+        return entry.payload.filter(
+            params.get("start_year_a"),
+            params.get("end_year_a"),
+            params.get("companies_a", [])
+        ).with_origin(entry.version, entry.size_bytes, downloaded, entry.parse_seconds)
+    except Exception as e:
+        raise Exception(f"Failed to fetch data from Source A: {str(e)}")
+
+async def fetch_source_b_frame_async(params) -> NormalizedSource:
+    """Fetch source B (CSV from hosted file) as typed columns filtered by the task's parameters."""
+    try:
+        entry, downloaded = await source_cache.get_entry(SOURCE_B_URL, parse_source_b_payload)
+        return entry.payload.filter(
+            params.get("start_year_b"),
+            params.get("end_year_b"),
+            params.get("companies_b", [])
+        ).with_origin(entry.version, entry.size_bytes, downloaded, entry.parse_seconds)
+    except Exception as e:
+        raise Exception(f"Failed to fetch data from Source B: {str(e)}")
+
+async def fetch_source_a_data_async(params):
+    """Fetch data from source A (JSON API) asynchronously."""
+    return (await fetch_source_a_frame_async(params)).to_dicts()
 
 async def fetch_source_b_data_async(params):
     """Fetch data from source B (CSV from hosted file) asynchronously."""
-    url = "https://gist.githubusercontent.com/AmishaMe24/d97130df157eb2c978ed5f838903033e/raw"
-    
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                text = await response.text()
-                
-                csv_data = StringIO(text)
-                df = pd.read_csv(csv_data)
-                
-                start_year = params.get("start_year_b")
-                end_year = params.get("end_year_b")
-                companies = params.get("companies_b", [])
-                
-                df["sale_date"] = pd.to_datetime(df["sale_date"])
-                
-                if start_year:
-                    df = df[df["sale_date"].dt.year >= int(start_year)]
-                if end_year:
-                    df = df[df["sale_date"].dt.year <= int(end_year)]
-                
-                if companies:
-                    df = df[df["company"].isin(companies)]
-                
-                df["sale_date"] = df["sale_date"].dt.strftime("%Y-%m-%d")
-                return df.to_dict("records")
-                
-        except Exception as e:
-            raise Exception(f"Failed to fetch data from Source B: {str(e)}")
+    return (await fetch_source_b_frame_async(params)).to_dicts()
 
 def worker(db_factory):
     """Worker thread to process tasks from the queue."""
@@ -288,9 +622,17 @@ def stop_workers():
     
     logger.info("All worker threads stopped")
 
-def enqueue_task(task_id: int):
-    """Add a task to the queue."""
+def enqueue_task(task_id: int, db: Optional[Session] = None):
+    """Add a task to the queue.
+
+    With a session the task is written to the durable jobs table in the
+    caller's transaction, where the scheduler and standalone workers claim
+    it. Without one it goes on the in-memory queue for the thread workers.
+    """
     logger.info(f"Enqueueing task {task_id}")
+    if db is not None:
+        enqueue_job(task_id, db)
+        return
     task_queue.put(task_id)
 
 # For backward compatibility
@@ -0,0 +1,133 @@
+import json
+import logging
+from io import StringIO
+from typing import List, Optional, Dict, Any
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NORMALIZED_COLUMNS = ["company", "model", "sale_date", "price"]
+REJECTED_SAMPLE_SIZE = 5
+
+class NormalizedSource:
+    """Typed, column-oriented records from one source plus the rows it rejected.
+
+    `frame` always has the NORMALIZED_COLUMNS with categorical company/model,
+    datetime64 sale_date and float64 price. Rejected rows are kept only as a
+    count and a small sample so malformed payloads do not flood the logs.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        frame: pd.DataFrame,
+        rejected: int = 0,
+        rejected_sample: Optional[List[Dict[str, Any]]] = None,
+        version: Optional[str] = None,
+        unfiltered_rows: Optional[int] = None
+    ):
+        self.source = source
+        self.frame = frame
+        self.rejected = rejected
+        self.rejected_sample = rejected_sample or []
+        self.version = version
+        # Valid rows before a task's filters were applied
+        self.unfiltered_rows = len(frame) if unfiltered_rows is None else unfiltered_rows
+        # Set by the source fetchers through with_origin
+        self.payload_bytes = None
+        self.bytes_downloaded = None
+        self.parse_seconds = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    def filter(self, start_year=None, end_year=None, companies=None) -> "NormalizedSource":
+        """Apply the task's year range and company list as whole-array masks."""
+        frame = self.frame
+        mask = pd.Series(True, index=frame.index)
+        if start_year:
+            mask &= frame["sale_date"].dt.year >= int(start_year)
+        if end_year:
+            mask &= frame["sale_date"].dt.year <= int(end_year)
+        if companies:
+            mask &= frame["company"].isin(companies)
+        return NormalizedSource(self.source, frame[mask], self.rejected, self.rejected_sample, self.version, self.unfiltered_rows)
+
+    def with_version(self, version: Optional[str]) -> "NormalizedSource":
+        """Tag the records with the version of the source payload they came from."""
+        self.version = version
+        return self
+
+    def with_origin(self, version: Optional[str], payload_bytes: int, downloaded: bool, parse_seconds: Optional[float]) -> "NormalizedSource":
+        """Tag the records with their payload's version and size, and whether this fetch downloaded it."""
+        self.payload_bytes = payload_bytes
+        self.bytes_downloaded = payload_bytes if downloaded else 0
+        self.parse_seconds = parse_seconds if downloaded else None
+        return self.with_version(version)
+
+    def columns(self):
+        """Return (company, model, sale_date, price) as plain Python lists."""
+        frame = self.frame
+        return (
+            frame["company"].astype(object).tolist(),
+            frame["model"].astype(object).tolist(),
+            list(frame["sale_date"].dt.to_pydatetime()),
+            frame["price"].tolist(),
+        )
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Render the records as dicts with 'YYYY-MM-DD' dates."""
+        frame = self.frame.astype({"company": object, "model": object})
+        frame = frame.assign(sale_date=frame["sale_date"].dt.strftime("%Y-%m-%d"))
+        return frame.to_dict("records")
+
+def normalize_frame(source: str, raw: pd.DataFrame) -> NormalizedSource:
+    """Coerce a raw source frame into typed columns, rejecting malformed rows."""
+    raw = raw.reindex(columns=NORMALIZED_COLUMNS)
+    company = raw["company"].astype("string").str.strip()
+    model = raw["model"].astype("string").str.strip()
+    sale_date = pd.to_datetime(raw["sale_date"], format="%Y-%m-%d", errors="coerce")
+    price = pd.to_numeric(raw["price"], errors="coerce").astype("float64")
+
+    valid = (
+        company.notna() & (company != "")
+        & model.notna() & (model != "")
+        & sale_date.notna()
+        & price.notna()
+    )
+
+    rejected = int((~valid).sum())
+    rejected_sample = []
+    if rejected:
+        sample = raw[~valid].head(REJECTED_SAMPLE_SIZE)
+        rejected_sample = sample.astype(object).where(sample.notna(), None).to_dict("records")
+        logger.warning(f"Source {source}: rejected {rejected} of {len(raw)} malformed rows, sample: {rejected_sample}")
+
+    frame = pd.DataFrame({
+        "company": company[valid].astype("category"),
+        "model": model[valid].astype("category"),
+        "sale_date": sale_date[valid],
+        "price": price[valid],
+    }).reset_index(drop=True)
+    return NormalizedSource(source, frame, rejected, rejected_sample)
+
+def normalize_records(source: str, records: List[Dict[str, Any]]) -> NormalizedSource:
+    """Normalize a list of record dicts (e.g. decoded JSON)."""
+    return normalize_frame(source, pd.DataFrame.from_records(records))
+
+def parse_source_a_payload(text_content: str) -> NormalizedSource:
+    """Decode and normalize a Source A JSON payload.
+
+    Kept free of app state so it can run in a child process of the parse pool.
+    """
+    try:
+        data = json.loads(text_content)
+    except json.JSONDecodeError as json_err:
+        raise Exception(f"Invalid JSON format: {str(json_err)}. Content: {text_content[:100]}...")
+    if not isinstance(data, list):
+        raise Exception(f"Expected a JSON array of records, got {type(data).__name__}")
+    return normalize_records("A", data)
+
+def parse_source_b_payload(text: str) -> NormalizedSource:
+    """Parse and normalize a Source B CSV payload (see parse_source_a_payload)."""
+    return normalize_frame("B", pd.read_csv(StringIO(text)))
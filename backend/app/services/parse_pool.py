@@ -0,0 +1,55 @@
+import os
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# inline: parse on the calling event loop; thread: default thread pool (still
+# GIL-bound); process: child processes, so parsing never stalls API threads.
+PARSE_MODE = os.getenv("PARSE_MODE", "process")
+PARSE_POOL_SIZE = int(os.getenv("PARSE_POOL_SIZE", str(os.cpu_count() or 1)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Return the shared parse process pool, starting it on first use.
+
+    Children are spawned rather than forked because the parent runs many
+    threads (scheduler, DB executor, API workers) that fork cannot copy safely.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            logger.info(f"Starting parse process pool with {PARSE_POOL_SIZE} workers")
+            _pool = ProcessPoolExecutor(
+                max_workers=PARSE_POOL_SIZE,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def shutdown_parse_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+async def run_parse(fn, *args, mode: str = None):
+    """Run a CPU-bound parse/normalize function according to PARSE_MODE.
+
+    In process mode `fn` and its arguments must be picklable; its result comes
+    back as the pickled column buffers of the normalized frame.
+    """
+    mode = mode or PARSE_MODE
+    if mode == "inline":
+        return fn(*args)
+    loop = asyncio.get_running_loop()
+    if mode == "thread":
+        return await loop.run_in_executor(None, fn, *args)
+    if mode == "process":
+        return await loop.run_in_executor(get_parse_pool(), fn, *args)
+    raise ValueError(f"Unknown PARSE_MODE: {mode}")
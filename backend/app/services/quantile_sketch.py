@@ -0,0 +1,171 @@
+import os
+import math
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# Groups up to this size keep every value, so their quantiles are exact
+SKETCH_EXACT_MAX_VALUES = int(os.getenv("SKETCH_EXACT_MAX_VALUES", "1000"))
+# t-digest compression (delta); a sketch holds at most about delta / 2 centroids
+SKETCH_COMPRESSION = float(os.getenv("SKETCH_COMPRESSION", "200"))
+
+_HEADER_SIZE = 5
+
+def _k_scale(q: np.ndarray, compression: float) -> np.ndarray:
+    # t-digest k1 scale: centroids shrink towards the tails, where q changes fastest in k
+    return compression / (2 * math.pi) * np.arcsin(2 * np.clip(q, 0.0, 1.0) - 1)
+
+class QuantileSketch:
+    """Mergeable summary of a set of prices for quantiles, CDF and histograms.
+
+    Small groups are stored exactly (every value, sorted). Larger ones are
+    compressed into a merging t-digest: weighted centroids whose size
+    follows the k1 scale function, so tail quantiles and outliers stay
+    accurate while the middle is summarized coarsely. Merging concatenates
+    the centroids and compresses again, which is what lets per-model sketches
+    be combined into per-company ones without touching the records.
+    """
+
+    def __init__(self, means: np.ndarray, weights: Optional[np.ndarray], count: int, min_value: float, max_value: float):
+        self.means = means
+        # None for exact sketches, where every mean is one value of weight 1
+        self.weights = weights
+        self.count = count
+        self.min = min_value
+        self.max = max_value
+
+    @property
+    def exact(self) -> bool:
+        return self.weights is None
+
+    @classmethod
+    def from_values(
+        cls,
+        values: Iterable[float],
+        exact_max: int = SKETCH_EXACT_MAX_VALUES,
+        compression: float = SKETCH_COMPRESSION
+    ) -> "QuantileSketch":
+        values = np.sort(np.asarray(values, dtype=np.float64))
+        if not len(values):
+            raise ValueError("Cannot sketch an empty group")
+        sketch = cls(values, None, len(values), float(values[0]), float(values[-1]))
+        if len(values) > exact_max:
+            sketch = sketch._compressed(compression)
+        return sketch
+
+    def merge(
+        self,
+        other: "QuantileSketch",
+        exact_max: int = SKETCH_EXACT_MAX_VALUES,
+        compression: float = SKETCH_COMPRESSION
+    ) -> "QuantileSketch":
+        means = np.concatenate([self.means, other.means])
+        merged = QuantileSketch(
+            means,
+            None if self.exact and other.exact else np.concatenate([self._weights(), other._weights()]),
+            self.count + other.count,
+            min(self.min, other.min),
+            max(self.max, other.max)
+        )
+        if merged.exact and merged.count <= exact_max:
+            merged.means = np.sort(means)
+            return merged
+        return merged._compressed(compression)
+
+    def _weights(self) -> np.ndarray:
+        return np.ones(len(self.means)) if self.weights is None else self.weights
+
+    def _compressed(self, compression: float) -> "QuantileSketch":
+        order = np.argsort(self.means, kind="stable")
+        means, weights = self.means[order], self._weights()[order]
+        cumulative = np.cumsum(weights)
+        # Each input lands in the unit-wide k interval of its midpoint, so no centroid spans more than ~1 in k
+        midpoints = (cumulative - weights / 2) / cumulative[-1]
+        buckets = np.floor(_k_scale(midpoints, compression))
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        bucket_weights = np.add.reduceat(weights, starts)
+        bucket_means = np.add.reduceat(means * weights, starts) / bucket_weights
+        return QuantileSketch(bucket_means, bucket_weights, self.count, self.min, self.max)
+
+    def _positions(self):
+        """(values, ranks) knots of the piecewise-linear CDF, min and max included."""
+        weights = self._weights()
+        centers = np.cumsum(weights) - weights / 2
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        ranks = np.concatenate([[0.0], centers, [float(self.count)]])
+        return values, ranks
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        qs = np.asarray(list(qs), dtype=np.float64)
+        if self.exact:
+            # Same linear interpolation as numpy's default and d3.quantile
+            return np.quantile(self.means, qs)
+        values, ranks = self._positions()
+        return np.interp(qs * self.count, ranks, values)
+
+    def cdf(self, xs: Iterable[float]) -> np.ndarray:
+        """Estimated fraction of values <= each x."""
+        xs = np.asarray(list(xs), dtype=np.float64)
+        if self.exact:
+            return np.searchsorted(self.means, xs, side="right") / self.count
+        values, ranks = self._positions()
+        return np.interp(xs, values, ranks) / self.count
+
+    def summary(self, bins: int = 20, max_outliers: int = 50) -> Dict[str, Any]:
+        """Box plot statistics (Tukey fences at 1.5 IQR) and an equal-width histogram."""
+        q1, median, q3 = (float(value) for value in self.quantiles([0.25, 0.5, 0.75]))
+        iqr = q3 - q1
+        lower_fence, upper_fence = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        # A group with a single price gets one zero-width bin holding every value
+        edges = np.linspace(self.min, self.max, bins + 1) if self.max > self.min else np.array([self.min, self.max])
+
+        if self.exact:
+            inside = self.means[(self.means >= lower_fence) & (self.means <= upper_fence)]
+            whisker_low, whisker_high = float(inside[0]), float(inside[-1])
+            outliers = np.concatenate([self.means[self.means < lower_fence], self.means[self.means > upper_fence]])
+            outlier_count = len(outliers)
+            counts = np.histogram(self.means, bins=edges)[0] if self.max > self.min else [self.count]
+        else:
+            whisker_low, whisker_high = max(self.min, lower_fence), min(self.max, upper_fence)
+            # Tail centroids are (near) single values, so they stand in for the outliers themselves
+            outliers = self.means[(self.means < lower_fence) | (self.means > upper_fence)]
+            below, above = self.cdf([lower_fence, upper_fence])
+            outlier_count = int(round(self.count * (below + 1 - above)))
+            counts = np.diff(np.round(self.cdf(edges) * self.count)) if self.max > self.min else [self.count]
+
+        if len(outliers) > max_outliers:
+            # Keep the most extreme ones
+            distance = np.maximum(lower_fence - outliers, outliers - upper_fence)
+            outliers = outliers[np.argsort(-distance, kind="stable")[:max_outliers]]
+
+        return {
+            "count": self.count,
+            "min": self.min,
+            "q1": q1,
+            "median": median,
+            "q3": q3,
+            "max": self.max,
+            "whisker_low": whisker_low,
+            "whisker_high": whisker_high,
+            "outliers": sorted(float(value) for value in outliers),
+            "outlier_count": outlier_count,
+            "histogram": [
+                {"start": float(start), "end": float(end), "count": int(count)}
+                for start, end, count in zip(edges[:-1], edges[1:], counts)
+            ],
+            "exact": self.exact
+        }
+
+    def to_bytes(self) -> bytes:
+        header = np.array([self.count, self.min, self.max, len(self.means), 0.0 if self.exact else 1.0])
+        parts = [header, self.means] if self.exact else [header, self.means, self.weights]
+        return np.concatenate(parts).astype("<f8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        array = np.frombuffer(data, dtype="<f8")
+        count, min_value, max_value, size, compressed = array[:_HEADER_SIZE]
+        size = int(size)
+        means = array[_HEADER_SIZE:_HEADER_SIZE + size]
+        weights = array[_HEADER_SIZE + size:_HEADER_SIZE + 2 * size] if compressed else None
+        return cls(means, weights, int(count), float(min_value), float(max_value))
@@ -0,0 +1,280 @@
+import os
+import logging
+import argparse
+import threading
+from typing import Callable, List, Optional
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.models.models import Task, Record, TaskStatus, Job, JobStatus
+from app.services.rollups import delete_rollups
+from app.services.dedup import release_task_data, unlink_task
+
+logger = logging.getLogger(__name__)
+
+# Records deleted per transaction; each chunk holds the write lock only briefly
+REAPER_CHUNK_ROWS = int(os.getenv("REAPER_CHUNK_ROWS", "5000"))
+# Pause between chunks so writers queued behind the reaper get their turn
+REAPER_CHUNK_PAUSE_SECONDS = float(os.getenv("REAPER_CHUNK_PAUSE_SECONDS", "0.05"))
+REAPER_INTERVAL_SECONDS = float(os.getenv("REAPER_INTERVAL_SECONDS", "5"))
+# Free pages handed back to the file system per incremental_vacuum step
+REAPER_VACUUM_PAGES = int(os.getenv("REAPER_VACUUM_PAGES", "2000"))
+
+def deleting_task_ids(db: Session) -> List[int]:
+    """DELETING tasks ready to reap, oldest first.
+
+    A task whose job is still leased is skipped until its worker notices the
+    status and stops, so no rows get written after the reaper is done.
+    """
+    leased = select(Job.task_id).where(Job.status == JobStatus.LEASED)
+    rows = db.query(Task.id).filter(Task.status == TaskStatus.DELETING, Task.id.not_in(leased)).order_by(Task.id)
+    return [task_id for (task_id,) in rows]
+
+def delete_records_chunk(task_id: int, db: Session, chunk_rows: int = REAPER_CHUNK_ROWS) -> int:
+    """Delete up to `chunk_rows` of a task's records in one short transaction."""
+    chunk = select(Record.id).where(Record.task_id == task_id).limit(chunk_rows)
+    deleted = db.query(Record).filter(Record.id.in_(chunk)).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def move_records_chunk(task_id: int, new_task_id: int, db: Session, chunk_rows: int = REAPER_CHUNK_ROWS) -> int:
+    """Move up to `chunk_rows` of a task's records to `new_task_id` in one short transaction."""
+    chunk = select(Record.id).where(Record.task_id == task_id).limit(chunk_rows)
+    moved = db.query(Record).filter(Record.id.in_(chunk)).update({Record.task_id: new_task_id}, synchronize_session=False)
+    db.commit()
+    return moved
+
+def reap_task(
+    task_id: int,
+    db: Session,
+    chunk_rows: int = REAPER_CHUNK_ROWS,
+    on_chunk: Optional[Callable[[int], bool]] = None
+) -> Optional[int]:
+    """Remove a DELETING task's data and then the task itself.
+
+    Records go in chunks of `chunk_rows`, each committed on its own; records
+    still shared with other tasks are moved to the dataset's new owner the
+    same way instead of being deleted. `on_chunk` is called with the records
+    handled so far after every chunk and may return False to stop early;
+    the task then stays DELETING and the next run picks up where this one
+    left off. Returns the records deleted, or None when stopped early.
+    """
+    new_owner_id = release_task_data(task_id, db)
+    rollups_deleted = delete_rollups(task_id, db)
+    db.commit()
+    logger.info(f"Deleted {rollups_deleted} analytics rollup rows for task {task_id}")
+    if new_owner_id is not None:
+        logger.info(f"Records of task {task_id} are still shared with other tasks, moving them to task {new_owner_id}")
+
+    records_handled = 0
+    while True:
+        if new_owner_id is None:
+            handled = delete_records_chunk(task_id, db, chunk_rows)
+        else:
+            handled = move_records_chunk(task_id, new_owner_id, db, chunk_rows)
+        records_handled += handled
+        if handled < chunk_rows:
+            break
+        if on_chunk is not None and on_chunk(records_handled) is False:
+            logger.info(f"Stopped reaping task {task_id} after {records_handled} records")
+            return None
+    records_deleted = records_handled if new_owner_id is None else 0
+
+    unlink_task(task_id, db)
+    db.query(Job).filter(Job.task_id == task_id).delete(synchronize_session=False)
+    db.query(Task).filter(Task.id == task_id).delete(synchronize_session=False)
+    db.commit()
+    logger.info(f"Deleted task {task_id} and its {records_deleted} records")
+    return records_deleted
+
+def reap_deleting_tasks(db: Session, chunk_rows: int = REAPER_CHUNK_ROWS) -> int:
+    """Reap every task that is ready now, in the caller's thread; returns how many."""
+    task_ids = deleting_task_ids(db)
+    for task_id in task_ids:
+        reap_task(task_id, db, chunk_rows)
+    return len(task_ids)
+
+def incremental_vacuum(db: Session, pages: int = REAPER_VACUUM_PAGES) -> int:
+    """Return free pages to the file system; returns how many were released.
+
+    Only databases with auto_vacuum=INCREMENTAL can do this without a full
+    VACUUM (see enable_incremental_vacuum); elsewhere SQLite simply reuses
+    the free pages for new rows and nothing happens here.
+    """
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+        return 0
+    db.commit()
+    before = db.execute(text("PRAGMA freelist_count")).scalar()
+    # sqlite3 steps a statement without result columns only once, which frees a single
+    # page; executescript runs the pragma to completion
+    dbapi_connection = db.connection().connection.dbapi_connection
+    remaining = before
+    while remaining:
+        dbapi_connection.executescript(f"PRAGMA incremental_vacuum({pages});")
+        previous, remaining = remaining, db.execute(text("PRAGMA freelist_count")).scalar()
+        if remaining >= previous:
+            break
+    db.commit()
+    return before - remaining
+
+class TaskReaper:
+    """Deletes the data of DELETING tasks on a background thread.
+
+    Deleting a task through the API only marks it; every
+    `REAPER_INTERVAL_SECONDS` this thread reaps the marked tasks one at a
+    time with reap_task, then returns the freed pages with
+    incremental_vacuum. Progress is available from stats().
+    """
+
+    def __init__(self, db_factory, interval: float = REAPER_INTERVAL_SECONDS, chunk_rows: int = REAPER_CHUNK_ROWS):
+        self.db_factory = db_factory
+        self.interval = interval
+        self.chunk_rows = chunk_rows
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.pending_tasks = 0
+        self.current_task_id = None
+        self.current_task_records_deleted = 0
+        self.tasks_reaped = 0
+        self.records_deleted = 0
+        self.pages_vacuumed = 0
+        self.errors = 0
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="TaskReaper")
+        self._thread.start()
+        logger.info(f"Started task reaper, deleting {self.chunk_rows} records per transaction")
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning("Task reaper did not stop gracefully")
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.run_once()
+
+    def _on_chunk(self, records_deleted: int) -> bool:
+        with self._lock:
+            self.current_task_records_deleted = records_deleted
+        return not self._stopping.wait(REAPER_CHUNK_PAUSE_SECONDS)
+
+    def run_once(self) -> int:
+        """Reap every task currently marked DELETING; returns how many were removed."""
+        db = next(self.db_factory())
+        reaped = 0
+        try:
+            task_ids = deleting_task_ids(db)
+            with self._lock:
+                self.pending_tasks = len(task_ids)
+            for task_id in task_ids:
+                with self._lock:
+                    self.current_task_id, self.current_task_records_deleted = task_id, 0
+                try:
+                    records_deleted = reap_task(task_id, db, self.chunk_rows, self._on_chunk)
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Failed to reap task {task_id}: {str(e)}")
+                    with self._lock:
+                        self.errors += 1
+                    continue
+                if records_deleted is None:
+                    break
+                reaped += 1
+                with self._lock:
+                    self.pending_tasks -= 1
+                    self.tasks_reaped += 1
+                    self.records_deleted += records_deleted
+            if reaped:
+                pages = incremental_vacuum(db)
+                with self._lock:
+                    self.pages_vacuumed += pages
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Task reaper run failed: {str(e)}")
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self.current_task_id, self.current_task_records_deleted = None, 0
+            db.close()
+        return reaped
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "pending_tasks": self.pending_tasks,
+                "current_task_id": self.current_task_id,
+                "current_task_records_deleted": self.current_task_records_deleted,
+                "tasks_reaped": self.tasks_reaped,
+                "records_deleted": self.records_deleted,
+                "pages_vacuumed": self.pages_vacuumed,
+                "errors": self.errors
+            }
+
+reaper = None
+
+def start_reaper(db_factory) -> TaskReaper:
+    """Start the process-wide task reaper."""
+    global reaper
+    if reaper is None:
+        reaper = TaskReaper(db_factory)
+        reaper.start()
+    return reaper
+
+def stop_reaper():
+    """Stop the process-wide task reaper, if one is running."""
+    global reaper
+    if reaper is None:
+        return
+    reaper.stop()
+    reaper = None
+
+def reaper_stats() -> dict:
+    if reaper is None:
+        return {"running": False}
+    return reaper.stats()
+
+def enable_incremental_vacuum(engine) -> bool:
+    """Switch an existing database to auto_vacuum=INCREMENTAL.
+
+    New database files get the mode from apply_sqlite_pragmas; an existing
+    file only changes mode through a full VACUUM, which rewrites the whole
+    database and must run while nothing else writes to it.
+    """
+    with engine.connect() as connection:
+        if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            return False
+        dbapi_connection = connection.connection.dbapi_connection
+        dbapi_connection.executescript("PRAGMA auto_vacuum=INCREMENTAL; VACUUM;")
+    return True
+
+def main():
+    """Reap deleted tasks once, e.g. from cron when no API or worker process runs.
+
+        python -m app.services.reaper [--enable-incremental-vacuum]
+    """
+    from app.db.database import engine, get_db
+
+    parser = argparse.ArgumentParser(description="Delete the data of deleted tasks.")
+    parser.add_argument(
+        "--enable-incremental-vacuum", action="store_true",
+        help="VACUUM the database once so later runs can return freed space to the file system"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.enable_incremental_vacuum and enable_incremental_vacuum(engine):
+        logger.info("Switched the database to incremental auto_vacuum")
+    reaped = TaskReaper(get_db).run_once()
+    logger.info(f"Reaped {reaped} deleted tasks")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import csv
+import datetime
+import json
+from io import StringIO
+from typing import Any, Iterable, Iterator, Tuple
+import orjson
+
+# Column order shared by every streamed representation of a record.
+RECORD_FIELDS = ("id", "task_id", "source", "company", "model", "sale_date", "price")
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+def iter_ndjson(rows: Iterable[Tuple]) -> Iterator[str]:
+    """Encode record rows as newline-delimited JSON, one object per line."""
+    for row in rows:
+        yield json.dumps(
+            {field: _encode_value(value) for field, value in zip(RECORD_FIELDS, row)},
+            separators=(",", ":")
+        ) + "\n"
+
+def encode_json(content: Any) -> bytes:
+    """Encode plain dicts/lists to compact JSON bytes in one pass.
+
+    Matches FastAPI's own JSON output for the values our endpoints return
+    (str, int, finite float, naive datetime, None).
+    """
+    return orjson.dumps(content)
+
+def encode_record_rows(rows: Iterable[Tuple]) -> bytes:
+    """Encode record rows as the JSON array List[RecordResponse] would produce."""
+    return orjson.dumps([dict(zip(RECORD_FIELDS, row)) for row in rows])
+
+def iter_csv(rows: Iterable[Tuple], chunk_rows: int = 1000) -> Iterator[str]:
+    """Encode record rows as CSV with a header line, flushing every `chunk_rows` rows."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(RECORD_FIELDS)
+    pending = 0
+    for row in rows:
+        writer.writerow([_encode_value(value) for value in row])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
@@ -0,0 +1,247 @@
+import argparse
+import itertools
+import logging
+import math
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import Integer, cast, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    Task, Record, TaskStatus,
+    CompanyRollup, CompanyMonthRollup, CompanyModelMonthRollup, PriceSketch, Dataset, DatasetLink
+)
+from app.services.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MODELS = (CompanyRollup, CompanyMonthRollup, CompanyModelMonthRollup, PriceSketch)
+
+def _month(column):
+    return func.strftime("%Y-%m", column)
+
+def build_rollups(task_id: int, db: Session) -> Dict[str, int]:
+    """Materialize the analytics rollups for a task from its records.
+
+    Each rollup is written with a single INSERT ... SELECT ... GROUP BY so
+    no record rows are loaded into Python. The caller owns the transaction.
+    """
+    logger.info(f"Building analytics rollups for task {task_id}")
+    delete_rollups(task_id, db)
+
+    month = _month(Record.sale_date)
+    statements = {
+        CompanyRollup.__tablename__: insert(CompanyRollup).from_select(
+            ["task_id", "company", "total_sales", "total_revenue", "min_price", "max_price", "sum_squares"],
+            select(
+                Record.task_id,
+                Record.company,
+                func.count(Record.id),
+                func.sum(Record.price),
+                func.min(Record.price),
+                func.max(Record.price),
+                func.sum(Record.price * Record.price),
+            )
+            .where(Record.task_id == task_id)
+            .group_by(Record.task_id, Record.company)
+        ),
+        CompanyMonthRollup.__tablename__: insert(CompanyMonthRollup).from_select(
+            ["task_id", "company", "month", "total_sales", "total_revenue"],
+            select(
+                Record.task_id,
+                Record.company,
+                month,
+                func.count(Record.id),
+                func.sum(Record.price),
+            )
+            .where(Record.task_id == task_id)
+            .group_by(Record.task_id, Record.company, month)
+        ),
+        CompanyModelMonthRollup.__tablename__: insert(CompanyModelMonthRollup).from_select(
+            ["task_id", "company", "model", "month", "total_sales", "total_revenue"],
+            select(
+                Record.task_id,
+                Record.company,
+                Record.model,
+                month,
+                func.count(Record.id),
+                func.sum(Record.price),
+            )
+            .where(Record.task_id == task_id)
+            .group_by(Record.task_id, Record.company, Record.model, month)
+        ),
+    }
+
+    counts = {}
+    for table_name, statement in statements.items():
+        counts[table_name] = db.execute(statement).rowcount
+    counts[PriceSketch.__tablename__] = build_price_sketches(task_id, db)
+    logger.info(f"Built rollups for task {task_id}: {counts}")
+    return counts
+
+def compute_price_sketches(task_id: int, db: Session) -> Dict[Tuple[str, str], QuantileSketch]:
+    """Sketch the prices of every company x model group of a task from its records.
+
+    Reads (company, model, price) in index order, so each group's prices
+    arrive together and only one group is held in memory at a time.
+    """
+    rows = (
+        db.query(Record.company, Record.model, Record.price)
+        .filter(Record.task_id == task_id, Record.price.isnot(None))
+        .order_by(Record.company, Record.model)
+    )
+    return {
+        group: QuantileSketch.from_values([row[2] for row in group_rows])
+        for group, group_rows in itertools.groupby(rows, key=lambda row: (row[0], row[1]))
+    }
+
+def build_price_sketches(task_id: int, db: Session) -> int:
+    """Store a price sketch per company x model group. The caller owns the transaction."""
+    sketches = compute_price_sketches(task_id, db)
+    if sketches:
+        db.execute(insert(PriceSketch), [
+            {"task_id": task_id, "company": company, "model": model, "count": sketch.count, "sketch": sketch.to_bytes()}
+            for (company, model), sketch in sketches.items()
+        ])
+    return len(sketches)
+
+def get_price_sketches(task_id: int, db: Session) -> Dict[Tuple[str, str], QuantileSketch]:
+    """Read a task's stored company x model price sketches (empty if not materialized)."""
+    rows = (
+        db.query(PriceSketch.company, PriceSketch.model, PriceSketch.sketch)
+        .filter(PriceSketch.task_id == task_id)
+        .all()
+    )
+    return {(row.company, row.model): QuantileSketch.from_bytes(row.sketch) for row in rows}
+
+def delete_rollups(task_id: int, db: Session) -> int:
+    """Remove every rollup row belonging to a task. The caller owns the transaction."""
+    deleted = 0
+    for model in ROLLUP_MODELS:
+        deleted += db.query(model).filter(model.task_id == task_id).delete(synchronize_session=False)
+    return deleted
+
+def has_rollups(task_id: int, db: Session) -> bool:
+    """Whether build_rollups has run for a task, so an empty rollup query means no matching rows."""
+    return db.query(CompanyRollup.id).filter(CompanyRollup.task_id == task_id).first() is not None
+
+def get_company_rollups(task_id: int, db: Session) -> List[Dict[str, Any]]:
+    """Read per-company statistics from the rollup table (empty if not materialized)."""
+    rows = (
+        db.query(CompanyRollup)
+        .filter(CompanyRollup.task_id == task_id)
+        .order_by(CompanyRollup.company)
+        .all()
+    )
+    result = []
+    for row in rows:
+        average_price = row.total_revenue / row.total_sales if row.total_sales else 0
+        variance = max(row.sum_squares / row.total_sales - average_price * average_price, 0.0) if row.total_sales else 0.0
+        result.append({
+            "company": row.company,
+            "total_sales": row.total_sales,
+            "total_revenue": row.total_revenue,
+            "average_price": average_price,
+            "min_price": row.min_price,
+            "max_price": row.max_price,
+            "price_stddev": math.sqrt(variance),
+        })
+    return result
+
+def _month_bucket(bucket: str, month):
+    """Coarsen a 'YYYY-MM' rollup column to a month, quarter or year label (see timeline_bucket)."""
+    if bucket == "month":
+        return month
+    year = func.substr(month, 1, 4)
+    if bucket == "quarter":
+        return func.printf("%s-Q%d", year, (cast(func.substr(month, 6, 2), Integer) + 2) / 3)
+    if bucket == "year":
+        return year
+    raise ValueError(f"Month rollups cannot serve {bucket} buckets")
+
+def get_timeline_rollups(
+    task_id: int,
+    db: Session,
+    bucket: str = "month",
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    companies: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """Read the company x bucket timeline from the month rollup table (empty if not materialized).
+
+    `start_month`/`end_month` are inclusive 'YYYY-MM' bounds.
+    """
+    date = _month_bucket(bucket, CompanyMonthRollup.month).label("date")
+    query = db.query(
+        date,
+        CompanyMonthRollup.company,
+        func.sum(CompanyMonthRollup.total_sales).label("total_sales"),
+        func.sum(CompanyMonthRollup.total_revenue).label("total_revenue"),
+    ).filter(CompanyMonthRollup.task_id == task_id)
+    if companies:
+        query = query.filter(CompanyMonthRollup.company.in_(companies))
+    if start_month is not None:
+        query = query.filter(CompanyMonthRollup.month >= start_month)
+    if end_month is not None:
+        query = query.filter(CompanyMonthRollup.month <= end_month)
+
+    rows = query.group_by(date, CompanyMonthRollup.company).order_by(date, CompanyMonthRollup.company).all()
+    return [
+        {
+            "date": row.date,
+            "company": row.company,
+            "total_sales": row.total_sales,
+            "total_revenue": row.total_revenue
+        }
+        for row in rows
+    ]
+
+def backfill_rollups(db: Session, task_id: Optional[int] = None) -> int:
+    """Build rollups for completed tasks that do not have them yet.
+
+    Tasks reusing another task's dataset (see app.services.dedup) have no
+    rows or rollups of their own and are skipped. Returns the number of
+    tasks that were backfilled.
+    """
+    reusing = (
+        select(DatasetLink.task_id)
+        .join(Dataset, Dataset.id == DatasetLink.dataset_id)
+        .where(Dataset.data_task_id != DatasetLink.task_id)
+    )
+    query = db.query(Task.id).filter(Task.status == TaskStatus.COMPLETED, Task.id.not_in(reusing))
+    if task_id is not None:
+        query = query.filter(Task.id == task_id)
+    else:
+        materialized = select(CompanyRollup.task_id).distinct()
+        query = query.filter(Task.id.not_in(materialized))
+
+    backfilled = 0
+    for (pending_task_id,) in query.all():
+        try:
+            build_rollups(pending_task_id, db)
+            db.commit()
+            backfilled += 1
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to backfill rollups for task {pending_task_id}: {str(e)}")
+    logger.info(f"Backfilled rollups for {backfilled} tasks")
+    return backfilled
+
+def main():
+    from app.db.database import SessionLocal, engine, Base
+    from app.db.migrations import run_migrations
+
+    parser = argparse.ArgumentParser(description="Backfill analytics rollups for completed tasks.")
+    parser.add_argument("--task-id", type=int, default=None, help="Rebuild rollups for a single task")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        backfill_rollups(db, args.task_id)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services import job_queue
+from app.services import durable_queue
+from app.services.parse_pool import shutdown_parse_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_TASKS = int(os.getenv("MAX_CONCURRENT_TASKS", "32"))
+SHUTDOWN_GRACE_SECONDS = 5.0
+QUEUE_POLL_SECONDS = 0.5
+REQUEUE_INTERVAL_SECONDS = 10.0
+
+class TaskScheduler:
+    """Runs queued tasks as coroutines on one long-lived event loop.
+
+    A single background thread owns the loop. Up to `max_concurrent_tasks`
+    tasks run at once (bounded by a semaphore), all sharing one pooled
+    aiohttp session, while blocking database work goes to the job queue's
+    DB executor. Tasks are taken from the in-memory `task_queue` and, with
+    `use_durable_queue`, leased from the jobs table; leases are kept alive
+    by a heartbeat while the task runs and expired ones are re-queued.
+    """
+
+    def __init__(self, db_factory, max_concurrent_tasks: int = MAX_CONCURRENT_TASKS, use_durable_queue: bool = False):
+        self.db_factory = db_factory
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.use_durable_queue = use_durable_queue
+        self.worker_id = durable_queue.new_worker_id()
+        self.loop = None
+        self._thread = None
+        self._running = False
+        self._stopping = None
+        self._ready = threading.Event()
+        self._queue_reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TaskQueueReader")
+        self._active = set()
+        self._shutdown_grace = SHUTDOWN_GRACE_SECONDS
+        self._last_requeue = 0.0
+
+    @property
+    def active_tasks(self) -> int:
+        return len(self._active)
+
+    def start(self):
+        self._running = True
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="TaskScheduler")
+        self._thread.start()
+        self._ready.wait(timeout=5.0)
+        logger.info(f"Started task scheduler {self.worker_id} with up to {self.max_concurrent_tasks} concurrent tasks")
+
+    def stop(self, timeout: float = SHUTDOWN_GRACE_SECONDS):
+        """Stop taking new tasks, give running ones `timeout` seconds, then cancel them."""
+        if self._thread is None:
+            return
+        logger.info("Stopping task scheduler...")
+        self._shutdown_grace = timeout
+        self._running = False
+        stopping = self._stopping
+        if stopping is not None:
+            # Wakes a dispatcher waiting for a free slot
+            try:
+                self.loop.call_soon_threadsafe(stopping.set)
+            except RuntimeError:
+                pass  # the loop already finished
+        # The dispatcher only notices the flag between queue polls, so allow for one on top of the grace period
+        self._thread.join(timeout=timeout + QUEUE_POLL_SECONDS + 1.0)
+        if self._thread.is_alive():
+            logger.warning("Task scheduler did not stop gracefully")
+        self._thread = None
+        logger.info("Task scheduler stopped")
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._dispatch())
+        finally:
+            self.loop.close()
+
+    def _with_session(self, fn, *args):
+        """Call fn(*args, db) with a short-lived session of its own."""
+        db = next(self.db_factory())
+        try:
+            return fn(*args, db)
+        finally:
+            db.close()
+
+    def _claim_durable_job(self, db):
+        if time.monotonic() - self._last_requeue >= REQUEUE_INTERVAL_SECONDS:
+            self._last_requeue = time.monotonic()
+            durable_queue.requeue_expired_jobs(db)
+        job = durable_queue.claim_job(db, self.worker_id)
+        return (job.id, job.task_id) if job is not None else None
+
+    def _next_job(self):
+        """Return (job_id, task_id) for the next task, or None if there is none yet.
+
+        job_id is None for tasks taken from the in-memory queue.
+        """
+        if self.use_durable_queue:
+            try:
+                claimed = self._with_session(self._claim_durable_job)
+                if claimed is not None:
+                    return claimed
+            except Exception as e:
+                logger.error(f"Failed to claim a job from the durable queue: {str(e)}")
+        try:
+            return None, job_queue.task_queue.get(timeout=QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            return None
+
+    async def _acquire_slot(self, semaphore: asyncio.Semaphore) -> bool:
+        """Wait for a free task slot; returns False, holding none, once the scheduler is stopping."""
+        acquire = asyncio.ensure_future(semaphore.acquire())
+        stopping = asyncio.ensure_future(self._stopping.wait())
+        await asyncio.wait({acquire, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        stopping.cancel()
+        if not acquire.done():
+            acquire.cancel()
+            return False
+        if not self._running:
+            semaphore.release()
+            return False
+        return True
+
+    async def _dispatch(self):
+        session = job_queue.create_http_session()
+        job_queue.register_http_session(self.loop, session)
+        semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+        self._stopping = asyncio.Event()
+        self._ready.set()
+        try:
+            while self._running:
+                if not await self._acquire_slot(semaphore):
+                    break
+                next_job = await self.loop.run_in_executor(self._queue_reader, self._next_job)
+                if next_job is None:
+                    semaphore.release()
+                    continue
+
+                job_id, task_id = next_job
+                task = asyncio.create_task(self._process(job_id, task_id, semaphore))
+                self._active.add(task)
+                task.add_done_callback(self._active.discard)
+
+            if self._active:
+                _, pending = await asyncio.wait(set(self._active), timeout=self._shutdown_grace)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    logger.warning(f"Cancelled {len(pending)} tasks still running at shutdown")
+                    await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            self._stopping = None
+            job_queue.unregister_http_session(self.loop)
+            await session.close()
+
+    async def _heartbeat(self, job_id: int, processing: asyncio.Future):
+        while True:
+            await asyncio.sleep(durable_queue.JOB_LEASE_SECONDS / 3)
+            try:
+                held = await job_queue.run_db(self._with_session, durable_queue.heartbeat_job, job_id, self.worker_id)
+            except Exception as e:
+                logger.error(f"Heartbeat for job {job_id} failed: {str(e)}")
+                continue
+            if not held:
+                logger.error(f"Lost the lease on job {job_id}, abandoning it")
+                processing.cancel()
+                return
+
+    async def _process(self, job_id, task_id: int, semaphore: asyncio.Semaphore):
+        db = None
+        heartbeat = None
+        try:
+            db = await job_queue.run_db(lambda: next(self.db_factory()))
+            processing = asyncio.ensure_future(job_queue.process_task_async(task_id, db))
+            if job_id is not None:
+                heartbeat = asyncio.create_task(self._heartbeat(job_id, processing))
+            await processing
+            if job_id is not None:
+                await job_queue.run_db(self._with_session, durable_queue.finish_job, job_id, self.worker_id)
+        except asyncio.CancelledError:
+            # The lease is left to expire so another worker picks the task up again
+            logger.warning(f"Processing of task {task_id} was cancelled")
+            if not self._running:
+                raise
+        except Exception as e:
+            logger.error(f"Unhandled exception while processing task {task_id}: {str(e)}")
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            if db is not None:
+                await job_queue.run_db(db.close)
+            if job_id is None:
+                job_queue.task_queue.task_done()
+            semaphore.release()
+
+scheduler = None
+
+def start_scheduler(db_factory, max_concurrent_tasks: int = MAX_CONCURRENT_TASKS, use_durable_queue: bool = True) -> TaskScheduler:
+    """Start the process-wide task scheduler."""
+    global scheduler
+    if scheduler is not None:
+        logger.info("Task scheduler already running")
+        return scheduler
+    scheduler = TaskScheduler(db_factory, max_concurrent_tasks, use_durable_queue)
+    if use_durable_queue:
+        try:
+            scheduler._with_session(durable_queue.enqueue_orphaned_tasks)
+        except Exception as e:
+            logger.error(f"Failed to queue orphaned tasks: {str(e)}")
+    scheduler.start()
+    return scheduler
+
+def stop_scheduler():
+    """Stop the process-wide task scheduler, if one is running."""
+    global scheduler
+    if scheduler is None:
+        return
+    scheduler.stop()
+    scheduler = None
+    shutdown_parse_pool()
@@ -0,0 +1,98 @@
+import os
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from app.models.models import TaskStatus
+from app.services.record_stream import encode_json
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber; a slow client only ever needs the newest ones
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "16"))
+
+TERMINAL_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.DELETING)
+
+def is_terminal(event: Dict[str, Any]) -> bool:
+    return event.get("status") in TERMINAL_STATUSES
+
+def encode_sse(event: Dict[str, Any]) -> bytes:
+    """Frame an event as one Server-Sent Events message of type "status"."""
+    return b"event: status\ndata: " + encode_json(event) + b"\n\n"
+
+class TaskEventBroker:
+    """In-process fan-out of task status and progress events.
+
+    The job queue publishes from its worker thread; each subscriber owns an
+    asyncio queue on its own event loop, and events are handed over with
+    call_soon_threadsafe so publishing never blocks on a slow client. The
+    broker keeps the merged latest event of every running task, so a new
+    subscriber starts from the current progress instead of an empty state.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._latest = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, task_id: int, status: str, **fields) -> Dict[str, Any]:
+        """Publish a transition or progress update; fields merge into the task's latest event."""
+        with self._lock:
+            event = {**self._latest.get(task_id, {}), "task_id": task_id, "status": status, **fields}
+            if is_terminal(event):
+                self._latest.pop(task_id, None)
+            else:
+                self._latest[task_id] = event
+            subscribers = list(self._subscribers.get(task_id, ()))
+            self.published += 1
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down; it unsubscribes on its own
+                pass
+        return event
+
+    def _deliver(self, queue: asyncio.Queue, event: Dict[str, Any]):
+        if queue.full():
+            # Every event carries the full merged state, so the oldest one is redundant
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(event)
+
+    def latest(self, task_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._latest.get(task_id)
+
+    @contextmanager
+    def subscribe(self, task_id: int):
+        """Yield an asyncio.Queue receiving `task_id`'s events; call from a running loop."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(task_id, set()).add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(task_id)
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[task_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "published": self.published,
+                "dropped": self.dropped,
+                "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+                "watched_tasks": len(self._subscribers),
+                "running_tasks": len(self._latest)
+            }
+
+task_events = TaskEventBroker(TASK_EVENTS_QUEUE_SIZE)
@@ -1,14 +1,29 @@
+import base64
 import datetime
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import Integer, event, inspect, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.models.models import Task, Record, TaskStatus
+from app.models.models import Task, Record, TaskStatus, TaskStatusCount, Job, JobStatus
 from app.schemas.schemas import TaskCreate
 from app.services.job_queue import enqueue_task
+from app.services.aggregation import iter_company_price_stats, iter_timeline_buckets
+from app.services.downsampling import downsample_timeline
+from app.services.rollups import has_rollups, get_company_rollups, get_timeline_rollups, get_price_sketches, compute_price_sketches
+from app.services.record_stream import RECORD_FIELDS
+from app.services.dedup import resolve_data_task_id
+from app.services.analytics_cache import analytics_cache
+from app.services.task_events import task_events
+from app.services.task_trace import summarize_traces, TRACE_SUMMARY_TASKS
 
 logger = logging.getLogger(__name__)
 
+RECORD_STREAM_BATCH_SIZE = 1000
+# Timeline buckets the company x month rollups can be coarsened to
+MONTH_ROLLUP_BUCKETS = ("month", "quarter", "year")
+
 def create_task(task_data: TaskCreate, db: Session) -> Task:
     """Create a new task and enqueue it for processing."""
     existing_task = db.query(Task).filter(Task.name == task_data.name).first()
@@ -23,43 +38,168 @@ def create_task(task_data: TaskCreate, db: Session) -> Task:
         status=TaskStatus.PENDING
     )
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    db.flush()
     
     logger.info(f"Task created with ID: {db_task.id}, enqueueing for processing")
-    enqueue_task(db_task.id)
+    enqueue_task(db_task.id, db)
+    db.commit()
+    db.refresh(db_task)
     
     return db_task
 
-def get_tasks(skip: int, limit: int, db: Session) -> Dict[str, Any]:
-    """Get paginated list of tasks."""
-    logger.info(f"Fetching tasks with pagination: skip={skip}, limit={limit}")
+def encode_task_cursor(task: Task) -> str:
+    """Opaque cursor naming the position just after `task` in the newest-first task list."""
+    position = f"{task.created_at.isoformat()}|{task.id}"
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+def decode_task_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """Inverse of encode_task_cursor; raises ValueError for a malformed cursor."""
+    try:
+        created_at, task_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.datetime.fromisoformat(created_at), int(task_id)
+    except ValueError as e:
+        raise ValueError(f"Invalid task cursor: {cursor}") from e
+
+def get_task_status_counts(db: Session) -> Dict[str, int]:
+    """Tasks per status, read from the trigger-maintained counts table.
+
+    Tasks waiting for the reaper are left out, like everywhere else in the API.
+    """
+    return {
+        status: count
+        for status, count in db.query(TaskStatusCount.status, TaskStatusCount.count)
+        if count and status != TaskStatus.DELETING
+    }
+
+def _name_prefix_filter(query, name_prefix: str):
+    # A half-open range instead of LIKE, so SQLite can walk the name index
+    upper_bound = name_prefix[:-1] + chr(ord(name_prefix[-1]) + 1)
+    return query.filter(Task.name >= name_prefix, Task.name < upper_bound)
+
+def get_tasks(
+    skip: int,
+    limit: int,
+    db: Session,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    name_prefix: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get a page of tasks, newest first, optionally filtered by status and name prefix.
+
+    Pass the previous page's `next_cursor` as `cursor` to page by keyset on
+    (created_at, id); `skip` still works as an OFFSET but gets slower with
+    depth. `total` counts the tasks matching the filters and comes from the
+    per-status counts unless a name prefix is given.
+    """
+    logger.info(f"Fetching tasks: skip={skip}, limit={limit}, cursor={cursor}, status={status}, name_prefix={name_prefix}")
+    
+    query = db.query(Task).filter(Task.status != TaskStatus.DELETING)
+    if status:
+        query = query.filter(Task.status == status)
+    if name_prefix:
+        query = _name_prefix_filter(query, name_prefix)
     
-    total = db.query(Task).count()
-    tasks = db.query(Task).order_by(Task.created_at.desc()).offset(skip).limit(limit).all()
+    counts = get_task_status_counts(db)
+    if name_prefix:
+        total = query.count()
+    elif status:
+        total = counts.get(status, 0)
+    else:
+        total = sum(counts.values())
+    
+    if cursor:
+        created_at, task_id = decode_task_cursor(cursor)
+        query = query.filter(tuple_(Task.created_at, Task.id) < tuple_(created_at, task_id))
+    elif skip:
+        query = query.offset(skip)
+    tasks = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit).all()
     
     return {
         "items": tasks,
-        "total": total
+        "total": total,
+        "counts": counts,
+        "next_cursor": encode_task_cursor(tasks[-1]) if len(tasks) == limit else None
     }
 
 def get_task_by_id(task_id: int, db: Session) -> Task:
     """Get a task by its ID."""
     logger.info(f"Fetching task with ID: {task_id}")
-    return db.query(Task).filter(Task.id == task_id).first()
+    return db.query(Task).filter(Task.id == task_id, Task.status != TaskStatus.DELETING).first()
 
-def get_task_records(
+def get_task_state(task_id: int, db: Session) -> Optional[Tuple[str, datetime.datetime]]:
+    """Return a task's (status, updated_at) without loading the row, or None."""
+    return db.query(Task.status, Task.updated_at).filter(Task.id == task_id, Task.status != TaskStatus.DELETING).first()
+
+def get_task_status_event(task_id: int, db: Session) -> Optional[Dict[str, Any]]:
+    """Return a task's current status event, merged with live progress, or None.
+
+    Progress counters only exist in the publishing process's task_events
+    broker; they are used while it agrees with the database on the status.
+    """
+    row = db.query(Task.status, Task.parameters).filter(Task.id == task_id, Task.status != TaskStatus.DELETING).first()
+    if row is None:
+        return None
+    event = {"task_id": task_id, "status": row.status}
+    if row.status == TaskStatus.FAILED:
+        event["error_message"] = (row.parameters or {}).get("error_message")
+    latest = task_events.latest(task_id)
+    if latest is not None and latest["status"] == row.status:
+        event = {**latest, **event}
+    return event
+
+def get_task_trace(task_id: int, db: Session) -> Optional[Dict[str, Any]]:
+    """Return a task's status and the trace of its last processing run, or None.
+
+    `trace` is None until a worker has finished processing the task once.
+    """
+    row = db.query(Task.status, Task.trace).filter(Task.id == task_id, Task.status != TaskStatus.DELETING).first()
+    if row is None:
+        return None
+    return {"task_id": task_id, "status": row.status, "trace": row.trace}
+
+def get_trace_summary(db: Session, limit: int = TRACE_SUMMARY_TASKS) -> Dict[str, Any]:
+    """p50/p95 per processing stage over the `limit` most recently created traced tasks."""
+    rows = (
+        db.query(Task.trace)
+        .filter(Task.trace.isnot(None), Task.status != TaskStatus.DELETING)
+        .order_by(Task.created_at.desc(), Task.id.desc())
+        .limit(limit)
+    )
+    return {"limit": limit, **summarize_traces(row.trace for row in rows)}
+
+def parse_date_bound(value: Optional[str], end: bool = False) -> Optional[datetime.datetime]:
+    """Parse a 'YYYY-MM-DD', 'YYYY-MM' or 'YYYY' filter bound, or None if missing or invalid.
+
+    Partial dates expand to the first day of the period, or to its last day
+    when `end` is set.
+    """
+    if not value:
+        return None
+    for date_format in ("%Y-%m-%d", "%Y-%m", "%Y"):
+        try:
+            parsed = datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+        if end and date_format == "%Y":
+            parsed = parsed.replace(month=12, day=31)
+        elif end and date_format == "%Y-%m":
+            parsed = (parsed + datetime.timedelta(days=31)).replace(day=1) - datetime.timedelta(days=1)
+        if date_format != "%Y-%m-%d":
+            logger.debug(f"Converted partial date {value} to: {parsed}")
+        return parsed
+    logger.warning(f"Invalid {'end' if end else 'start'} date format: {value}")
+    return None
+
+def _filtered_records_query(
     task_id: int,
-    companies: List[str] = None,
-    model: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    db: Session = None
-) -> List[Record]:
-    """Get filtered records for a specific task."""
-    logger.info(f"Fetching records for task ID: {task_id} with filters - companies: {companies}, model: {model}, date range: {start_date} to {end_date}")
-    
-    query = db.query(Record).filter(Record.task_id == task_id)
+    companies: List[str],
+    model: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    query
+):
+    """Apply the records endpoint filters to a query over the records table."""
+    query = query.filter(Record.task_id == task_id)
     
     if companies:
         query = query.filter(Record.company.in_(companies))
@@ -67,118 +207,341 @@ def get_task_records(
     if model:
         query = query.filter(Record.model == model)
         
-    if start_date:
-        try:
-            start_date_obj = datetime.datetime.strptime(start_date, "%Y-%m-%d")
-            query = query.filter(Record.sale_date >= start_date_obj)
-        except ValueError:
-            try:
-                start_date_obj = datetime.datetime.strptime(f"{start_date}-01-01", "%Y-%m-%d")
-                query = query.filter(Record.sale_date >= start_date_obj)
-                logger.debug(f"Converted year-only start date to: {start_date_obj}")
-            except ValueError:
-                logger.warning(f"Invalid start date format: {start_date}")
-                
-    if end_date:
-        try:
-            end_date_obj = datetime.datetime.strptime(end_date, "%Y-%m-%d")
-            query = query.filter(Record.sale_date <= end_date_obj)
-        except ValueError:
-            try:
-                end_date_obj = datetime.datetime.strptime(f"{end_date}-12-31", "%Y-%m-%d")
-                query = query.filter(Record.sale_date <= end_date_obj)
-                logger.debug(f"Converted year-only end date to: {end_date_obj}")
-            except ValueError:
-                logger.warning(f"Invalid end date format: {end_date}")
-    
-    records = query.all()
+    start_date_obj = parse_date_bound(start_date)
+    if start_date_obj is not None:
+        query = query.filter(Record.sale_date >= start_date_obj)
+    
+    end_date_obj = parse_date_bound(end_date, end=True)
+    if end_date_obj is not None:
+        query = query.filter(Record.sale_date <= end_date_obj)
+    
+    return query
+
+def _keyset_page(query, after_id: Optional[int], limit: Optional[int]):
+    """Order by id and apply an `id > after_id` cursor and page size."""
+    if after_id is not None:
+        query = query.filter(Record.id > after_id)
+    query = query.order_by(Record.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def _record_columns(task_id: int):
+    """Record columns in RECORD_FIELDS order, reporting `task_id` as the owner.
+
+    Tasks sharing a dataset read rows stored under another task's id, so the
+    task_id column is replaced by the id the caller asked for.
+    """
+    return [
+        literal(task_id, Integer).label("task_id") if field == "task_id" else getattr(Record, field)
+        for field in RECORD_FIELDS
+    ]
+
+def _data_task_id(task_id: int, db: Session) -> Optional[int]:
+    """The task id `task_id`'s rows are stored under, or None once it is being deleted.
+
+    The reaper removes a deleted task's rows in the background; until it is
+    done they must already be invisible to reads.
+    """
+    status = db.query(Task.status).filter(Task.id == task_id).scalar()
+    if status == TaskStatus.DELETING:
+        return None
+    return resolve_data_task_id(task_id, db)
+
+def get_task_records(
+    task_id: int,
+    companies: List[str] = None,
+    model: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Any]:
+    """Get filtered records for a specific task, optionally one keyset page at a time.
+
+    Returns rows with the Record attributes, not ORM instances.
+    """
+    logger.info(f"Fetching records for task ID: {task_id} with filters - companies: {companies}, model: {model}, date range: {start_date} to {end_date}, after_id: {after_id}, limit: {limit}")
+    
+    data_task_id = _data_task_id(task_id, db)
+    if data_task_id is None:
+        return []
+    query = _filtered_records_query(data_task_id, companies, model, start_date, end_date, db.query(*_record_columns(task_id)))
+    records = _keyset_page(query, after_id, limit).all()
     logger.info(f"Found {len(records)} records for task ID: {task_id} after applying filters")
     return records
 
+def iter_task_record_batches(
+    task_id: int,
+    companies: List[str] = None,
+    model: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    batch_size: int = RECORD_STREAM_BATCH_SIZE
+):
+    """Yield filtered record rows in cursor batches of up to `batch_size` rows.
+
+    Each batch is a list of row tuples in RECORD_FIELDS order. Rows bypass the
+    ORM identity map, so memory stays constant regardless of task size.
+    """
+    logger.info(f"Streaming records for task ID: {task_id} with filters - companies: {companies}, model: {model}, date range: {start_date} to {end_date}, after_id: {after_id}, limit: {limit}")
+    
+    data_task_id = _data_task_id(task_id, db)
+    if data_task_id is None:
+        return
+    query = _filtered_records_query(data_task_id, companies, model, start_date, end_date, db.query(*_record_columns(task_id)))
+    result = db.execute(_keyset_page(query, after_id, limit).statement, execution_options={"yield_per": batch_size})
+    for partition in result.partitions():
+        yield partition
+
+def iter_task_record_rows(*args, **kwargs):
+    """Yield filtered record rows one at a time; see iter_task_record_batches."""
+    for batch in iter_task_record_batches(*args, **kwargs):
+        for row in batch:
+            yield tuple(row)
+
+def _analytics_cache_key(endpoint: str, task_id: int, task_state, **params):
+    """Cache key for an analytics result, or None when it must not be cached.
+
+    Only completed tasks are cached; their status and updated_at are part of
+    the key so a task changed by another process never serves a stale entry.
+    """
+    if task_state is None or task_state[0] != TaskStatus.COMPLETED:
+        return None
+    status, updated_at = task_state
+    return (endpoint, task_id, status, updated_at, tuple(sorted(params.items())))
+
+@event.listens_for(Task, "after_update")
+def _invalidate_analytics_on_status_change(mapper, connection, target):
+    if inspect(target).attrs.status.history.has_changes():
+        analytics_cache.invalidate_task(target.id)
+
 def get_company_analytics(task_id: int, db: Session) -> List[Dict[str, Any]]:
-    """Get sales analytics by company for a specific task."""
+    """Get sales analytics by company for a specific task, cached once it completes."""
+    key = _analytics_cache_key("companies", task_id, get_task_state(task_id, db))
+    if key is None:
+        return _compute_company_analytics(task_id, db)
+    return analytics_cache.get_or_compute(key, lambda: _compute_company_analytics(task_id, db))
+
+def get_timeline_analytics(
+    task_id: int,
+    db: Session,
+    bucket: str = "month",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    companies: Optional[List[str]] = None,
+    max_points: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Get sales per time bucket and company for a specific task, cached once it completes."""
+    params = _timeline_params(bucket, start_date, end_date, companies, max_points)
+    key = _analytics_cache_key("timeline", task_id, get_task_state(task_id, db), **params)
+    compute = lambda: _compute_timeline_analytics(task_id, db, **params)
+    if key is None:
+        return compute()
+    return analytics_cache.get_or_compute(key, compute)
+
+def _timeline_params(bucket, start_date, end_date, companies, max_points) -> Dict[str, Any]:
+    # Companies become a sorted tuple so equal subsets share a cache entry
+    return {
+        "bucket": bucket,
+        "start_date": start_date,
+        "end_date": end_date,
+        "companies": tuple(sorted(set(companies))) if companies else None,
+        "max_points": max_points
+    }
+
+def get_price_distribution(task_id: int, db: Session, group_by: str = "company", bins: int = 20) -> List[Dict[str, Any]]:
+    """Get box plot statistics and histograms of prices per company (or model), cached once it completes."""
+    key = _analytics_cache_key("distribution", task_id, get_task_state(task_id, db), group_by=group_by, bins=bins)
+    compute = lambda: _compute_price_distribution(task_id, db, group_by=group_by, bins=bins)
+    if key is None:
+        return compute()
+    return analytics_cache.get_or_compute(key, compute)
+
+def _compute_company_analytics(task_id: int, db: Session) -> List[Dict[str, Any]]:
     logger.info(f"Generating company analytics for task ID: {task_id}")
-    records = db.query(Record).filter(Record.task_id == task_id).all()
-    
-    company_data = {}
-    for record in records:
-        if record.company not in company_data:
-            company_data[record.company] = {
-                "total_sales": 0,
-                "total_revenue": 0,
-                "average_price": 0
-            }
-        
-        company_data[record.company]["total_sales"] += 1
-        company_data[record.company]["total_revenue"] += record.price
+    data_task_id = _data_task_id(task_id, db)
+    if data_task_id is None:
+        return []
     
-    for company in company_data:
-        if company_data[company]["total_sales"] > 0:
-            company_data[company]["average_price"] = (
-                company_data[company]["total_revenue"] / company_data[company]["total_sales"]
-            )
+    company_stats = get_company_rollups(data_task_id, db)
+    if not company_stats:
+        logger.debug(f"No rollups for task ID: {task_id}, aggregating records")
+        company_stats = iter_company_price_stats(data_task_id, db)
     
     result = [
         {
-            "company": company,
-            "total_sales": data["total_sales"],
-            "total_revenue": data["total_revenue"],
-            "average_price": data["average_price"]
+            "company": stats["company"],
+            "total_sales": stats["total_sales"],
+            "total_revenue": stats["total_revenue"],
+            "average_price": stats["average_price"]
         }
-        for company, data in company_data.items()
+        for stats in company_stats
     ]
     
     logger.info(f"Generated analytics for {len(result)} companies")
     return result
 
-def get_timeline_analytics(task_id: int, db: Session) -> List[Dict[str, Any]]:
-    """Get sales timeline analytics for a specific task."""
-    logger.info(f"Generating timeline analytics for task ID: {task_id}")
-    records = db.query(Record).filter(Record.task_id == task_id).all()
+def _month_aligned(start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> bool:
+    """True when a date range covers whole months, so month rollups can answer it."""
+    starts_on_month = start is None or start.day == 1
+    ends_on_month = end is None or (end + datetime.timedelta(days=1)).day == 1
+    return starts_on_month and ends_on_month
+
+def _compute_timeline_analytics(
+    task_id: int,
+    db: Session,
+    bucket: str = "month",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    companies: Optional[Tuple[str, ...]] = None,
+    max_points: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    logger.info(f"Generating {bucket} timeline analytics for task ID: {task_id}")
+    data_task_id = _data_task_id(task_id, db)
+    if data_task_id is None:
+        return []
+    start, end = parse_date_bound(start_date), parse_date_bound(end_date, end=True)
+    
+    if bucket in MONTH_ROLLUP_BUCKETS and _month_aligned(start, end) and has_rollups(data_task_id, db):
+        # An empty result here means the filters match nothing, not that the rollups are missing
+        result = get_timeline_rollups(
+            data_task_id, db, bucket,
+            start_month=start.strftime("%Y-%m") if start else None,
+            end_month=end.strftime("%Y-%m") if end else None,
+            companies=companies
+        )
+        logger.info(f"Served timeline analytics with {len(result)} data points from rollups")
+    else:
+        result = list(iter_timeline_buckets(data_task_id, db, bucket, start, end, companies))
+        logger.info(f"Generated timeline analytics with {len(result)} data points")
+    
+    if max_points is not None:
+        result = downsample_timeline(result, max_points)
+    return result
+
+def _compute_price_distribution(task_id: int, db: Session, group_by: str = "company", bins: int = 20) -> List[Dict[str, Any]]:
+    logger.info(f"Generating price distribution by {group_by} for task ID: {task_id}")
+    data_task_id = _data_task_id(task_id, db)
+    if data_task_id is None:
+        return []
+    sketches = get_price_sketches(data_task_id, db)
+    if not sketches:
+        logger.debug(f"No price sketches for task ID: {task_id}, sketching records")
+        sketches = compute_price_sketches(data_task_id, db)
     
-    timeline_data = {}
-    for record in records:
-        month_key = record.sale_date.strftime("%Y-%m")
-        company = record.company
-        
-        entry_key = f"{month_key}_{company}"
-        
-        if entry_key not in timeline_data:
-            timeline_data[entry_key] = {
-                "date": month_key,
-                "company": company,
-                "total_sales": 0,
-                "total_revenue": 0
-            }
-        
-        timeline_data[entry_key]["total_sales"] += 1
-        timeline_data[entry_key]["total_revenue"] += record.price
+    # Sketches are stored per company x model; company groups merge their models' sketches
+    groups = {}
+    for (company, model), sketch in sketches.items():
+        key = (company, model) if group_by == "model" else (company,)
+        groups[key] = groups[key].merge(sketch) if key in groups else sketch
     
-    result = list(timeline_data.values())
-    result.sort(key=lambda x: x["date"])
+    result = []
+    for key in sorted(groups, key=lambda key: tuple(part or "" for part in key)):
+        entry = {"company": key[0]}
+        if group_by == "model":
+            entry["model"] = key[1]
+        entry.update(groups[key].summary(bins=bins))
+        result.append(entry)
     
-    logger.info(f"Generated timeline analytics with {len(result)} data points")
+    logger.info(f"Generated price distribution for {len(result)} groups")
     return result
 
 def delete_task(task_id: int, db: Session) -> bool:
-    """Delete a task and its associated records."""
+    """Delete a task, leaving the removal of its records to the reaper.
+
+    The task is only marked DELETING, which hides it and its data from every
+    read at once; app.services.reaper then deletes the rows in small chunks
+    so a large task never holds the write lock for long.
+    """
     logger.info(f"Attempting to delete task with ID: {task_id}")
     
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = db.query(Task).filter(Task.id == task_id, Task.status != TaskStatus.DELETING).first()
     if task is None:
         logger.warning(f"Task with ID {task_id} not found for deletion")
         return False
     
     try:
-        records_deleted = db.query(Record).filter(Record.task_id == task_id).delete()
-        logger.info(f"Deleted {records_deleted} records associated with task {task_id}")
-        
-        db.delete(task)
+        task.status = TaskStatus.DELETING
+        # Jobs nobody has claimed yet are dropped; a running one notices the status and stops
+        db.query(Job).filter(Job.task_id == task_id, Job.status == JobStatus.QUEUED).delete(synchronize_session=False)
         db.commit()
-        logger.info(f"Successfully deleted task {task_id}")
+        analytics_cache.invalidate_task(task_id)
+        task_events.publish(task_id, TaskStatus.DELETING)
+        logger.info(f"Marked task {task_id} for deletion")
         
         return True
     except Exception as e:
         db.rollback()
         logger.error(f"Failed to delete task {task_id}: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+# Async variants for AsyncSession callers such as the async API endpoints.
+# Each runs the sync implementation above on the session's own async
+# connection via run_sync, so both paths share the same queries.
+
+async def create_task_async(task_data: TaskCreate, db: AsyncSession) -> Task:
+    return await db.run_sync(lambda session: create_task(task_data, session))
+
+async def get_tasks_async(
+    skip: int,
+    limit: int,
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    name_prefix: Optional[str] = None
+) -> Dict[str, Any]:
+    return await db.run_sync(lambda session: get_tasks(skip, limit, session, cursor, status, name_prefix))
+
+async def get_task_by_id_async(task_id: int, db: AsyncSession) -> Task:
+    return await db.run_sync(lambda session: get_task_by_id(task_id, session))
+
+async def get_task_state_async(task_id: int, db: AsyncSession) -> Optional[Tuple[str, datetime.datetime]]:
+    return await db.run_sync(lambda session: get_task_state(task_id, session))
+
+async def get_task_status_event_async(task_id: int, db: AsyncSession) -> Optional[Dict[str, Any]]:
+    return await db.run_sync(lambda session: get_task_status_event(task_id, session))
+
+async def get_task_trace_async(task_id: int, db: AsyncSession) -> Optional[Dict[str, Any]]:
+    return await db.run_sync(lambda session: get_task_trace(task_id, session))
+
+async def get_trace_summary_async(db: AsyncSession, limit: int = TRACE_SUMMARY_TASKS) -> Dict[str, Any]:
+    return await db.run_sync(lambda session: get_trace_summary(session, limit))
+
+async def _cached_analytics_async(endpoint: str, compute, task_id: int, db: AsyncSession, **params):
+    # The cache lookup happens out here rather than inside run_sync: a
+    # coalesced caller must await the in-flight result, not block the loop.
+    key = _analytics_cache_key(endpoint, task_id, await get_task_state_async(task_id, db), **params)
+    run = lambda: db.run_sync(lambda session: compute(task_id, session, **params))
+    if key is None:
+        return await run()
+    return await analytics_cache.get_or_compute_async(key, run)
+
+async def get_company_analytics_async(task_id: int, db: AsyncSession) -> List[Dict[str, Any]]:
+    return await _cached_analytics_async("companies", _compute_company_analytics, task_id, db)
+
+async def get_timeline_analytics_async(
+    task_id: int,
+    db: AsyncSession,
+    bucket: str = "month",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    companies: Optional[List[str]] = None,
+    max_points: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    return await _cached_analytics_async(
+        "timeline", _compute_timeline_analytics, task_id, db,
+        **_timeline_params(bucket, start_date, end_date, companies, max_points)
+    )
+
+async def get_price_distribution_async(task_id: int, db: AsyncSession, group_by: str = "company", bins: int = 20) -> List[Dict[str, Any]]:
+    return await _cached_analytics_async(
+        "distribution", _compute_price_distribution, task_id, db, group_by=group_by, bins=bins
+    )
+
+async def delete_task_async(task_id: int, db: AsyncSession) -> bool:
+    return await db.run_sync(lambda session: delete_task(task_id, session))
@@ -0,0 +1,113 @@
+import os
+import time
+import datetime
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.metrics import TASK_STAGE_SECONDS
+
+# How many of the most recent traced tasks the stage summary covers by default
+TRACE_SUMMARY_TASKS = int(os.getenv("TRACE_SUMMARY_TASKS", "200"))
+
+class TaskTrace:
+    """Timing trace of one run of process_task_async.
+
+    Each stage is recorded with its wall-clock start and duration (and is
+    also observed in the task_stage_duration_seconds histogram), next to
+    per-source download and row counts and the rows written. to_dict()
+    gives the JSON stored in the task's `trace` column.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.datetime.utcnow()
+        self._started = time.perf_counter()
+        self.stages = []
+        self.sources = {}
+        self.rows_written = 0
+        self.reused_dataset = None
+
+    def add_stage(self, name: str, started_at: datetime.datetime, duration: float):
+        self.stages.append({"stage": name, "started_at": started_at.isoformat(), "duration_seconds": round(duration, 6)})
+        TASK_STAGE_SECONDS.observe(duration, stage=name)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record the `with` block as stage `name`, also when it raises."""
+        started_at = datetime.datetime.utcnow()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, started_at, time.perf_counter() - start)
+
+    def record_source(self, normalized):
+        """Note a fetched source's size and its rows before and after the task's filters."""
+        self.sources[normalized.source] = {
+            "bytes_downloaded": normalized.bytes_downloaded,
+            "payload_bytes": normalized.payload_bytes,
+            "parse_seconds": normalized.parse_seconds,
+            "rows_rejected": normalized.rejected,
+            "rows_before_filter": normalized.unfiltered_rows,
+            "rows_after_filter": len(normalized),
+        }
+
+    def stage_duration(self, name: str) -> Optional[float]:
+        durations = [stage["duration_seconds"] for stage in self.stages if stage["stage"] == name]
+        return sum(durations) if durations else None
+
+    def to_dict(self, outcome: str, error_message: Optional[str] = None) -> Dict[str, Any]:
+        insert_seconds = self.stage_duration("insert")
+        trace = {
+            "outcome": outcome,
+            "started_at": self.started_at.isoformat(),
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": self.stages,
+            "sources": self.sources,
+            "reused_dataset": self.reused_dataset,
+            "rows_written": self.rows_written,
+            "insert_rows_per_second": round(self.rows_written / insert_seconds, 1) if insert_seconds else None,
+        }
+        if error_message is not None:
+            trace["error_message"] = error_message
+        return trace
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """The q-th percentile (0-100) of sorted values, interpolating between ranks."""
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def _distribution(values: List[float]) -> Dict[str, Any]:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 6),
+        "p95": round(percentile(values, 95), 6),
+        "max": values[-1],
+    }
+
+def summarize_traces(traces: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """p50/p95/max per stage, of the total time and of the insert rate across traces.
+
+    A stage entered more than once in a run counts with its summed duration.
+    """
+    per_stage, totals, insert_rates, outcomes = {}, [], [], {}
+    for trace in traces:
+        run_stages = {}
+        for stage in trace.get("stages", []):
+            run_stages[stage["stage"]] = run_stages.get(stage["stage"], 0.0) + stage["duration_seconds"]
+        for name, duration in run_stages.items():
+            per_stage.setdefault(name, []).append(duration)
+        totals.append(trace["total_seconds"])
+        if trace.get("insert_rows_per_second"):
+            insert_rates.append(trace["insert_rows_per_second"])
+        outcomes[trace["outcome"]] = outcomes.get(trace["outcome"], 0) + 1
+
+    return {
+        "tasks": len(totals),
+        "outcomes": outcomes,
+        "total_seconds": _distribution(totals) if totals else None,
+        "insert_rows_per_second": _distribution(insert_rates) if insert_rates else None,
+        "stages": {name: _distribution(durations) for name, durations in sorted(per_stage.items())},
+    }
@@ -0,0 +1,75 @@
+import argparse
+import logging
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.db.database import engine, get_db, get_read_db, Base
+from app.db.migrations import run_migrations
+from app.services.scheduler import start_scheduler, stop_scheduler, MAX_CONCURRENT_TASKS
+from app.services.reaper import start_reaper, stop_reaper
+from app.services.metrics import PROMETHEUS_CONTENT_TYPE
+from app.api.metrics import render_metrics
+
+logger = logging.getLogger(__name__)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics for Prometheus; workers have no API server of their own."""
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        db = next(get_read_db())
+        try:
+            body = render_metrics(db).encode("utf-8")
+        finally:
+            db.close()
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def main():
+    """Run a standalone worker process that leases tasks from the durable job queue.
+
+    Start as many of these as needed next to the API (run the API with
+    RUN_EMBEDDED_WORKER=0 to leave all processing to them):
+
+        python -m app.worker --concurrency 32
+    """
+    parser = argparse.ArgumentParser(description="Process queued data tasks.")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_TASKS, help="Tasks to run at once")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics at /metrics on this port")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Importing the models registers them on Base before the tables are created
+    import app.models.models  # noqa: F401
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    scheduler = start_scheduler(get_db, args.concurrency)
+    start_reaper(get_db)
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = ThreadingHTTPServer(("", args.metrics_port), MetricsHandler)
+        threading.Thread(target=metrics_server.serve_forever, daemon=True, name="WorkerMetrics").start()
+        logger.info(f"Serving worker metrics on port {args.metrics_port}")
+    logger.info(f"Worker {scheduler.worker_id} running, press Ctrl+C to stop")
+    stopping.wait()
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    stop_reaper()
+    stop_scheduler()
+
+if __name__ == "__main__":
+    main()
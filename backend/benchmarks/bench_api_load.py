@@ -0,0 +1,137 @@
+"""Compare sync (thread pool) and async (aiosqlite) endpoints under concurrent load.
+
+Serves the task list and company analytics twice, once from sync `def`
+handlers on blocking sessions and once from `async def` handlers on
+AsyncSessions, and drives each with N concurrent in-process HTTP clients.
+The clients share the server's event loop and CPU, so run it on a machine
+with a few cores for numbers that resemble a deployed API.
+
+Usage:
+    python benchmarks/bench_api_load.py --clients 50 200 500 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import numpy as np
+from fastapi import Depends, FastAPI
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db.database import Base, create_sqlite_engine, create_async_sqlite_engine, DB_READ_POOL_SIZE
+from app.models.models import Task, TaskStatus
+from app.services import task_service
+from app.services.ingestion import write_records
+from app.services.rollups import build_rollups
+from bench_ingestion import synthetic_source
+
+def build_apps(path):
+    read_engine = create_sqlite_engine(f"sqlite:///{path}", read_only=True, pool_size=DB_READ_POOL_SIZE)
+    async_read_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}", read_only=True, pool_size=DB_READ_POOL_SIZE)
+    ReadSession = sessionmaker(bind=read_engine)
+    AsyncReadSession = async_sessionmaker(async_read_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = ReadSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncReadSession() as db:
+            yield db
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/tasks/")
+    def sync_tasks(db=Depends(get_sync_db)):
+        return {"total": task_service.get_tasks(0, 10, db)["total"]}
+
+    @sync_app.get("/tasks/{task_id}/analytics/companies")
+    def sync_companies(task_id: int, db=Depends(get_sync_db)):
+        return task_service.get_company_analytics(task_id, db)
+
+    async_app = FastAPI()
+
+    @async_app.get("/tasks/")
+    async def async_tasks(db=Depends(get_async_db)):
+        return {"total": (await task_service.get_tasks_async(0, 10, db))["total"]}
+
+    @async_app.get("/tasks/{task_id}/analytics/companies")
+    async def async_companies(task_id: int, db=Depends(get_async_db)):
+        return await task_service.get_company_analytics_async(task_id, db)
+
+    return {"sync": sync_app, "async": async_app}, (read_engine, async_read_engine)
+
+def seed(path, rows):
+    engine = create_sqlite_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    task = Task(name="load-test", parameters={}, status=TaskStatus.COMPLETED)
+    db.add(task)
+    db.flush()
+    write_records(task.id, [synthetic_source(rows)], db)
+    build_rollups(task.id, db)
+    db.commit()
+    task_id = task.id
+    db.close()
+    engine.dispose()
+    return task_id
+
+async def drive(app, task_id, clients, total_requests):
+    paths = ["/tasks/", f"/tasks/{task_id}/analytics/companies"]
+    latencies = []
+    errors = 0
+    next_request = iter(range(total_requests))
+    transport = httpx.ASGITransport(app=app)
+
+    async def client_loop(client):
+        nonlocal errors
+        for i in next_request:
+            started = time.perf_counter()
+            response = await client.get(paths[i % len(paths)])
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[client_loop(client) for _ in range(clients)])
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+async def run_all(args, path, task_id):
+    apps, (read_engine, async_read_engine) = build_apps(path)
+    for clients in args.clients:
+        for mode, app in apps.items():
+            latencies, errors, elapsed = await drive(app, task_id, clients, args.requests)
+            p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+            print(
+                f"{mode:<6} {clients:>4} clients  {len(latencies) / elapsed:8.0f} req/s  "
+                f"p50 {p50:8.1f} ms  p99 {p99:8.1f} ms  errors {errors}"
+            )
+    read_engine.dispose()
+    await async_read_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per run")
+    parser.add_argument("--rows", type=int, default=20000, help="Records in the queried task")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        task_id = seed(path, args.rows)
+        # One event loop for every run: the async engine's pool is bound to it
+        asyncio.run(run_all(args, path, task_id))
+
+if __name__ == "__main__":
+    main()
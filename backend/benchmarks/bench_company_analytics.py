@@ -0,0 +1,108 @@
+"""Compare the legacy in-Python company analytics with the SQL aggregation path.
+
+Usage:
+    python benchmarks/bench_company_analytics.py --rows 200000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.models.models import Task, Record, TaskStatus
+from app.services.analytics_cache import analytics_cache
+from app.services.task_service import get_company_analytics
+
+COMPANIES = ["Toyota", "Honda", "Ford", "Chevrolet", "BMW", "Mercedes"]
+
+def legacy_company_analytics(task_id, db):
+    """The pre-aggregation implementation: hydrate every Record and sum in Python."""
+    records = db.query(Record).filter(Record.task_id == task_id).all()
+    company_data = {}
+    for record in records:
+        data = company_data.setdefault(record.company, {"total_sales": 0, "total_revenue": 0})
+        data["total_sales"] += 1
+        data["total_revenue"] += record.price
+    return [
+        {
+            "company": company,
+            "total_sales": data["total_sales"],
+            "total_revenue": data["total_revenue"],
+            "average_price": data["total_revenue"] / data["total_sales"]
+        }
+        for company, data in company_data.items()
+    ]
+
+def seed(engine, rows):
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    task = Task(name="bench", parameters={}, status=TaskStatus.COMPLETED)
+    db.add(task)
+    db.commit()
+    rng = random.Random(42)
+    start = datetime.datetime(2015, 1, 1)
+    batch = []
+    with engine.begin() as conn:
+        for _ in range(rows):
+            batch.append({
+                "task_id": task.id,
+                "source": "A",
+                "company": rng.choice(COMPANIES),
+                "model": f"Model{rng.randint(1, 20)}",
+                "sale_date": start + datetime.timedelta(days=rng.randint(0, 3650)),
+                "price": rng.uniform(15000, 90000),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Record), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Record), batch)
+    task_id = task.id
+    db.close()
+    return task_id
+
+def measure(label, fn, Session, task_id, repeat):
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        # Completed tasks' analytics are cached; time the query, not a cache hit
+        analytics_cache.clear()
+        db = Session()
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn(task_id, db)
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        db.close()
+    best = min(timings)
+    print(f"{label:<8} best {best * 1000:9.1f} ms   peak {peak / 1024 / 1024:8.2f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        task_id = seed(engine, args.rows)
+        Session = sessionmaker(bind=engine)
+
+        print(f"company analytics over {args.rows} records")
+        measure("legacy", legacy_company_analytics, Session, task_id, args.repeat)
+        measure("sql", get_company_analytics, Session, task_id, args.repeat)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Measure API read latency while ingestion workers write to the same database.
+
+Runs writer threads that ingest batches of records (like the job queue) next
+to reader threads that page records and aggregate analytics (like the API),
+first on one default SQLite engine and then with WAL, tuned pragmas and
+separate writer/reader engines. Prints read latency percentiles and the
+number of "database is locked" errors for each configuration.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py --writers 4 --readers 8 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, create_sqlite_engine, DB_READ_POOL_SIZE
+from app.models.models import Task, TaskStatus
+from app.services import task_service
+from app.services.ingestion import write_records
+from app.services.rollups import build_rollups
+from bench_ingestion import synthetic_source
+
+def engines_for(mode, url):
+    if mode == "default":
+        shared = create_engine(url, connect_args={"check_same_thread": False})
+        return shared, shared
+    return create_sqlite_engine(url), create_sqlite_engine(url, read_only=True, pool_size=DB_READ_POOL_SIZE)
+
+def seed_task(Session, rows):
+    db = Session()
+    task = Task(name=f"seed-{time.time()}", parameters={}, status=TaskStatus.COMPLETED)
+    db.add(task)
+    db.flush()
+    write_records(task.id, [synthetic_source(rows)], db)
+    build_rollups(task.id, db)
+    db.commit()
+    task_id = task.id
+    db.close()
+    return task_id
+
+def writer_loop(Session, batch_rows, stop, stats):
+    source = synthetic_source(batch_rows, seed=7)
+    while not stop.is_set():
+        db = Session()
+        try:
+            task = Task(name=f"ingest-{threading.get_ident()}-{time.perf_counter()}", parameters={}, status=TaskStatus.IN_PROGRESS)
+            db.add(task)
+            db.flush()
+            write_records(task.id, [source], db)
+            build_rollups(task.id, db)
+            db.commit()
+            stats["rows_written"] += batch_rows
+        except OperationalError:
+            db.rollback()
+            stats["write_errors"] += 1
+        finally:
+            db.close()
+
+def reader_loop(Session, task_id, stop, latencies, stats):
+    while not stop.is_set():
+        db = Session()
+        started = time.perf_counter()
+        try:
+            task_service.get_task_records(task_id, ["Toyota"], db=db, limit=500)
+            list(task_service.iter_task_record_rows(task_id, None, None, "2018", "2019", db=db, limit=500))
+            task_service.get_company_analytics(task_id, db)
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            stats["read_errors"] += 1
+        finally:
+            db.close()
+
+def run(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        write_engine, read_engine = engines_for(mode, url)
+        Base.metadata.create_all(bind=write_engine)
+        WriteSession = sessionmaker(bind=write_engine)
+        ReadSession = sessionmaker(bind=read_engine)
+        task_id = seed_task(WriteSession, args.seed_rows)
+
+        stop = threading.Event()
+        latencies = []
+        stats = {"rows_written": 0, "write_errors": 0, "read_errors": 0}
+        threads = [threading.Thread(target=writer_loop, args=(WriteSession, args.batch_rows, stop, stats)) for _ in range(args.writers)]
+        threads += [threading.Thread(target=reader_loop, args=(ReadSession, task_id, stop, latencies, stats)) for _ in range(args.readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        write_engine.dispose()
+        read_engine.dispose()
+
+    if latencies:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    else:
+        p50 = p95 = p99 = float("nan")
+    print(
+        f"{mode:<8} reads {len(latencies):>6}  p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms  "
+        f"read errors {stats['read_errors']:>4}  rows written {stats['rows_written']:>9,}  write errors {stats['write_errors']:>4}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch-rows", type=int, default=20000, help="Rows per ingested task")
+    parser.add_argument("--seed-rows", type=int, default=50000, help="Rows in the task the readers query")
+    parser.add_argument("--modes", nargs="+", default=["default", "wal"], choices=["default", "wal"])
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f} s per configuration")
+    for mode in args.modes:
+        run(mode, args)
+
+if __name__ == "__main__":
+    main()
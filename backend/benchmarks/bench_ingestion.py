@@ -0,0 +1,81 @@
+"""Compare ORM bulk_save_objects ingestion with the Core executemany writer.
+
+Usage:
+    python benchmarks/bench_ingestion.py --sizes 10000 100000 1000000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.models.models import Task, Record, TaskStatus
+from app.services.ingestion import write_records, INGEST_BATCH_SIZE
+from app.services.normalization import NormalizedSource
+
+COMPANIES = ["Toyota", "Honda", "Ford", "Chevrolet", "BMW", "Mercedes"]
+
+def synthetic_source(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "company": pd.Categorical(rng.choice(COMPANIES, rows)),
+        "model": pd.Categorical([f"Model{i}" for i in rng.integers(1, 40, rows)]),
+        "sale_date": pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D"),
+        "price": rng.uniform(15000, 90000, rows),
+    })
+    return NormalizedSource("A", frame)
+
+def legacy_write(task_id, sources, db):
+    """The previous path: one Record instance per row handed to bulk_save_objects."""
+    records = []
+    for normalized in sources:
+        companies, models, sale_dates, prices = normalized.columns()
+        records.extend(
+            Record(task_id=task_id, source=normalized.source, company=c, model=m, sale_date=d, price=p)
+            for c, m, d, p in zip(companies, models, sale_dates, prices)
+        )
+    db.bulk_save_objects(records)
+    db.flush()
+
+def run(label, writer, engine, source, rows):
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    task = Task(name=f"{label}-{rows}-{random.random()}", parameters={}, status=TaskStatus.IN_PROGRESS)
+    db.add(task)
+    db.commit()
+    started = time.perf_counter()
+    writer(task.id, [source], db)
+    db.commit()
+    elapsed = time.perf_counter() - started
+    db.close()
+    print(f"{label:<6} {rows:>9} rows  {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--skip-legacy", action="store_true", help="Only measure the Core writer")
+    args = parser.parse_args()
+
+    print(f"ingestion benchmark (batch size {INGEST_BATCH_SIZE})")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        for rows in args.sizes:
+            source = synthetic_source(rows)
+            if not args.skip_legacy:
+                run("orm", legacy_write, engine, source, rows)
+            run("core", write_records, engine, source, rows)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
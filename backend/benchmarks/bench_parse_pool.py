@@ -0,0 +1,69 @@
+"""Measure how Source A parsing/normalization scales with the parse process pool.
+
+Parses several synthetic JSON payloads concurrently, first inline on the
+event loop and then through process pools of increasing size.
+
+Usage:
+    python benchmarks/bench_parse_pool.py --payloads 8 --rows 200000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import parse_pool
+from app.services.normalization import parse_source_a_payload
+
+COMPANIES = ["Toyota", "Honda", "Ford", "Chevrolet", "BMW", "Mercedes"]
+
+def synthetic_payload(rows, seed):
+    rng = random.Random(seed)
+    return json.dumps([
+        {
+            "company": rng.choice(COMPANIES),
+            "model": f"Model{rng.randint(1, 40)}",
+            "sale_date": f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "price": f"{rng.uniform(15000, 90000):.2f}",
+        }
+        for _ in range(rows)
+    ])
+
+async def parse_all(payloads, mode):
+    return await asyncio.gather(*[parse_pool.run_parse(parse_source_a_payload, payload, mode=mode) for payload in payloads])
+
+def run(label, payloads, mode):
+    started = time.perf_counter()
+    results = asyncio.run(parse_all(payloads, mode))
+    elapsed = time.perf_counter() - started
+    rows = sum(len(result) for result in results)
+    print(f"{label:<12} {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/s")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payloads", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    payloads = [synthetic_payload(args.rows, seed) for seed in range(args.payloads)]
+    print(f"parsing {args.payloads} payloads x {args.rows} rows on {os.cpu_count()} cores")
+
+    baseline = run("inline", payloads, "inline")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        parse_pool.PARSE_POOL_SIZE = workers
+        parse_pool.shutdown_parse_pool()
+        # Warm the pool so process start-up is not counted against throughput
+        asyncio.run(parse_all([synthetic_payload(10, 0)] * workers, "process"))
+        elapsed = run(f"process x{workers}", payloads, "process")
+        print(f"{'':<12} speedup {baseline / elapsed:5.2f}x")
+        workers *= 2
+    parse_pool.shutdown_parse_pool()
+
+if __name__ == "__main__":
+    main()
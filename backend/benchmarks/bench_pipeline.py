@@ -0,0 +1,323 @@
+"""End-to-end pipeline benchmark against the local stand-in data sources.
+
+Starts benchmarks/source_server.py in-process with synthetic sources of
+`--rows` rows, points SOURCE_A_URL/SOURCE_B_URL at it and runs `--tasks`
+tasks through the task scheduler on a temporary database, with the
+simulated delays set to `--delay` seconds. It then drives the records and
+analytics endpoints of the finished tasks in-process. Nothing leaves the
+machine, so runs are comparable across commits.
+
+Reported:
+  - end-to-end task throughput (tasks/s from scheduler start to the last task finishing)
+  - ingestion rows/s, overall and per task insert stage (from the task traces)
+  - p50/p95/max of every task stage (the trace summary)
+  - peak RSS of this process and of the largest parse-pool worker
+  - p50/p95/p99 latency of each endpoint; the first request for a task fills
+    the analytics cache, later ones for the same task are served from it
+
+Results are written as JSON to `--output`; `--compare` prints the change of
+every numeric result against an earlier results file.
+
+Usage:
+    python benchmarks/bench_pipeline.py --tasks 50 --rows 100000 --skew 1.2 --output results.json
+    python benchmarks/bench_pipeline.py --compare baseline.json --output results.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api import tasks as tasks_api
+from app.db.database import Base, create_sqlite_engine, create_async_sqlite_engine, get_db, get_read_db, get_async_db, get_async_read_db, DB_READ_POOL_SIZE
+from app.db.migrations import run_migrations
+from app.models.models import Task, TaskStatus
+from app.schemas.schemas import TaskCreate, TaskParameters
+from app.services import job_queue, task_service
+from app.services.analytics_cache import analytics_cache
+from app.services.ingestion import INGEST_BATCH_SIZE
+from app.services.parse_pool import PARSE_MODE, shutdown_parse_pool
+from app.services.scheduler import TaskScheduler
+from app.services.task_trace import summarize_traces
+from source_server import COMPANIES, start_source_server
+
+ENDPOINTS = {
+    "records": "/api/tasks/{task_id}/records?limit=1000",
+    "analytics_companies": "/api/tasks/{task_id}/analytics/companies",
+    "analytics_timeline": "/api/tasks/{task_id}/analytics/timeline",
+    "analytics_distribution": "/api/tasks/{task_id}/analytics/distribution",
+    "task_list": "/api/tasks/?limit=50",
+}
+
+def peak_rss_mib(who=resource.RUSAGE_SELF):
+    """Peak resident set size; ru_maxrss is KiB on Linux and bytes on macOS."""
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def task_parameters(rng, shared=None, duplicate_fraction=0.0):
+    """Random year ranges and company filters, or `shared` for a duplicate-parameters task."""
+    if shared is not None and rng.random() < duplicate_fraction:
+        return shared
+    params = {}
+    for source in ("a", "b"):
+        start_year = 2015 + int(rng.integers(0, 6))
+        params[f"start_year_{source}"] = str(start_year)
+        params[f"end_year_{source}"] = str(start_year + int(rng.integers(0, 5)))
+        params[f"companies_{source}"] = sorted(rng.choice(COMPANIES, int(rng.integers(0, 5)), replace=False).tolist())
+    return params
+
+def run_pipeline(engine, args):
+    """Create the tasks, run them on a scheduler and collect their traces."""
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    rng = np.random.default_rng(args.seed)
+    db = Session()
+    shared = None
+    for i in range(args.tasks):
+        params = task_parameters(rng, shared, args.duplicate_fraction)
+        shared = shared or params
+        task_service.create_task(TaskCreate(name=f"bench-{i}", parameters=TaskParameters(**params)), db)
+
+    def db_factory():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    scheduler = TaskScheduler(db_factory, max_concurrent_tasks=args.concurrency, use_durable_queue=True)
+    finished = 0
+    started = time.perf_counter()
+    scheduler.start()
+    try:
+        deadline = started + args.timeout
+        while time.perf_counter() < deadline:
+            finished = db.query(Task).filter(Task.status.in_([TaskStatus.COMPLETED, TaskStatus.FAILED])).count()
+            if finished == args.tasks:
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+    finally:
+        scheduler.stop()
+        shutdown_parse_pool()
+
+    rows = db.query(Task.id, Task.status, Task.trace).order_by(Task.id).all()
+    db.close()
+    traces = [trace for _, _, trace in rows if trace]
+    rows_written = sum(trace["rows_written"] for trace in traces)
+    completed = [task_id for task_id, status, _ in rows if status == TaskStatus.COMPLETED]
+    return completed, {
+        "tasks": args.tasks,
+        "completed": len(completed),
+        "finished": finished,
+        "elapsed_seconds": round(elapsed, 3),
+        "tasks_per_second": round(finished / elapsed, 3),
+        "rows_written": rows_written,
+        "rows_per_second": round(rows_written / elapsed, 1),
+        "datasets_reused": sum(1 for trace in traces if trace.get("reused_dataset")),
+        "source_cache": job_queue.source_cache.stats(),
+        "trace_summary": summarize_traces(traces),
+    }
+
+def build_app(path):
+    """The real task routes, with every session dependency bound to the benchmark database."""
+    engine = create_sqlite_engine(f"sqlite:///{path}")
+    read_engine = create_sqlite_engine(f"sqlite:///{path}", read_only=True, pool_size=DB_READ_POOL_SIZE)
+    async_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}")
+    async_read_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}", read_only=True, pool_size=DB_READ_POOL_SIZE)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSession = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+    def session_dependency(factory):
+        def dependency():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        return dependency
+
+    def async_session_dependency(factory):
+        async def dependency():
+            async with factory() as db:
+                yield db
+        return dependency
+
+    app = FastAPI()
+    app.include_router(tasks_api.router, prefix="/api")
+    app.dependency_overrides[get_db] = session_dependency(Session)
+    app.dependency_overrides[get_read_db] = session_dependency(ReadSession)
+    app.dependency_overrides[get_async_db] = async_session_dependency(AsyncSession)
+    app.dependency_overrides[get_async_read_db] = async_session_dependency(AsyncReadSession)
+    return app, (engine, read_engine), (async_engine, async_read_engine)
+
+async def measure_endpoints(path, task_ids, args):
+    app, engines, async_engines = build_app(path)
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for name, template in ENDPOINTS.items():
+                analytics_cache.clear()
+                next_request = iter(range(args.requests))
+                latencies, errors = [], 0
+
+                async def client_loop():
+                    nonlocal errors
+                    for i in next_request:
+                        started = time.perf_counter()
+                        response = await client.get(template.format(task_id=task_ids[i % len(task_ids)]))
+                        latencies.append(time.perf_counter() - started)
+                        if response.status_code != 200:
+                            errors += 1
+
+                started = time.perf_counter()
+                await asyncio.gather(*[client_loop() for _ in range(args.clients)])
+                elapsed = time.perf_counter() - started
+                p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+                results[name] = {
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "requests_per_second": round(len(latencies) / elapsed, 1),
+                    "p50_ms": round(float(p50), 3),
+                    "p95_ms": round(float(p95), 3),
+                    "p99_ms": round(float(p99), 3),
+                    "max_ms": round(max(latencies) * 1000, 3),
+                }
+    finally:
+        for engine in engines:
+            engine.dispose()
+        for engine in async_engines:
+            await engine.dispose()
+    return results
+
+def numeric_leaves(value, prefix=""):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from numeric_leaves(child, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+def print_comparison(baseline, current):
+    """Print each numeric result present in both runs with its relative change."""
+    before = dict(numeric_leaves(baseline["results"]))
+    print(f"\n{'metric':<60} {'baseline':>14} {'current':>14} {'change':>9}")
+    for key, value in numeric_leaves(current["results"]):
+        if key not in before:
+            continue
+        change = f"{(value - before[key]) / before[key] * 100:+8.1f}%" if before[key] else "       -"
+        print(f"{key:<60} {before[key]:>14,.3f} {value:>14,.3f} {change}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8, help="Scheduler's concurrent task limit")
+    parser.add_argument("--rows", type=int, default=50000, help="Rows in each synthetic source")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of company popularity (0 = uniform)")
+    parser.add_argument("--invalid-fraction", type=float, default=0.0, help="Share of malformed source rows")
+    parser.add_argument("--source-latency-ms", type=float, default=0.0, help="Delay added to every source response")
+    parser.add_argument("--source-cache-ttl", type=float, default=None, help="Override SOURCE_CACHE_TTL_SECONDS")
+    parser.add_argument("--duplicate-fraction", type=float, default=0.0, help="Share of tasks repeating the first task's parameters")
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated pending/processing delay in seconds")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--clients", type=int, default=10, help="Concurrent endpoint clients")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Give up waiting for the tasks after this many seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_pipeline.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    job_queue.SIMULATED_DELAY_SECONDS = (args.delay, args.delay)
+    if args.source_cache_ttl is not None:
+        job_queue.source_cache.ttl_seconds = args.source_cache_ttl
+    started_at = datetime.datetime.utcnow()
+
+    server = start_source_server(args.rows, args.skew, args.seed, args.invalid_fraction, args.source_latency_ms / 1000)
+    job_queue.SOURCE_A_URL = f"{server.base_url}/source-a"
+    job_queue.SOURCE_B_URL = f"{server.base_url}/source-b"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            engine = create_sqlite_engine(f"sqlite:///{path}")
+            Base.metadata.create_all(bind=engine)
+            run_migrations(engine)
+            baseline_rss = peak_rss_mib()
+
+            print(f"running {args.tasks} tasks on {args.rows:,}-row sources (skew {args.skew})")
+            task_ids, pipeline = run_pipeline(engine, args)
+            engine.dispose()
+            memory = {
+                "baseline_rss_mib": baseline_rss,
+                "peak_rss_mib": peak_rss_mib(),
+                "parse_worker_peak_rss_mib": peak_rss_mib(resource.RUSAGE_CHILDREN),
+            }
+            print(
+                f"pipeline  {pipeline['finished']}/{args.tasks} tasks in {pipeline['elapsed_seconds']:.2f} s  "
+                f"{pipeline['tasks_per_second']:.2f} tasks/s  {pipeline['rows_per_second']:,.0f} rows/s  "
+                f"peak rss {memory['peak_rss_mib']} MiB"
+            )
+
+            endpoints = {}
+            if task_ids:
+                endpoints = asyncio.run(measure_endpoints(path, task_ids, args))
+                for name, stats in endpoints.items():
+                    print(
+                        f"{name:<24} {stats['requests_per_second']:8.0f} req/s  p50 {stats['p50_ms']:8.1f} ms  "
+                        f"p95 {stats['p95_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms  errors {stats['errors']}"
+                    )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    results = {
+        "benchmark": "pipeline",
+        "started_at": started_at.isoformat(),
+        "environment": {
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "parse_mode": PARSE_MODE,
+            "ingest_batch_size": INGEST_BATCH_SIZE,
+        },
+        "config": vars(args),
+        "results": {
+            "pipeline": pipeline,
+            "source_server": server.stats(),
+            "memory": memory,
+            "endpoints": endpoints,
+        },
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+
+if __name__ == "__main__":
+    main()
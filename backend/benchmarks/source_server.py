@@ -0,0 +1,143 @@
+"""Local stand-in for the two data sources, serving synthetic datasets.
+
+Source A is served as a JSON array at /source-a and source B as CSV at
+/source-b, in the shapes the live gists use. Company popularity follows a
+Zipf distribution (`--skew 0` is uniform, larger values concentrate the
+rows on the first few companies), a fraction of rows can be made malformed
+to exercise the reject path, and responses carry an ETag so the source
+cache's conditional revalidation works as it does against the gists.
+
+Point the app at it with
+    SOURCE_A_URL=http://127.0.0.1:8765/source-a SOURCE_B_URL=http://127.0.0.1:8765/source-b
+
+Usage:
+    python benchmarks/source_server.py --rows 100000 --skew 1.2 --port 8765
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+COMPANIES = [
+    "Toyota", "Honda", "Ford", "Chevrolet", "BMW", "Mercedes",
+    "Nissan", "Hyundai", "Kia", "Volkswagen", "Audi", "Subaru",
+]
+
+def synthetic_frame(rows, skew=1.0, seed=42, invalid_fraction=0.0, start_year=2015, years=10):
+    """Raw source rows: string dates and prices, Zipf-skewed companies, some malformed rows."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(COMPANIES) + 1) ** skew
+    company = rng.choice(COMPANIES, rows, p=weights / weights.sum())
+    sale_date = pd.Timestamp(f"{start_year}-01-01") + pd.to_timedelta(rng.integers(0, 365 * years, rows), unit="D")
+    frame = pd.DataFrame({
+        "company": company,
+        "model": [f"Model{i}" for i in rng.integers(1, 40, rows)],
+        "sale_date": sale_date.strftime("%Y-%m-%d"),
+        "price": np.char.mod("%.2f", rng.uniform(15000, 90000, rows)),
+    })
+    invalid = rng.random(rows) < invalid_fraction
+    frame.loc[invalid, "price"] = "n/a"
+    return frame
+
+def build_payloads(rows, skew=1.0, seed=42, invalid_fraction=0.0):
+    """{path: (body, content type)} for both sources, generated from different seeds."""
+    source_a = synthetic_frame(rows, skew, seed, invalid_fraction)
+    source_b = synthetic_frame(rows, skew, seed + 1, invalid_fraction)
+    return {
+        "/source-a": (source_a.to_json(orient="records").encode("utf-8"), "application/json"),
+        "/source-b": (source_b.to_csv(index=False).encode("utf-8"), "text/csv; charset=utf-8"),
+    }
+
+class SourceHandler(BaseHTTPRequestHandler):
+    """Serves the server's payloads, answering If-None-Match with 304."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        payload = server.payloads.get(self.path.split("?", 1)[0])
+        if payload is None:
+            self.send_error(404)
+            return
+        body, content_type = payload
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if server.latency_seconds:
+            time.sleep(server.latency_seconds)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        server.bytes_sent += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class SourceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, payloads, latency_seconds=0.0):
+        super().__init__(address, SourceHandler)
+        self.payloads = payloads
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        self.bytes_sent = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "bytes_sent": self.bytes_sent,
+            "payload_bytes": {path: len(body) for path, (body, _) in self.payloads.items()},
+        }
+
+def start_source_server(rows, skew=1.0, seed=42, invalid_fraction=0.0, latency_seconds=0.0, host="127.0.0.1", port=0):
+    """Serve synthetic payloads from a background thread; port 0 picks a free port."""
+    server = SourceServer((host, port), build_payloads(rows, skew, seed, invalid_fraction), latency_seconds)
+    threading.Thread(target=server.serve_forever, daemon=True, name="SourceServer").start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Rows in each source")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of company popularity (0 = uniform)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--invalid-fraction", type=float, default=0.0, help="Share of rows with an unparseable price")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = SourceServer(
+        (args.host, args.port),
+        build_payloads(args.rows, args.skew, args.seed, args.invalid_fraction),
+        args.latency_ms / 1000
+    )
+    for path, (body, content_type) in server.payloads.items():
+        print(f"{server.base_url}{path}  {content_type}  {len(body):,} bytes")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,9 @@ from sqlalchemy.orm import sessionmaker, scoped_session
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.models.models import Task, Record, TaskStatus
-from app.db.database import Base, get_db
+from app.db.database import Base, get_db, get_read_db, get_async_db, get_async_read_db
 from app.main import app
+from app.services.analytics_cache import analytics_cache
 from fastapi.testclient import TestClient
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.sqlite"
@@ -30,6 +31,13 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
 
+@pytest.fixture(autouse=True)
+def clear_analytics_cache():
+    # Task ids restart with every rolled-back test database, so never share results
+    analytics_cache.clear()
+    yield
+    analytics_cache.clear()
+
 @pytest.fixture(scope="function")
 def test_db():
     """
@@ -45,6 +53,22 @@ def test_db():
     transaction.rollback()
     connection.close()
 
+class SyncSessionRunner:
+    """Stands in for an AsyncSession so async endpoints run on the test session.
+
+    The async services only use run_sync (and close), and the test session's outer
+    transaction cannot be shared with a separate aiosqlite connection.
+    """
+    def __init__(self, session):
+        self.session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.session, *args, **kwargs)
+
+    async def close(self):
+        # The test session outlives the request; closing it would end the test's transaction
+        pass
+
 @pytest.fixture
 def client(test_db):
     """
@@ -57,6 +81,13 @@ def client(test_db):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    
+    async def override_get_async_db():
+        yield SyncSessionRunner(test_db)
+    
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
     
     with TestClient(app) as c:
         yield c
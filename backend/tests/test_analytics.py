@@ -0,0 +1,79 @@
+import pytest
+import datetime
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, Record, TaskStatus, CompanyRollup, CompanyModelMonthRollup
+from app.services import task_service
+from app.services.aggregation import iter_company_price_stats
+from app.services.rollups import build_rollups, backfill_rollups, get_company_rollups
+from app.services.reaper import reap_deleting_tasks
+
+def _seed_task(db, prices_by_company):
+    task = Task(name="analytics-test", parameters={}, status=TaskStatus.COMPLETED)
+    db.add(task)
+    db.flush()
+    for company, prices in prices_by_company.items():
+        for i, price in enumerate(prices):
+            db.add(Record(
+                task_id=task.id,
+                source="A",
+                company=company,
+                model="ModelX",
+                sale_date=datetime.datetime(2022, 1 + i % 12, 15),
+                price=price
+            ))
+    db.flush()
+    return task
+
+def test_company_analytics_matches_python_reference(test_db):
+    prices = {"Toyota": [100.0, 200.0, 300.0], "Honda": [50.5, 49.5]}
+    task = _seed_task(test_db, prices)
+
+    result = {row["company"]: row for row in task_service.get_company_analytics(task.id, test_db)}
+
+    assert set(result) == set(prices)
+    for company, company_prices in prices.items():
+        assert set(result[company]) == {"company", "total_sales", "total_revenue", "average_price"}
+        assert result[company]["total_sales"] == len(company_prices)
+        assert result[company]["total_revenue"] == pytest.approx(sum(company_prices))
+        assert result[company]["average_price"] == pytest.approx(sum(company_prices) / len(company_prices))
+
+def test_company_price_stats_include_spread(test_db):
+    task = _seed_task(test_db, {"Ford": [10.0, 20.0, 30.0, 40.0]})
+
+    stats = list(iter_company_price_stats(task.id, test_db))
+
+    assert len(stats) == 1
+    assert stats[0]["min_price"] == 10.0
+    assert stats[0]["max_price"] == 40.0
+    assert stats[0]["price_stddev"] == pytest.approx(11.180339887)
+
+def test_company_analytics_empty_task(test_db):
+    assert task_service.get_company_analytics(987654, test_db) == []
+
+def test_rollups_match_live_analytics(test_db):
+    task = _seed_task(test_db, {"Toyota": [100.0, 200.0, 300.0], "BMW": [70.0] * 14})
+    live_companies = task_service.get_company_analytics(task.id, test_db)
+    live_timeline = task_service.get_timeline_analytics(task.id, test_db)
+
+    build_rollups(task.id, test_db)
+
+    assert task_service.get_company_analytics(task.id, test_db) == live_companies
+    assert sorted(task_service.get_timeline_analytics(task.id, test_db), key=lambda x: (x["date"], x["company"])) == \
+        sorted(live_timeline, key=lambda x: (x["date"], x["company"]))
+    assert test_db.query(CompanyModelMonthRollup).filter_by(task_id=task.id).count() == 15
+
+def test_backfill_and_delete_rollups(test_db):
+    task = _seed_task(test_db, {"Honda": [10.0, 30.0]})
+
+    assert backfill_rollups(test_db) >= 1
+    stats = get_company_rollups(task.id, test_db)
+    assert stats[0]["min_price"] == 10.0 and stats[0]["price_stddev"] == pytest.approx(10.0)
+
+    task_id = task.id
+    assert task_service.delete_task(task_id, test_db)
+    assert reap_deleting_tasks(test_db) == 1
+    assert test_db.query(CompanyRollup).filter_by(task_id=task_id).count() == 0
@@ -0,0 +1,171 @@
+import asyncio
+import datetime
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, Record, TaskStatus
+from app.services import task_service
+from app.services.analytics_cache import AnalyticsCache, analytics_cache
+
+def _create_task(db, status=TaskStatus.COMPLETED):
+    task = Task(name="analytics-cache", parameters={}, status=status)
+    db.add(task)
+    db.flush()
+    db.add(Record(task_id=task.id, source="A", company="Toyota", model="Camry", sale_date=datetime.datetime(2022, 1, 15), price=100.0))
+    db.flush()
+    return task
+
+def test_lru_eviction_under_byte_budget():
+    cache = AnalyticsCache(max_bytes=70)
+    value = [{"company": "Toyota", "total": 1}]  # 32 bytes of JSON
+
+    cache.get_or_compute(("companies", 1), lambda: value)
+    cache.get_or_compute(("companies", 2), lambda: value)
+    cache.get_or_compute(("companies", 1), lambda: None)
+    cache.get_or_compute(("companies", 3), lambda: value)
+    cache.get_or_compute(("companies", 4), lambda: [{"company": "x" * 100}])
+
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert stats["misses"] == 4 and stats["hits"] == 1 and stats["bytes"] == 64
+    # Task 2 was least recently used; oversized results are never stored
+    assert cache.get_or_compute(("companies", 2), lambda: "recomputed") == "recomputed"
+
+def test_invalidate_task_drops_only_that_task():
+    cache = AnalyticsCache(max_bytes=1024)
+    cache.get_or_compute(("companies", 1), lambda: [1])
+    cache.get_or_compute(("timeline", 1, "range"), lambda: [2])
+    cache.get_or_compute(("companies", 2), lambda: [3])
+
+    assert cache.invalidate_task(1) == 2
+    assert cache.stats()["entries"] == 1
+
+def test_concurrent_thread_misses_are_coalesced():
+    cache = AnalyticsCache(max_bytes=1024)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return [42]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(("companies", 1), compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [[42]] * 8
+    assert cache.stats()["coalesced"] == 7
+
+@pytest.mark.asyncio
+async def test_concurrent_async_misses_are_coalesced():
+    cache = AnalyticsCache(max_bytes=1024)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [42]
+
+    results = await asyncio.gather(*[cache.get_or_compute_async(("timeline", 1), compute) for _ in range(5)])
+
+    assert len(calls) == 1
+    assert results == [[42]] * 5
+
+@pytest.mark.asyncio
+async def test_followers_take_over_a_cancelled_computation():
+    cache = AnalyticsCache(max_bytes=1024)
+    started = asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        started.set()
+        await asyncio.sleep(0 if len(calls) > 1 else 10)
+        return [42]
+
+    leader = asyncio.create_task(cache.get_or_compute_async(("timeline", 1), compute))
+    await started.wait()
+    follower = asyncio.create_task(cache.get_or_compute_async(("timeline", 1), compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await asyncio.wait_for(follower, 1) == [42]
+    assert len(calls) == 2
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_leaves_the_shared_computation_alone():
+    cache = AnalyticsCache(max_bytes=1024)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [42]
+
+    leader = asyncio.create_task(cache.get_or_compute_async(("timeline", 1), compute))
+    await asyncio.sleep(0.01)
+    cancelled = asyncio.create_task(cache.get_or_compute_async(("timeline", 1), compute))
+    waiting = asyncio.create_task(cache.get_or_compute_async(("timeline", 1), compute))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+
+    assert await asyncio.wait_for(asyncio.gather(leader, waiting), 1) == [[42], [42]]
+    assert cancelled.cancelled()
+    assert len(calls) == 1
+
+def test_errors_are_not_cached():
+    cache = AnalyticsCache(max_bytes=1024)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute(("companies", 1), fail)
+
+    assert cache.get_or_compute(("companies", 1), lambda: [1]) == [1]
+
+def test_completed_task_analytics_are_served_from_cache(test_db):
+    task = _create_task(test_db)
+    first = task_service.get_company_analytics(task.id, test_db)
+
+    with patch("app.services.task_service.iter_company_price_stats") as aggregate:
+        second = task_service.get_company_analytics(task.id, test_db)
+
+    aggregate.assert_not_called()
+    assert second == first
+    assert analytics_cache.stats()["hits"] == 1
+
+def test_running_task_analytics_are_not_cached(test_db):
+    task = _create_task(test_db, status=TaskStatus.IN_PROGRESS)
+
+    task_service.get_timeline_analytics(task.id, test_db)
+
+    assert analytics_cache.stats()["entries"] == 0
+
+def test_status_change_and_delete_invalidate(test_db):
+    task = _create_task(test_db)
+    task_service.get_company_analytics(task.id, test_db)
+    task_service.get_timeline_analytics(task.id, test_db)
+    assert analytics_cache.stats()["entries"] == 2
+
+    task.status = TaskStatus.FAILED
+    test_db.flush()
+    assert analytics_cache.stats()["entries"] == 0
+
+    task.status = TaskStatus.COMPLETED
+    test_db.flush()
+    task_service.get_company_analytics(task.id, test_db)
+    assert task_service.delete_task(task.id, test_db)
+    assert analytics_cache.stats()["entries"] == 0
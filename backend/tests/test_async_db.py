@@ -0,0 +1,88 @@
+import sys
+import os
+import pytest
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import Base, create_sqlite_engine, create_async_sqlite_engine, get_async_db, get_async_read_db
+from app.main import app
+from app.models.models import Record, TaskStatus
+from app.schemas.schemas import TaskCreate, TaskParameters
+from app.services import task_service
+
+@pytest.mark.asyncio
+async def test_async_services_on_aiosqlite(tmp_path):
+    path = tmp_path / "async.db"
+    sync_engine = create_sqlite_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}")
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with Session() as db:
+        assert (await db.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        task = await task_service.create_task_async(
+            TaskCreate(name="async-task", parameters=TaskParameters(companies_a=["Toyota"])), db
+        )
+        db.add(Record(task_id=task.id, source="A", company="Toyota", model="Camry", sale_date=None, price=10.0))
+        await db.commit()
+
+    async with Session() as db:
+        tasks = await task_service.get_tasks_async(0, 10, db)
+        assert tasks["total"] == 1 and tasks["items"][0].name == "async-task"
+        fetched = await task_service.get_task_by_id_async(task.id, db)
+        assert fetched.status == TaskStatus.PENDING
+        analytics = await task_service.get_company_analytics_async(task.id, db)
+        assert analytics == [{"company": "Toyota", "total_sales": 1, "total_revenue": 10.0, "average_price": 10.0}]
+        assert await task_service.delete_task_async(task.id, db)
+        assert await task_service.get_task_by_id_async(task.id, db) is None
+
+    await engine.dispose()
+    sync_engine.dispose()
+
+@pytest.mark.asyncio
+async def test_async_endpoints_on_aiosqlite(tmp_path):
+    # The client fixture swaps AsyncSession for the sync test session; this drives the real one
+    path = tmp_path / "async-api.db"
+    sync_engine = create_sqlite_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}")
+    read_engine = create_async_sqlite_engine(f"sqlite+aiosqlite:///{path}", read_only=True)
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    ReadSession = async_sessionmaker(read_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with Session() as db:
+            yield db
+
+    async def override_get_async_read_db():
+        async with ReadSession() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_read_db
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            created = await client.post("/api/tasks/", json={"name": "async-api-task", "parameters": {"companies_a": ["Toyota"]}})
+            assert created.status_code == 200
+            task_id = created.json()["id"]
+
+            listed = await client.get("/api/tasks/")
+            assert listed.status_code == 200
+            assert [task["id"] for task in listed.json()["items"]] == [task_id]
+
+            fetched = await client.get(f"/api/tasks/{task_id}")
+            assert fetched.json()["status"] == TaskStatus.PENDING
+            not_modified = await client.get(f"/api/tasks/{task_id}", headers={"If-None-Match": fetched.headers["ETag"]})
+            assert not_modified.status_code == 304
+
+            assert (await client.get(f"/api/tasks/{task_id}/analytics/companies")).json() == []
+            assert (await client.delete(f"/api/tasks/{task_id}")).status_code == 204
+            assert (await client.get(f"/api/tasks/{task_id}")).status_code == 404
+    finally:
+        app.dependency_overrides = {}
+        await read_engine.dispose()
+        await engine.dispose()
+        sync_engine.dispose()
@@ -8,16 +8,49 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Now import app modules after modifying sys.path
-from app.services.job_queue import fetch_source_a_data_async, fetch_source_b_data_async
+from app.services.job_queue import (
+    fetch_source_a_data_async, fetch_source_b_data_async, fetch_source_a_frame_async, source_cache
+)
+
+SOURCE_A_BODY = '''[
+    {"company": "CompanyA", "model": "ModelX", "sale_date": "2022-01-15", "price": "100.50"},
+    {"company": "CompanyB", "model": "ModelY", "sale_date": "2021-02-20", "price": "200.75"}
+]'''
+
+@pytest.fixture(autouse=True)
+def clear_source_cache():
+    source_cache.clear()
+    yield
+    source_cache.clear()
+
+def _mock_client_session(status=200, body=SOURCE_A_BODY, headers=None, delay=0):
+    async def read():
+        await asyncio.sleep(delay)
+        return body.encode("utf-8")
+    
+    mock_response = MagicMock()
+    mock_response.status = status
+    mock_response.headers = headers or {}
+    mock_response.read = read
+    mock_response.get_encoding.return_value = "utf-8"
+    mock_response.raise_for_status = MagicMock()
+    
+    mock_session = MagicMock()
+    mock_session.get.return_value.__aenter__.return_value = mock_response
+    
+    client_session = MagicMock()
+    client_session.return_value.__aenter__.return_value = mock_session
+    return client_session, mock_session
 
 @pytest.mark.asyncio
 async def test_fetch_source_a_data():
     mock_response = MagicMock()
-    mock_response.text.return_value = asyncio.Future()
-    mock_response.text.return_value.set_result('''[
+    mock_response.read.return_value = asyncio.Future()
+    mock_response.read.return_value.set_result(b'''[
         {"company": "CompanyA", "model": "ModelX", "sale_date": "2022-01-15", "price": "100.50"},
         {"company": "CompanyB", "model": "ModelY", "sale_date": "2022-02-20", "price": "200.75"}
     ]''')
+    mock_response.get_encoding.return_value = "utf-8"
     mock_response.raise_for_status = MagicMock()
     
     mock_session = MagicMock()
@@ -36,10 +69,11 @@ async def test_fetch_source_a_data():
 @pytest.mark.asyncio
 async def test_fetch_source_b_data():
     mock_response = MagicMock()
-    mock_response.text.return_value = asyncio.Future()
-    mock_response.text.return_value.set_result('''company,model,sale_date,price
+    mock_response.read.return_value = asyncio.Future()
+    mock_response.read.return_value.set_result(b'''company,model,sale_date,price
 CompanyA,ModelX,2022-01-15,100.50
 CompanyB,ModelY,2022-02-20,200.75''')
+    mock_response.get_encoding.return_value = "utf-8"
     mock_response.raise_for_status = MagicMock()
     
     mock_session = MagicMock()
@@ -53,4 +87,87 @@ CompanyB,ModelY,2022-02-20,200.75''')
         
         assert len(result) == 1
         assert result[0]["company"] == "CompanyB"
-        assert result[0]["model"] == "ModelY"
\ No newline at end of file
+        assert result[0]["model"] == "ModelY"
+
+@pytest.mark.asyncio
+async def test_source_cache_serves_repeat_tasks_without_downloading():
+    client_session, mock_session = _mock_client_session()
+    
+    with patch('aiohttp.ClientSession', client_session):
+        first = await fetch_source_a_data_async({"start_year_a": 2022})
+        second = await fetch_source_a_data_async({"companies_a": ["CompanyB"]})
+    
+    assert mock_session.get.call_count == 1
+    assert [r["company"] for r in first] == ["CompanyA"]
+    assert [r["company"] for r in second] == ["CompanyB"]
+    assert source_cache.stats()["hits"] >= 1
+
+@pytest.mark.asyncio
+async def test_source_cache_revalidates_stale_entries():
+    client_session, _ = _mock_client_session(headers={"ETag": '"v1"'})
+    with patch('aiohttp.ClientSession', client_session):
+        await fetch_source_a_data_async({})
+    
+    not_modified, mock_session = _mock_client_session(status=304, body="")
+    with patch.object(source_cache, 'ttl_seconds', 0), patch('aiohttp.ClientSession', not_modified):
+        result = await fetch_source_a_data_async({})
+    
+    assert len(result) == 2
+    assert mock_session.get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert source_cache.stats()["revalidations"] == 1
+
+@pytest.mark.asyncio
+async def test_source_cache_coalesces_concurrent_downloads():
+    client_session, mock_session = _mock_client_session(delay=0.05)
+    
+    with patch('aiohttp.ClientSession', client_session):
+        results = await asyncio.gather(*[fetch_source_a_data_async({}) for _ in range(5)])
+    
+    assert mock_session.get.call_count == 1
+    assert all(len(result) == 2 for result in results)
+
+@pytest.mark.asyncio
+async def test_only_the_downloading_fetch_is_credited_with_the_body():
+    body = SOURCE_A_BODY.replace("CompanyB", "Citroën")
+    client_session, _ = _mock_client_session(body=body, delay=0.05)
+    
+    with patch('aiohttp.ClientSession', client_session):
+        results = await asyncio.gather(*[fetch_source_a_frame_async({}) for _ in range(3)])
+    
+    # Bytes on the wire, not characters
+    assert [result.payload_bytes for result in results] == [len(body.encode("utf-8"))] * 3
+    assert sorted(result.bytes_downloaded for result in results) == [0, 0, len(body.encode("utf-8"))]
+
+@pytest.mark.asyncio
+async def test_source_cache_waiters_take_over_a_cancelled_download():
+    client_session, mock_session = _mock_client_session(delay=0.05)
+    
+    with patch('aiohttp.ClientSession', client_session):
+        leader = asyncio.create_task(fetch_source_a_data_async({}))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(fetch_source_a_data_async({}))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await asyncio.wait_for(follower, timeout=5)
+    
+    assert leader.cancelled()
+    assert len(result) == 2
+    assert mock_session.get.call_count == 2
+    assert source_cache.stats()["coalesced"] == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_shared_download_alone():
+    client_session, mock_session = _mock_client_session(delay=0.05)
+    
+    with patch('aiohttp.ClientSession', client_session):
+        leader = asyncio.create_task(fetch_source_a_data_async({}))
+        await asyncio.sleep(0.01)
+        cancelled = asyncio.create_task(fetch_source_a_data_async({}))
+        waiting = asyncio.create_task(fetch_source_a_data_async({}))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        results = await asyncio.wait_for(asyncio.gather(leader, waiting), timeout=5)
+    
+    assert cancelled.cancelled()
+    assert [len(result) for result in results] == [2, 2]
+    assert mock_session.get.call_count == 1
@@ -0,0 +1,29 @@
+import sys
+import os
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import create_sqlite_engine, SQLITE_BUSY_TIMEOUT_MS
+
+def test_writer_and_reader_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pragmas.db'}"
+    writer = create_sqlite_engine(url)
+    reader = create_sqlite_engine(url, read_only=True)
+
+    with writer.begin() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_BUSY_TIMEOUT_MS
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO items VALUES (1)"))
+
+    with reader.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM items")).scalar() == 1
+        with pytest.raises(OperationalError):
+            connection.execute(text("INSERT INTO items VALUES (2)"))
+
+    writer.dispose()
+    reader.dispose()
@@ -0,0 +1,248 @@
+import pytest
+import asyncio
+import datetime
+from unittest.mock import patch, AsyncMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, Record, TaskStatus, CompanyRollup, Dataset, DatasetLink, DatasetStatus
+from app.services import task_service, dedup
+from app.services.dedup import dataset_key, claim_dataset
+from app.services.job_queue import process_task_async, _mark_failed
+from app.services.normalization import normalize_records
+from app.services.reaper import reap_deleting_tasks, reap_task
+from app.services.rollups import backfill_rollups
+
+PARAMS = {"start_year_a": "2020", "end_year_a": None, "start_year_b": None, "end_year_b": None,
+          "companies_a": ["Toyota", "Honda"], "companies_b": []}
+SOURCE_A = [
+    {"company": "Toyota", "model": "Camry", "sale_date": "2022-01-15", "price": "100.50"},
+    {"company": "Honda", "model": "Civic", "sale_date": "2022-02-20", "price": "200.75"},
+]
+SOURCE_B = [
+    {"company": "Ford", "model": "F150", "sale_date": "2021-03-01", "price": 300.0},
+]
+
+def _create_task(db, name, params=PARAMS):
+    task = Task(name=name, parameters=params, status=TaskStatus.PENDING)
+    db.add(task)
+    db.flush()
+    return task
+
+async def _process(task, db, version_a="a-v1", version_b="b-v1"):
+    source_a = normalize_records("A", SOURCE_A).with_version(version_a)
+    source_b = normalize_records("B", SOURCE_B).with_version(version_b)
+    with patch('app.services.job_queue.asyncio.sleep', new=AsyncMock()), \
+         patch('app.services.job_queue.fetch_source_a_frame_async', new=AsyncMock(return_value=source_a)), \
+         patch('app.services.job_queue.fetch_source_b_frame_async', new=AsyncMock(return_value=source_b)):
+        await process_task_async(task.id, db)
+
+def test_dataset_key_ignores_parameter_spelling():
+    versions = {"A": "a-v1", "B": "b-v1"}
+    respelled = {**PARAMS, "start_year_a": 2020, "end_year_b": "", "companies_a": ["Honda", "Toyota", "Honda"],
+                 "error_message": "from a previous run"}
+
+    assert dataset_key(PARAMS, versions) == dataset_key(respelled, versions)
+    assert dataset_key(PARAMS, versions) != dataset_key(PARAMS, {"A": "a-v2", "B": "b-v1"})
+    assert dataset_key(PARAMS, versions) != dataset_key({**PARAMS, "end_year_a": "2023"}, versions)
+
+def test_claim_dataset_elects_one_builder(test_db):
+    first = _create_task(test_db, "dedup-claim-1")
+    second = _create_task(test_db, "dedup-claim-2")
+    versions = {"A": "a-v1", "B": "b-v1"}
+
+    dataset, is_builder = claim_dataset(first.id, PARAMS, versions, test_db)
+    again, second_is_builder = claim_dataset(second.id, PARAMS, versions, test_db)
+
+    assert is_builder and not second_is_builder
+    assert again.id == dataset.id
+    assert again.status == DatasetStatus.BUILDING
+    assert again.data_task_id == first.id
+
+@pytest.mark.asyncio
+async def test_identical_task_reuses_stored_rows(test_db):
+    owner = _create_task(test_db, "dedup-owner")
+    reuser = _create_task(test_db, "dedup-reuser")
+
+    await _process(owner, test_db)
+    await _process(reuser, test_db)
+
+    assert owner.status == TaskStatus.COMPLETED and reuser.status == TaskStatus.COMPLETED
+    assert test_db.query(Record).filter(Record.task_id == owner.id).count() == 3
+    assert test_db.query(Record).filter(Record.task_id == reuser.id).count() == 0
+    dataset = test_db.query(Dataset).filter(Dataset.data_task_id == owner.id).one()
+    assert dataset.status == DatasetStatus.READY
+    assert dataset.ref_count == 2
+
+    records = task_service.get_task_records(reuser.id, db=test_db)
+    assert [r.task_id for r in records] == [reuser.id] * 3
+    assert [r.id for r in records] == [r.id for r in task_service.get_task_records(owner.id, db=test_db)]
+    assert task_service.get_company_analytics(reuser.id, test_db) == task_service.get_company_analytics(owner.id, test_db)
+    assert [row[1] for row in task_service.iter_task_record_rows(reuser.id, db=test_db)] == [reuser.id] * 3
+
+@pytest.mark.asyncio
+async def test_changed_source_version_builds_a_new_dataset(test_db):
+    first = _create_task(test_db, "dedup-version-1")
+    second = _create_task(test_db, "dedup-version-2")
+
+    await _process(first, test_db)
+    await _process(second, test_db, version_a="a-v2")
+
+    assert test_db.query(Record).filter(Record.task_id == second.id).count() == 3
+
+@pytest.mark.asyncio
+async def test_deleting_owner_hands_rows_to_remaining_task(test_db):
+    owner = _create_task(test_db, "dedup-delete-owner")
+    reuser = _create_task(test_db, "dedup-delete-reuser")
+    await _process(owner, test_db)
+    await _process(reuser, test_db)
+    owner_id, reuser_id = owner.id, reuser.id
+
+    assert task_service.delete_task(owner_id, test_db)
+    assert reap_deleting_tasks(test_db) == 1
+
+    assert test_db.query(Record).filter(Record.task_id == reuser_id).count() == 3
+    assert test_db.query(CompanyRollup).filter(CompanyRollup.task_id == reuser_id).count() == 3
+    assert len(task_service.get_task_records(reuser_id, db=test_db)) == 3
+
+    assert task_service.delete_task(reuser_id, test_db)
+    assert reap_deleting_tasks(test_db) == 1
+
+    assert test_db.query(Record).filter(Record.task_id.in_([owner_id, reuser_id])).count() == 0
+    assert test_db.query(Dataset).count() == 0
+    assert test_db.query(DatasetLink).count() == 0
+
+def test_failed_build_releases_the_claim(test_db):
+    failed = _create_task(test_db, "dedup-failed")
+    waiting = _create_task(test_db, "dedup-waiting")
+    versions = {"A": "a-v1", "B": "b-v1"}
+    dataset, _ = claim_dataset(failed.id, PARAMS, versions, test_db)
+
+    _mark_failed(failed, "disk full", test_db, dataset.id)
+
+    assert failed.status == TaskStatus.FAILED
+    assert test_db.query(Dataset).count() == 0
+    retried, is_builder = claim_dataset(waiting.id, PARAMS, versions, test_db)
+    assert is_builder and retried.data_task_id == waiting.id
+
+def test_builder_reclaims_its_own_claim(test_db):
+    builder = _create_task(test_db, "dedup-redelivered")
+    versions = {"A": "a-v1", "B": "b-v1"}
+    dataset, _ = claim_dataset(builder.id, PARAMS, versions, test_db)
+
+    again, is_builder = claim_dataset(builder.id, PARAMS, versions, test_db)
+
+    assert is_builder and again.id == dataset.id
+
+def test_stale_claim_is_taken_over(test_db):
+    builder = _create_task(test_db, "dedup-stalled")
+    builder.status = TaskStatus.IN_PROGRESS
+    waiting = _create_task(test_db, "dedup-takeover")
+    versions = {"A": "a-v1", "B": "b-v1"}
+    dataset, _ = claim_dataset(builder.id, PARAMS, versions, test_db)
+
+    _, is_builder = claim_dataset(waiting.id, PARAMS, versions, test_db)
+    assert not is_builder
+
+    dataset.claimed_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=dedup.DATASET_CLAIM_TIMEOUT_SECONDS + 1)
+    test_db.commit()
+    taken, is_builder = claim_dataset(waiting.id, PARAMS, versions, test_db)
+    assert is_builder and taken.data_task_id == waiting.id
+
+    # The stalled builder can neither publish nor drop the claim it lost
+    assert not dedup.mark_dataset_ready(dataset.id, builder.id, test_db)
+    dedup.abandon_dataset(dataset.id, builder.id, test_db)
+    assert test_db.get(Dataset, dataset.id).data_task_id == waiting.id
+
+def test_claim_of_a_failed_builder_is_taken_over(test_db):
+    builder = _create_task(test_db, "dedup-dead")
+    waiting = _create_task(test_db, "dedup-successor")
+    versions = {"A": "a-v1", "B": "b-v1"}
+    claim_dataset(builder.id, PARAMS, versions, test_db)
+
+    builder.status = TaskStatus.FAILED
+    test_db.commit()
+    taken, is_builder = claim_dataset(waiting.id, PARAMS, versions, test_db)
+
+    assert is_builder and taken.data_task_id == waiting.id
+
+@pytest.mark.asyncio
+async def test_cancelled_build_releases_the_claim(test_db):
+    task = _create_task(test_db, "dedup-cancelled")
+    test_db.commit()
+
+    with patch('app.services.job_queue.write_records', side_effect=asyncio.CancelledError()):
+        with pytest.raises(asyncio.CancelledError):
+            await _process(task, test_db)
+
+    assert test_db.query(Dataset).count() == 0
+
+def test_dataset_of_a_deleting_owner_is_not_reused(test_db):
+    owner = _create_task(test_db, "dedup-deleting-owner")
+    waiting = _create_task(test_db, "dedup-late-reuser")
+    versions = {"A": "a-v1", "B": "b-v1"}
+    dataset, _ = claim_dataset(owner.id, PARAMS, versions, test_db)
+    dataset.status = DatasetStatus.READY
+    owner.status = TaskStatus.DELETING
+    test_db.commit()
+
+    assert claim_dataset(waiting.id, PARAMS, versions, test_db) == (None, True)
+
+@pytest.mark.asyncio
+async def test_reuser_stores_its_own_rows_when_the_dataset_is_reaped_meanwhile(test_db):
+    owner = _create_task(test_db, "dedup-reaped-owner")
+    reuser = _create_task(test_db, "dedup-reaped-reuser")
+    test_db.commit()
+    await _process(owner, test_db)
+    dataset_id = test_db.query(DatasetLink.dataset_id).filter(DatasetLink.task_id == owner.id).scalar()
+
+    # The reuser found the dataset just before the reaper released it
+    assert task_service.delete_task(owner.id, test_db)
+    assert reap_deleting_tasks(test_db) == 1
+    with patch('app.services.job_queue._acquire_dataset', new=AsyncMock(return_value=(dataset_id, False))):
+        await _process(reuser, test_db)
+
+    assert reuser.status == TaskStatus.COMPLETED
+    assert test_db.get(DatasetLink, reuser.id) is None
+    assert test_db.query(Record).filter(Record.task_id == reuser.id).count() == 3
+    assert len(task_service.get_task_records(reuser.id, db=test_db)) == 3
+
+@pytest.mark.asyncio
+async def test_shared_rows_move_to_the_new_owner_in_chunks(test_db):
+    owner = _create_task(test_db, "dedup-chunked-owner")
+    reuser = _create_task(test_db, "dedup-chunked-reuser")
+    test_db.commit()
+    await _process(owner, test_db)
+    await _process(reuser, test_db)
+    owner_id, reuser_id = owner.id, reuser.id
+    progress = []
+
+    assert task_service.delete_task(owner_id, test_db)
+    assert reap_task(owner_id, test_db, chunk_rows=2, on_chunk=lambda handled: progress.append(handled) or False) is None
+
+    # Stopped after the first chunk: ownership has moved, one record is still to follow
+    assert progress == [2]
+    assert test_db.query(Record).filter(Record.task_id == reuser_id).count() == 2
+    assert test_db.query(Record).filter(Record.task_id == owner_id).count() == 1
+    assert test_db.get(DatasetLink, owner_id) is not None
+
+    assert reap_deleting_tasks(test_db, chunk_rows=2) == 1
+    assert test_db.query(Record).filter(Record.task_id == reuser_id).count() == 3
+    assert test_db.query(DatasetLink).count() == 1
+    assert test_db.query(Dataset).one().ref_count == 1
+    assert len(task_service.get_task_records(reuser_id, db=test_db)) == 3
+
+@pytest.mark.asyncio
+async def test_backfill_skips_tasks_reusing_a_dataset(test_db):
+    owner = _create_task(test_db, "dedup-backfill-owner")
+    reuser = _create_task(test_db, "dedup-backfill-reuser")
+    test_db.commit()
+    await _process(owner, test_db)
+    await _process(reuser, test_db)
+
+    assert backfill_rollups(test_db, task_id=reuser.id) == 0
+    backfill_rollups(test_db)
+    assert backfill_rollups(test_db) == 0
+    assert test_db.query(CompanyRollup).filter(CompanyRollup.task_id == reuser.id).count() == 0
@@ -0,0 +1,92 @@
+import datetime
+import sys
+import os
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, Record, TaskStatus, PriceSketch
+from app.services import task_service
+from app.services.quantile_sketch import QuantileSketch
+from app.services.rollups import build_rollups
+
+QUARTILES = [0.01, 0.25, 0.5, 0.75, 0.99]
+
+def _seed_task(db, prices_by_group):
+    task = Task(name="distribution-test", parameters={}, status=TaskStatus.COMPLETED)
+    db.add(task)
+    db.flush()
+    for (company, model), prices in prices_by_group.items():
+        for price in prices:
+            db.add(Record(task_id=task.id, source="A", company=company, model=model, sale_date=datetime.datetime(2022, 3, 1), price=price))
+    db.flush()
+    return task
+
+def test_small_groups_are_exact():
+    values = [12.0, 3.0, 7.0, 7.0, 100.0, 9.0]
+    sketch = QuantileSketch.from_values(values)
+
+    assert sketch.exact
+    np.testing.assert_allclose(sketch.quantiles(QUARTILES), np.quantile(values, QUARTILES))
+
+    summary = sketch.summary(bins=4)
+    assert summary["outliers"] == [100.0] and summary["outlier_count"] == 1
+    assert (summary["whisker_low"], summary["whisker_high"]) == (3.0, 12.0)
+    assert sum(bin["count"] for bin in summary["histogram"]) == len(values)
+
+def test_large_groups_are_sketched_within_tolerance():
+    values = np.random.default_rng(3).lognormal(10, 0.5, 100000)
+    sketch = QuantileSketch.from_values(values)
+
+    assert not sketch.exact and len(sketch.means) <= 101
+    np.testing.assert_allclose(sketch.quantiles(QUARTILES), np.quantile(values, QUARTILES), rtol=0.01)
+    assert sum(bin["count"] for bin in sketch.summary()["histogram"]) == len(values)
+
+def test_merged_sketches_match_one_sketch_of_all_values():
+    chunks = np.array_split(np.random.default_rng(5).normal(30000, 5000, 60000), 30)
+    merged = QuantileSketch.from_values(chunks[0])
+    for chunk in chunks[1:]:
+        merged = merged.merge(QuantileSketch.from_values(chunk))
+
+    assert merged.count == 60000
+    np.testing.assert_allclose(merged.quantiles(QUARTILES), np.quantile(np.concatenate(chunks), QUARTILES), rtol=0.01)
+    restored = QuantileSketch.from_bytes(merged.to_bytes())
+    np.testing.assert_array_equal(restored.quantiles(QUARTILES), merged.quantiles(QUARTILES))
+
+def test_build_rollups_stores_a_sketch_per_company_and_model(test_db):
+    task = _seed_task(test_db, {("Toyota", "Camry"): [100.0, 200.0], ("Toyota", "Corolla"): [50.0], ("BMW", "X5"): [900.0]})
+
+    counts = build_rollups(task.id, test_db)
+
+    assert counts["price_sketches"] == 3
+    stored = test_db.query(PriceSketch).filter(PriceSketch.task_id == task.id).order_by(PriceSketch.company, PriceSketch.model).all()
+    assert [(row.company, row.model, row.count) for row in stored] == [("BMW", "X5", 1), ("Toyota", "Camry", 2), ("Toyota", "Corolla", 1)]
+
+def test_distribution_endpoint_merges_models_into_companies(client, test_db):
+    prices = {("Toyota", "Camry"): [100.0, 200.0, 300.0], ("Toyota", "Corolla"): [150.0, 5000.0], ("BMW", "X5"): [900.0]}
+    task = _seed_task(test_db, prices)
+    build_rollups(task.id, test_db)
+
+    response = client.get(f"/api/tasks/{task.id}/analytics/distribution?bins=5")
+    assert response.status_code == 200
+    by_company = {row["company"]: row for row in response.json()}
+
+    toyota = [100.0, 200.0, 300.0, 150.0, 5000.0]
+    assert by_company["Toyota"]["count"] == 5 and by_company["Toyota"]["exact"]
+    assert by_company["Toyota"]["median"] == pytest.approx(np.median(toyota))
+    assert by_company["Toyota"]["outliers"] == [5000.0]
+    assert len(by_company["Toyota"]["histogram"]) == 5
+    assert by_company["BMW"]["q1"] == by_company["BMW"]["q3"] == 900.0
+
+    by_model = client.get(f"/api/tasks/{task.id}/analytics/distribution?group_by=model").json()
+    assert [(row["company"], row["model"], row["count"]) for row in by_model] == [
+        ("BMW", "X5", 1), ("Toyota", "Camry", 3), ("Toyota", "Corolla", 2)
+    ]
+
+def test_distribution_without_stored_sketches_reads_records(test_db):
+    task = _seed_task(test_db, {("Ford", "F150"): [10.0, 20.0, 30.0, 40.0]})
+
+    result = task_service.get_price_distribution(task.id, test_db)
+
+    assert [(row["company"], row["q1"], row["median"], row["q3"]) for row in result] == [("Ford", 17.5, 25.0, 32.5)]
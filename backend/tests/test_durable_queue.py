@@ -0,0 +1,127 @@
+import datetime
+import sys
+import os
+from unittest.mock import patch
+from sqlalchemy import false
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, TaskStatus, Job, JobStatus
+from app.schemas.schemas import TaskCreate, TaskParameters
+from app.services import task_service
+from app.services import durable_queue
+from app.services.durable_queue import (
+    enqueue_job,
+    claim_job,
+    heartbeat_job,
+    finish_job,
+    requeue_expired_jobs,
+    enqueue_orphaned_tasks
+)
+
+def _create_task(db, name="durable-test", status=TaskStatus.PENDING):
+    task = Task(name=name, parameters={}, status=status)
+    db.add(task)
+    db.flush()
+    return task
+
+def _expire_lease(db, job_id):
+    db.query(Job).filter(Job.id == job_id).update({Job.lease_expires_at: datetime.datetime.utcnow() - datetime.timedelta(seconds=1)})
+    db.flush()
+
+def test_create_task_writes_job_row(test_db):
+    task = task_service.create_task(TaskCreate(name="durable-create", parameters=TaskParameters()), test_db)
+
+    jobs = test_db.query(Job).filter(Job.task_id == task.id).all()
+    assert len(jobs) == 1
+    assert jobs[0].status == JobStatus.QUEUED
+
+def test_job_is_leased_once(test_db):
+    task = _create_task(test_db)
+    enqueue_job(task.id, test_db)
+
+    first = claim_job(test_db, "worker-1")
+    second = claim_job(test_db, "worker-2")
+
+    assert first is not None and first.task_id == task.id
+    assert first.lease_owner == "worker-1" and first.attempts == 1
+    assert second is None
+
+def test_heartbeat_and_finish_require_the_lease(test_db):
+    task = _create_task(test_db)
+    job_id = enqueue_job(task.id, test_db).id
+    claim_job(test_db, "worker-1")
+
+    assert heartbeat_job(job_id, "worker-1", test_db)
+    assert not heartbeat_job(job_id, "worker-2", test_db)
+    assert not finish_job(job_id, "worker-2", test_db)
+    assert finish_job(job_id, "worker-1", test_db)
+    assert test_db.get(Job, job_id).status == JobStatus.DONE
+
+def test_expired_lease_is_requeued_and_reclaimed(test_db):
+    task = _create_task(test_db)
+    job_id = enqueue_job(task.id, test_db).id
+    claim_job(test_db, "crashed-worker")
+    _expire_lease(test_db, job_id)
+
+    assert requeue_expired_jobs(test_db) == 1
+    reclaimed = claim_job(test_db, "worker-2")
+
+    assert reclaimed.id == job_id
+    assert reclaimed.attempts == 2
+    assert not heartbeat_job(job_id, "crashed-worker", test_db)
+
+def test_requeue_leaves_a_lease_renewed_after_it_was_read(test_db):
+    task = _create_task(test_db)
+    job_id = enqueue_job(task.id, test_db).id
+    claim_job(test_db, "slow-worker")
+    _expire_lease(test_db, job_id)
+    read_expired = durable_queue._expired_leases
+
+    def renewed_meanwhile(now, db):
+        expired = read_expired(now, db)
+        # The owner's heartbeat lands between the read and the update
+        assert heartbeat_job(job_id, "slow-worker", db)
+        return expired
+
+    with patch("app.services.durable_queue._expired_leases", side_effect=renewed_meanwhile):
+        assert requeue_expired_jobs(test_db) == 0
+
+    job = test_db.get(Job, job_id)
+    test_db.refresh(job)
+    assert job.status == JobStatus.LEASED and job.lease_owner == "slow-worker"
+    assert claim_job(test_db, "worker-2") is None
+
+def test_job_fails_after_max_attempts(test_db):
+    task = _create_task(test_db)
+    job_id = enqueue_job(task.id, test_db).id
+    claim_job(test_db, "worker-1")
+    _expire_lease(test_db, job_id)
+
+    assert requeue_expired_jobs(test_db, max_attempts=1) == 0
+
+    assert test_db.get(Job, job_id).status == JobStatus.FAILED
+    test_db.refresh(task)
+    assert task.status == TaskStatus.FAILED
+    assert "error_message" in task.parameters
+
+def test_orphaned_pending_tasks_are_enqueued(test_db):
+    orphan = _create_task(test_db, "orphan")
+    _create_task(test_db, "finished", status=TaskStatus.COMPLETED)
+
+    enqueue_orphaned_tasks(test_db)
+
+    assert test_db.query(Job).filter(Job.task_id == orphan.id).count() == 1
+    assert enqueue_orphaned_tasks(test_db) == 0
+
+def test_task_has_at_most_one_open_job(test_db):
+    orphan = _create_task(test_db, "orphan")
+    enqueue_job(orphan.id, test_db)
+    test_db.commit()
+
+    assert enqueue_orphaned_tasks(test_db) == 0
+    # A concurrent sweep that read the task before its job was queued
+    with patch("app.services.durable_queue.or_", return_value=false()):
+        assert enqueue_orphaned_tasks(test_db) == 0
+
+    assert test_db.query(Job).filter(Job.task_id == orphan.id).count() == 1
@@ -0,0 +1,53 @@
+import datetime
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api import tasks as tasks_api
+from app.models.models import Task, Record, TaskStatus
+from app.services.rollups import build_rollups
+
+@pytest.fixture
+def task_with_records(test_db):
+    task = Task(name="fast-json", parameters={}, status=TaskStatus.COMPLETED)
+    test_db.add(task)
+    test_db.flush()
+    test_db.add_all([
+        Record(task_id=task.id, source="A", company="Citroën", model="C3 \"Aircross\"", sale_date=datetime.datetime(2022, 1, 15), price=19999.99),
+        Record(task_id=task.id, source="A", company="Toyota", model="Camry", sale_date=datetime.datetime(2022, 1, 31, 13, 45, 7), price=0.1 + 0.2),
+        Record(task_id=task.id, source="B", company="Toyota", model="Corolla", sale_date=datetime.datetime(2023, 6, 1, 0, 0, 0, 250000), price=1234567.0),
+        Record(task_id=task.id, source="B", company="Ford", model="F150", sale_date=datetime.datetime(2021, 3, 1), price=3.0),
+    ])
+    test_db.flush()
+    return task
+
+def _fetch_both(client, monkeypatch, url):
+    monkeypatch.setattr(tasks_api, "FAST_JSON_RESPONSES", False)
+    default = client.get(url)
+    monkeypatch.setattr(tasks_api, "FAST_JSON_RESPONSES", True)
+    fast = client.get(url)
+    assert default.status_code == fast.status_code == 200
+    assert fast.headers["content-type"] == default.headers["content-type"]
+    return default, fast
+
+@pytest.mark.parametrize("path", [
+    "records",
+    "records?companies=Toyota&start_date=2022",
+    "records?limit=2&after_id=0",
+    "analytics/companies",
+    "analytics/timeline",
+])
+def test_fast_json_matches_default_bytes(client, test_db, monkeypatch, task_with_records, path):
+    default, fast = _fetch_both(client, monkeypatch, f"/api/tasks/{task_with_records.id}/{path}")
+
+    assert fast.content == default.content
+    assert fast.headers.get("X-Next-After-Id") == default.headers.get("X-Next-After-Id")
+
+def test_fast_json_matches_default_bytes_from_rollups(client, test_db, monkeypatch, task_with_records):
+    build_rollups(task_with_records.id, test_db)
+
+    for path in ("analytics/companies", "analytics/timeline"):
+        default, fast = _fetch_both(client, monkeypatch, f"/api/tasks/{task_with_records.id}/{path}")
+        assert fast.content == default.content
@@ -0,0 +1,69 @@
+import datetime
+import sys
+import os
+from unittest.mock import patch
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, Record, TaskStatus
+
+def _create_task(db, status, name="cache-test"):
+    task = Task(name=name, parameters={}, status=status)
+    db.add(task)
+    db.flush()
+    db.add(Record(task_id=task.id, source="A", company="Toyota", model="Camry", sale_date=datetime.datetime(2022, 1, 15), price=100.0))
+    db.flush()
+    return task
+
+@pytest.mark.parametrize("path", ["", "/records", "/records?format=csv", "/analytics/companies", "/analytics/timeline"])
+def test_completed_task_is_cacheable_and_revalidates_with_304(client, test_db, path):
+    task = _create_task(test_db, TaskStatus.COMPLETED)
+    url = f"/api/tasks/{task.id}{path}"
+
+    first = client.get(url)
+    etag = first.headers["ETag"]
+
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+    with patch("app.services.task_service.get_task_records") as get_records, \
+         patch("app.services.task_service.iter_task_record_rows") as iter_rows, \
+         patch("app.services.task_service.get_company_analytics") as company_analytics, \
+         patch("app.services.task_service.get_timeline_analytics") as timeline_analytics:
+        revalidated = client.get(url, headers={"If-None-Match": etag})
+        weak = client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["ETag"] == etag
+    assert weak.status_code == 304
+    for service in (get_records, iter_rows, company_analytics, timeline_analytics):
+        service.assert_not_called()
+
+def test_etag_depends_on_filters(client, test_db):
+    task = _create_task(test_db, TaskStatus.COMPLETED)
+
+    unfiltered = client.get(f"/api/tasks/{task.id}/records")
+    filtered = client.get(f"/api/tasks/{task.id}/records?companies=Toyota")
+    stale = client.get(f"/api/tasks/{task.id}/records?companies=Toyota", headers={"If-None-Match": unfiltered.headers["ETag"]})
+
+    assert unfiltered.headers["ETag"] != filtered.headers["ETag"]
+    assert stale.status_code == 200
+
+def test_running_task_is_not_cached_and_etag_changes_on_completion(client, test_db):
+    task = _create_task(test_db, TaskStatus.IN_PROGRESS)
+    url = f"/api/tasks/{task.id}/analytics/companies"
+
+    running = client.get(url)
+    task.status = TaskStatus.COMPLETED
+    task.updated_at = task.updated_at + datetime.timedelta(seconds=1)
+    test_db.flush()
+    completed = client.get(url, headers={"If-None-Match": running.headers["ETag"]})
+
+    assert running.headers["Cache-Control"] == "no-cache"
+    assert completed.status_code == 200
+    assert completed.headers["ETag"] != running.headers["ETag"]
+
+def test_missing_task_is_not_cached(client):
+    response = client.get("/api/tasks/999999/records")
+
+    assert "ETag" not in response.headers
@@ -0,0 +1,52 @@
+import datetime
+import pytest
+from unittest.mock import patch, AsyncMock
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, Record, TaskStatus, CompanyRollup
+from app.services.ingestion import write_records
+from app.services.job_queue import process_task_async
+from app.services.normalization import normalize_records
+
+SOURCE_A = [
+    {"company": "Toyota", "model": "Camry", "sale_date": "2022-01-15", "price": "100.50"},
+    {"company": "Honda", "model": "Civic", "sale_date": "2022-02-20", "price": "200.75"},
+    {"company": "Honda", "model": "Civic", "sale_date": "bad", "price": "1"},
+]
+SOURCE_B = [
+    {"company": "Ford", "model": "F150", "sale_date": "2021-03-01", "price": 300.0},
+]
+
+def _create_task(db, name="ingestion-test"):
+    task = Task(name=name, parameters={}, status=TaskStatus.PENDING)
+    db.add(task)
+    db.flush()
+    return task
+
+def test_write_records_in_batches(test_db):
+    task = _create_task(test_db)
+
+    written = write_records(task.id, [normalize_records("A", SOURCE_A), normalize_records("B", SOURCE_B)], test_db, batch_size=1)
+
+    records = test_db.query(Record).filter(Record.task_id == task.id).order_by(Record.id).all()
+    assert written == 3
+    assert [(r.source, r.company, r.price) for r in records] == [
+        ("A", "Toyota", 100.5), ("A", "Honda", 200.75), ("B", "Ford", 300.0)
+    ]
+    assert records[0].sale_date == datetime.datetime(2022, 1, 15)
+
+@pytest.mark.asyncio
+async def test_process_task_ingests_and_completes(test_db):
+    task = _create_task(test_db, "ingestion-e2e")
+
+    with patch('app.services.job_queue.asyncio.sleep', new=AsyncMock()), \
+         patch('app.services.job_queue.fetch_source_a_frame_async', new=AsyncMock(return_value=normalize_records("A", SOURCE_A))), \
+         patch('app.services.job_queue.fetch_source_b_frame_async', new=AsyncMock(return_value=normalize_records("B", SOURCE_B))):
+        await process_task_async(task.id, test_db)
+
+    assert task.status == TaskStatus.COMPLETED
+    assert test_db.query(Record).filter(Record.task_id == task.id).count() == 3
+    assert test_db.query(CompanyRollup).filter(CompanyRollup.task_id == task.id).count() == 3
@@ -17,7 +17,8 @@ from app.services.job_queue import (
     enqueue_task, 
     worker,
     process_task,
-    workers_running
+    workers_running,
+    parse_delay_range
 )
 from app.models.models import Task, TaskStatus
 
@@ -179,5 +180,11 @@ class TestJobQueue(unittest.TestCase):
         finally:
             app.services.job_queue.process_task = original_process_task
 
+    def test_delay_range_accepts_a_single_number(self):
+        self.assertEqual(parse_delay_range("0"), (0.0, 0.0))
+        self.assertEqual(parse_delay_range("5,10"), (5.0, 10.0))
+        with self.assertRaises(ValueError):
+            parse_delay_range("1,2,3")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
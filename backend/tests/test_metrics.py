@@ -0,0 +1,67 @@
+import sys
+import os
+import pytest
+from unittest.mock import patch, AsyncMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, TaskStatus
+from app.services.job_queue import process_task_async
+from app.services.metrics import MetricsRegistry, TASK_STAGE_SECONDS, TASKS_PROCESSED
+from app.services.normalization import normalize_records
+
+SOURCE_A = [{"company": "Toyota", "model": "Camry", "sale_date": "2022-01-15", "price": "100.50"}]
+SOURCE_B = [{"company": "Ford", "model": "F150", "sale_date": "2022-03-10", "price": "300.00"}]
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("op_seconds", "Operation latency.", ["op"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, op='read "x"')
+    registry.counter("ops_total", "Operations.", ["op"]).inc(op="read")
+
+    assert registry.render().splitlines() == [
+        "# HELP op_seconds Operation latency.",
+        "# TYPE op_seconds histogram",
+        'op_seconds_bucket{op="read \\"x\\"",le="0.1"} 2',
+        'op_seconds_bucket{op="read \\"x\\"",le="1.0"} 3',
+        'op_seconds_bucket{op="read \\"x\\"",le="+Inf"} 4',
+        'op_seconds_sum{op="read \\"x\\""} 3.65',
+        'op_seconds_count{op="read \\"x\\""} 4',
+        "# HELP ops_total Operations.",
+        "# TYPE ops_total counter",
+        'ops_total{op="read"} 1',
+    ]
+
+@pytest.mark.asyncio
+async def test_task_stages_are_timed(test_db):
+    task = Task(name="metrics-task", parameters={}, status=TaskStatus.PENDING)
+    test_db.add(task)
+    test_db.commit()
+    stages = ("queue_wait", "pending_delay", "fetch_a", "fetch_b", "dataset", "insert", "rollups", "commit")
+    before = {stage: TASK_STAGE_SECONDS.snapshot(stage=stage)[0] for stage in stages}
+    completed = TASKS_PROCESSED.samples()
+
+    with patch('app.services.job_queue.asyncio.sleep', new=AsyncMock()), \
+         patch('app.services.job_queue.fetch_source_a_frame_async', new=AsyncMock(return_value=normalize_records("A", SOURCE_A))), \
+         patch('app.services.job_queue.fetch_source_b_frame_async', new=AsyncMock(return_value=normalize_records("B", SOURCE_B))):
+        await process_task_async(task.id, test_db)
+
+    assert task.status == TaskStatus.COMPLETED
+    assert {stage: TASK_STAGE_SECONDS.snapshot(stage=stage)[0] - before[stage] for stage in stages} == dict.fromkeys(stages, 1)
+    assert TASKS_PROCESSED.samples() != completed
+
+def test_metrics_endpoint(client, test_db):
+    test_db.add(Task(name="metrics-endpoint", parameters={}, status=TaskStatus.COMPLETED))
+    test_db.flush()
+    assert client.get("/api/health").status_code == 200
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert 'tasks{status="completed"} 1' in lines
+    assert 'task_queue_depth{queue="durable"} 0' in lines
+    assert any(line.startswith('task_workers{state="idle"}') for line in lines)
+    assert any(line.startswith('http_request_duration_seconds_count{method="GET",route="/api/health",status="200"}') for line in lines)
@@ -0,0 +1,74 @@
+import sys
+import os
+from sqlalchemy import create_engine, inspect, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import Base
+from app.db.migrations import run_migrations, MIGRATIONS
+
+def test_migrations_add_indexes_to_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # Simulate a database created before the composite indexes existed
+        connection.execute(text("DROP INDEX ix_records_task_company_sale_date"))
+        connection.execute(text("DROP INDEX ix_records_task_id_id"))
+
+    applied = run_migrations(engine)
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("records")}
+    assert applied == [version for version, _ in MIGRATIONS]
+    assert {"ix_records_task_company_sale_date", "ix_records_task_id_id"} <= index_names
+    assert run_migrations(engine) == []
+    engine.dispose()
+
+def test_status_counts_are_seeded_for_existing_tasks(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # Simulate tasks written before the counts table and its triggers existed
+        for trigger in ("tasks_status_count_insert", "tasks_status_count_update", "tasks_status_count_delete"):
+            connection.execute(text(f"DROP TRIGGER {trigger}"))
+        connection.execute(text(
+            "INSERT INTO tasks (name, status, parameters) VALUES ('a', 'completed', '{}'), ('b', 'completed', '{}'), ('c', 'failed', '{}')"
+        ))
+
+    run_migrations(engine)
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE tasks SET status = 'failed' WHERE name = 'a'"))
+        counts = dict(connection.execute(text("SELECT status, count FROM task_status_counts")).all())
+    assert counts == {"completed": 1, "failed": 2}
+    engine.dispose()
+
+def test_trace_column_is_added_to_existing_tasks_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # Simulate a tasks table created before traces were stored
+        connection.execute(text("ALTER TABLE tasks DROP COLUMN trace"))
+
+    run_migrations(engine)
+
+    assert "trace" in {column["name"] for column in inspect(engine).get_columns("tasks")}
+    engine.dispose()
+
+def test_duplicate_open_jobs_are_closed_before_the_unique_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # Simulate jobs queued twice for a task before open jobs were unique
+        connection.execute(text("DROP INDEX ux_jobs_open_task_id"))
+        connection.execute(text("INSERT INTO tasks (id, name, status, parameters) VALUES (1, 'a', 'pending', '{}')"))
+        connection.execute(text(
+            "INSERT INTO jobs (id, task_id, status, attempts) VALUES (1, 1, 'queued', 0), (2, 1, 'leased', 1), (3, 1, 'queued', 0)"
+        ))
+
+    run_migrations(engine)
+
+    with engine.begin() as connection:
+        statuses = dict(connection.execute(text("SELECT id, status FROM jobs")).all())
+    assert statuses == {1: "done", 2: "leased", 3: "done"}
+    assert "ux_jobs_open_task_id" in {index["name"] for index in inspect(engine).get_indexes("jobs")}
+    engine.dispose()
@@ -0,0 +1,74 @@
+import json
+import sys
+import os
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.normalization import normalize_records, normalize_frame, parse_source_a_payload, parse_source_b_payload
+from app.services.parse_pool import run_parse
+
+def test_normalize_records_types_and_rejects():
+    normalized = normalize_records("A", [
+        {"company": "Toyota", "model": "Camry", "sale_date": "2022-01-15", "price": "100.50"},
+        {"company": "Honda", "model": "Civic", "sale_date": "not-a-date", "price": "10"},
+        {"company": "Ford", "model": "F150", "sale_date": "2021-03-01", "price": "n/a"},
+        {"model": "Mustang", "sale_date": "2021-03-01", "price": "5"},
+        {"company": "Ford", "model": "Focus", "sale_date": "2020-07-04", "price": 250},
+    ])
+
+    assert len(normalized) == 2
+    assert normalized.rejected == 3
+    assert len(normalized.rejected_sample) == 3
+    assert normalized.rejected_sample[0]["sale_date"] == "not-a-date"
+    assert isinstance(normalized.frame["company"].dtype, pd.CategoricalDtype)
+    assert str(normalized.frame["sale_date"].dtype).startswith("datetime64")
+    assert normalized.frame["price"].tolist() == [100.5, 250.0]
+
+def test_filter_applies_year_and_company_masks():
+    normalized = normalize_frame("B", pd.DataFrame({
+        "company": ["Toyota", "Honda", "Toyota", "BMW"],
+        "model": ["Camry", "Civic", "Corolla", "X5"],
+        "sale_date": ["2019-05-01", "2020-05-01", "2021-05-01", "2022-05-01"],
+        "price": [1.0, 2.0, 3.0, 4.0],
+    }))
+
+    filtered = normalized.filter(start_year="2020", end_year="2021", companies=["Toyota", "Honda"])
+
+    assert filtered.to_dicts() == [
+        {"company": "Honda", "model": "Civic", "sale_date": "2020-05-01", "price": 2.0},
+        {"company": "Toyota", "model": "Corolla", "sale_date": "2021-05-01", "price": 3.0},
+    ]
+    assert len(normalized) == 4
+
+def test_empty_payload_normalizes_to_empty_frame():
+    normalized = normalize_records("A", [])
+
+    assert len(normalized) == 0
+    assert normalized.rejected == 0
+    assert normalized.columns() == ([], [], [], [])
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+async def test_run_parse_modes_agree(mode):
+    payload = json.dumps([
+        {"company": "Toyota", "model": "Camry", "sale_date": "2022-01-15", "price": "100.50"},
+        {"company": "Honda", "model": "Civic", "sale_date": "oops", "price": "1"},
+    ])
+
+    normalized = await run_parse(parse_source_a_payload, payload, mode=mode)
+
+    assert normalized.rejected == 1
+    assert normalized.to_dicts() == [{"company": "Toyota", "model": "Camry", "sale_date": "2022-01-15", "price": 100.5}]
+
+@pytest.mark.asyncio
+async def test_run_parse_propagates_parse_errors():
+    with pytest.raises(Exception, match="Invalid JSON format"):
+        await run_parse(parse_source_a_payload, "{not json", mode="process")
+
+def test_parse_source_b_payload():
+    normalized = parse_source_b_payload("company,model,sale_date,price\nFord,F150,2021-03-01,300\n")
+
+    assert normalized.source == "B"
+    assert normalized.to_dicts() == [{"company": "Ford", "model": "F150", "sale_date": "2021-03-01", "price": 300.0}]
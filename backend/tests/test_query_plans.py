@@ -0,0 +1,91 @@
+import re
+import sys
+import os
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, TaskStatus
+from app.services import task_service
+from app.services.aggregation import iter_company_price_stats
+from app.services.ingestion import write_records
+from app.services.normalization import normalize_records
+from app.services.rollups import build_rollups, delete_rollups
+from app.services.reaper import deleting_task_ids, reap_task
+
+# "SCAN records" reads the whole table; "SCAN records USING ... INDEX" walks an index
+FULL_SCAN = re.compile(r"^SCAN (\w+)\b(?! USING (COVERING )?INDEX)")
+# Tables with one row per status are read whole by design
+SMALL_TABLES = {"task_status_counts"}
+
+@contextmanager
+def _capture_statements(db):
+    statements = []
+    connection = db.connection()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+def _full_scans(db, statements):
+    scans = []
+    for statement, parameters in statements:
+        plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        for row in plan:
+            match = FULL_SCAN.match(row[-1])
+            if match and match.group(1) not in SMALL_TABLES:
+                scans.append((match.group(1), statement))
+    return scans
+
+@pytest.fixture
+def completed_task(test_db):
+    task = Task(name="query-plans", parameters={}, status=TaskStatus.COMPLETED)
+    test_db.add(task)
+    test_db.flush()
+    write_records(task.id, [normalize_records("A", [
+        {"company": company, "model": f"Model{i % 3}", "sale_date": f"202{i % 4}-0{i % 9 + 1}-01", "price": str(i)}
+        for i, company in enumerate(["Toyota", "Honda", "Ford"] * 20)
+    ])], test_db)
+    build_rollups(task.id, test_db)
+    return task
+
+SERVICE_QUERIES = {
+    "records": lambda task_id, db: task_service.get_task_records(task_id, db=db),
+    "records_filtered": lambda task_id, db: task_service.get_task_records(task_id, ["Toyota", "Ford"], "Model1", "2021", "2023-06-30", db=db),
+    "records_company": lambda task_id, db: task_service.get_task_records(task_id, ["Honda"], db=db),
+    "records_date_range": lambda task_id, db: task_service.get_task_records(task_id, None, None, "2021-01-01", "2022", db=db),
+    "records_keyset_page": lambda task_id, db: task_service.get_task_records(task_id, db=db, after_id=5, limit=10),
+    "records_stream": lambda task_id, db: list(task_service.iter_task_record_rows(task_id, ["Ford"], db=db)),
+    "company_analytics": lambda task_id, db: task_service.get_company_analytics(task_id, db),
+    "timeline_analytics": lambda task_id, db: task_service.get_timeline_analytics(task_id, db),
+    "company_stats_from_records": lambda task_id, db: list(iter_company_price_stats(task_id, db)),
+    "rebuild_rollups": lambda task_id, db: (delete_rollups(task_id, db), build_rollups(task_id, db)),
+    "timeline_filtered": lambda task_id, db: task_service.get_timeline_analytics(task_id, db, "quarter", "2021-01", "2022-06", ["Ford"]),
+    "timeline_weeks_from_records": lambda task_id, db: task_service.get_timeline_analytics(task_id, db, "week", "2021-03-15", None, ["Toyota"], 10),
+    "task_list_page": lambda task_id, db: task_service.get_tasks(0, 10, db, cursor=task_service.encode_task_cursor(db.get(Task, task_id))),
+    "task_list_status": lambda task_id, db: task_service.get_tasks(0, 10, db, status=TaskStatus.COMPLETED),
+    "task_list_name_prefix": lambda task_id, db: task_service.get_tasks(0, 10, db, name_prefix="query"),
+    "price_distribution": lambda task_id, db: task_service.get_price_distribution(task_id, db, group_by="model"),
+    "distribution_from_records": lambda task_id, db: (delete_rollups(task_id, db), task_service.get_price_distribution(task_id, db)),
+    "timeline_from_records": lambda task_id, db: (delete_rollups(task_id, db), task_service.get_timeline_analytics(task_id, db)),
+    "task_trace": lambda task_id, db: task_service.get_task_trace(task_id, db),
+    "trace_summary": lambda task_id, db: task_service.get_trace_summary(db, limit=50),
+    "delete_task": lambda task_id, db: task_service.delete_task(task_id, db),
+    "reap_task": lambda task_id, db: (task_service.delete_task(task_id, db), deleting_task_ids(db), reap_task(task_id, db, chunk_rows=20)),
+}
+
+@pytest.mark.parametrize("name", sorted(SERVICE_QUERIES))
+def test_service_queries_use_indexes(test_db, completed_task, name):
+    with _capture_statements(test_db) as statements:
+        SERVICE_QUERIES[name](completed_task.id, test_db)
+
+    assert statements, f"{name} ran no queries"
+    assert _full_scans(test_db, statements) == []
@@ -0,0 +1,112 @@
+import datetime
+import sys
+import os
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import Base, create_sqlite_engine
+from app.models.models import Task, Record, TaskStatus, Job, JobStatus, CompanyRollup
+from app.services import task_service
+from app.services.job_queue import _complete_task
+from app.services.reaper import deleting_task_ids, reap_task, reap_deleting_tasks, incremental_vacuum
+from app.services.rollups import build_rollups
+
+def _seed_task(db, records=10, name="reaper-test"):
+    task = Task(name=name, parameters={}, status=TaskStatus.COMPLETED)
+    db.add(task)
+    db.flush()
+    db.add_all(
+        Record(task_id=task.id, source="A", company="Toyota", model="Camry", sale_date=datetime.datetime(2022, 1, 1), price=float(i))
+        for i in range(records)
+    )
+    db.flush()
+    build_rollups(task.id, db)
+    return task
+
+def test_deleted_task_is_hidden_before_it_is_reaped(test_db):
+    task = _seed_task(test_db)
+    task_id = task.id
+
+    assert task_service.delete_task(task_id, test_db)
+
+    assert task_service.get_task_by_id(task_id, test_db) is None
+    assert task_service.get_tasks(0, 10, test_db)["total"] == 0
+    assert task_service.get_task_status_counts(test_db) == {}
+    assert task_service.get_task_records(task_id, db=test_db) == []
+    assert task_service.get_company_analytics(task_id, test_db) == []
+    assert task_service.get_timeline_analytics(task_id, test_db) == []
+    assert task_service.get_task_status_event(task_id, test_db) is None
+    assert not task_service.delete_task(task_id, test_db)
+    # Nothing has been removed yet
+    assert test_db.query(Record).filter(Record.task_id == task_id).count() == 10
+
+def test_reaper_deletes_records_in_chunks(test_db):
+    task = _seed_task(test_db, records=10)
+    task_id = task.id
+    task_service.delete_task(task_id, test_db)
+    progress = []
+
+    assert reap_task(task_id, test_db, chunk_rows=4, on_chunk=lambda deleted: progress.append(deleted)) == 10
+
+    assert progress == [4, 8]
+    assert test_db.query(Record).filter(Record.task_id == task_id).count() == 0
+    assert test_db.query(CompanyRollup).filter(CompanyRollup.task_id == task_id).count() == 0
+    assert test_db.query(Task).filter(Task.id == task_id).count() == 0
+
+def test_stopped_reap_resumes_on_the_next_run(test_db):
+    task = _seed_task(test_db, records=10)
+    task_id = task.id
+    task_service.delete_task(task_id, test_db)
+
+    assert reap_task(task_id, test_db, chunk_rows=4, on_chunk=lambda deleted: False) is None
+    assert test_db.query(Record).filter(Record.task_id == task_id).count() == 6
+
+    assert reap_deleting_tasks(test_db, chunk_rows=4) == 1
+    assert test_db.query(Task).filter(Task.id == task_id).count() == 0
+
+def test_running_task_is_neither_reaped_nor_completed(test_db):
+    task = _seed_task(test_db)
+    test_db.add(Job(task_id=task.id, status=JobStatus.LEASED))
+    test_db.flush()
+
+    task_service.delete_task(task.id, test_db)
+
+    assert deleting_task_ids(test_db) == []
+    assert not _complete_task(task, None, test_db, build=True)
+    test_db.refresh(task)
+    assert task.status == TaskStatus.DELETING
+
+def test_incremental_vacuum_returns_freed_pages(tmp_path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'reaper.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        task = Task(name="vacuum-test", parameters={}, status=TaskStatus.COMPLETED)
+        db.add(task)
+        db.flush()
+        db.add_all(Record(task_id=task.id, source="A", company="C" * 200, model="M", price=1.0) for _ in range(5000))
+        db.commit()
+        pages_before = db.execute(text("PRAGMA page_count")).scalar()
+
+        task_service.delete_task(task.id, db)
+        assert reap_deleting_tasks(db, chunk_rows=1000) == 1
+        freed = incremental_vacuum(db)
+
+        assert freed > 0
+        assert db.execute(text("PRAGMA freelist_count")).scalar() == 0
+        assert db.execute(text("PRAGMA page_count")).scalar() < pages_before // 10
+    finally:
+        db.close()
+        engine.dispose()
+
+def test_delete_endpoint_returns_before_reaping(client, test_db):
+    task = _seed_task(test_db)
+    task_id = task.id
+
+    assert client.delete(f"/api/tasks/{task_id}").status_code == 204
+    assert client.get(f"/api/tasks/{task_id}").status_code == 404
+    assert client.delete(f"/api/tasks/{task_id}").status_code == 404
+    assert client.get(f"/api/tasks/{task_id}/records").json() == []
+    assert "running" in client.get("/api/health/reaper").json()
@@ -0,0 +1,90 @@
+import csv
+import datetime
+import json
+import sys
+import os
+from io import StringIO
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.models.models import Task, Record, TaskStatus
+
+def _seed_records(db, count):
+    task = Task(name="records-test", parameters={}, status=TaskStatus.COMPLETED)
+    db.add(task)
+    db.flush()
+    for i in range(count):
+        db.add(Record(
+            task_id=task.id,
+            source="A" if i % 2 else "B",
+            company=["Toyota", "Honda", "Ford"][i % 3],
+            model="ModelX",
+            sale_date=datetime.datetime(2020 + i % 4, 1 + i % 12, 1),
+            price=1000.0 + i
+        ))
+    db.flush()
+    return task
+
+def test_keyset_pages_cover_all_records(client, test_db):
+    task = _seed_records(test_db, 25)
+    full = client.get(f"/api/tasks/{task.id}/records").json()
+
+    seen = []
+    after_id = None
+    while True:
+        params = {"limit": 10}
+        if after_id is not None:
+            params["after_id"] = after_id
+        response = client.get(f"/api/tasks/{task.id}/records", params=params)
+        assert response.status_code == 200
+        seen.extend(response.json())
+        after_id = response.headers.get("X-Next-After-Id")
+        if after_id is None:
+            break
+
+    assert seen == sorted(full, key=lambda r: r["id"])
+
+def test_ndjson_stream_matches_json(client, test_db):
+    task = _seed_records(test_db, 12)
+    params = {"companies": ["Toyota", "Ford"], "start_date": "2021"}
+    expected = client.get(f"/api/tasks/{task.id}/records", params=params).json()
+
+    response = client.get(f"/api/tasks/{task.id}/records", params={**params, "format": "ndjson"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == expected
+
+def test_csv_stream(client, test_db):
+    task = _seed_records(test_db, 5)
+
+    response = client.get(f"/api/tasks/{task.id}/records", params={"format": "csv", "limit": 3})
+
+    rows = list(csv.DictReader(StringIO(response.text)))
+    assert len(rows) == 3
+    assert rows[0]["company"] == "Toyota"
+    assert float(rows[0]["price"]) == 1000.0
+
+def test_parquet_export_round_trips(client, test_db):
+    task = _seed_records(test_db, 9)
+    expected = client.get(f"/api/tasks/{task.id}/records", params={"companies": ["Honda"]}).json()
+
+    response = client.get(f"/api/tasks/{task.id}/records.parquet", params={"companies": ["Honda"]})
+
+    table = pq.read_table(pa.BufferReader(response.content))
+    assert pa.types.is_dictionary(table.schema.field("company").type)
+    assert table.column("id").to_pylist() == [r["id"] for r in expected]
+    assert table.column("company").to_pylist() == ["Honda"] * len(expected)
+    assert table.column("price").to_pylist() == [r["price"] for r in expected]
+
+def test_arrow_stream_export(client, test_db):
+    task = _seed_records(test_db, 4)
+
+    response = client.get(f"/api/tasks/{task.id}/records.arrow")
+
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 4
+    assert table.column("sale_date").to_pylist()[0] == datetime.datetime(2020, 1, 1)
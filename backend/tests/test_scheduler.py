@@ -0,0 +1,132 @@
+import asyncio
+import queue
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from sqlalchemy.orm import Session
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.job_queue import task_queue, enqueue_task, shared_http_session
+from app.services.scheduler import TaskScheduler
+
+class TestTaskScheduler(unittest.TestCase):
+    def setUp(self):
+        while not task_queue.empty():
+            try:
+                task_queue.get_nowait()
+            except queue.Empty:
+                break
+        self.mock_db = MagicMock(spec=Session)
+        self.mock_db_factory = MagicMock()
+        self.mock_db_factory.return_value.__next__.return_value = self.mock_db
+    
+    def test_runs_tasks_concurrently_on_one_loop(self):
+        loops = set()
+        sessions = set()
+        running = []
+        peak = []
+        
+        async def fake_process(task_id, db):
+            loops.add(asyncio.get_running_loop())
+            sessions.add(id(shared_http_session()))
+            running.append(task_id)
+            peak.append(len(running))
+            await asyncio.sleep(0.3)
+            running.remove(task_id)
+        
+        scheduler = TaskScheduler(self.mock_db_factory, max_concurrent_tasks=20)
+        with patch('app.services.job_queue.process_task_async', side_effect=fake_process):
+            scheduler.start()
+            try:
+                start_time = time.time()
+                for task_id in range(20):
+                    enqueue_task(task_id)
+                task_queue.join()
+                elapsed_time = time.time() - start_time
+            finally:
+                scheduler.stop()
+        
+        self.assertLess(elapsed_time, 0.3 * 5)
+        self.assertEqual(len(loops), 1)
+        self.assertEqual(len(sessions), 1)
+        self.assertIsNotNone(next(iter(loops)))
+        self.assertGreater(max(peak), 4)
+        self.assertEqual(self.mock_db.close.call_count, 20)
+    
+    def test_limits_concurrency(self):
+        running = []
+        peak = []
+        
+        async def fake_process(task_id, db):
+            running.append(task_id)
+            peak.append(len(running))
+            await asyncio.sleep(0.05)
+            running.remove(task_id)
+        
+        scheduler = TaskScheduler(self.mock_db_factory, max_concurrent_tasks=2)
+        with patch('app.services.job_queue.process_task_async', side_effect=fake_process):
+            scheduler.start()
+            try:
+                for task_id in range(6):
+                    enqueue_task(task_id)
+                task_queue.join()
+            finally:
+                scheduler.stop()
+        
+        self.assertLessEqual(max(peak), 2)
+    
+    def test_survives_failing_tasks(self):
+        processed = []
+        
+        async def fake_process(task_id, db):
+            processed.append(task_id)
+            raise Exception("Test exception")
+        
+        scheduler = TaskScheduler(self.mock_db_factory, max_concurrent_tasks=4)
+        with patch('app.services.job_queue.process_task_async', side_effect=fake_process):
+            scheduler.start()
+            try:
+                for task_id in (1, 2, 3):
+                    enqueue_task(task_id)
+                task_queue.join()
+            finally:
+                scheduler.stop()
+        
+        self.assertEqual(sorted(processed), [1, 2, 3])
+        self.assertTrue(task_queue.empty())
+    
+    def test_stop_cancels_running_tasks_when_every_slot_is_busy(self):
+        started = []
+        cancelled = []
+        
+        async def fake_process(task_id, db):
+            started.append(task_id)
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.append(task_id)
+                raise
+        
+        scheduler = TaskScheduler(self.mock_db_factory, max_concurrent_tasks=1)
+        with patch('app.services.job_queue.process_task_async', side_effect=fake_process):
+            scheduler.start()
+            for task_id in (1, 2):
+                enqueue_task(task_id)
+            while not started:
+                time.sleep(0.01)
+            stop_started = time.time()
+            scheduler.stop(timeout=0.2)
+            stop_elapsed = time.time() - stop_started
+        # Task 2 was never taken; settle it so later task_queue.join() calls return
+        self.assertEqual(task_queue.get_nowait(), 2)
+        task_queue.task_done()
+        
+        self.assertLess(stop_elapsed, 1.0)
+        self.assertEqual(started, [1])
+        self.assertEqual(cancelled, [1])
+
+if __name__ == '__main__':
+    unittest.main()
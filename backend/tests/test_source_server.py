@@ -0,0 +1,54 @@
+import sys
+import os
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from app.models.models import Task, Record, TaskStatus
+from app.services import job_queue
+from app.services.job_queue import process_task_async, fetch_source_a_frame_async, source_cache
+from source_server import start_source_server
+
+@pytest.fixture
+def stand_in():
+    server = start_source_server(rows=500, skew=1.5, invalid_fraction=0.1)
+    source_cache.clear()
+    with patch.object(job_queue, "SOURCE_A_URL", f"{server.base_url}/source-a"), \
+         patch.object(job_queue, "SOURCE_B_URL", f"{server.base_url}/source-b"), \
+         patch.object(job_queue, "SIMULATED_DELAY_SECONDS", (0, 0)), \
+         patch("app.services.parse_pool.PARSE_MODE", "inline"):
+        yield server
+    source_cache.clear()
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.asyncio
+async def test_task_runs_against_the_stand_in_sources(stand_in, test_db):
+    task = Task(name="offline-task", parameters={"companies_a": ["Toyota"]}, status=TaskStatus.PENDING)
+    test_db.add(task)
+    test_db.commit()
+
+    await process_task_async(task.id, test_db)
+
+    assert task.status == TaskStatus.COMPLETED
+    sources = task.trace["sources"]
+    assert sources["A"]["rows_before_filter"] + sources["A"]["rows_rejected"] == 500
+    assert sources["B"]["rows_rejected"] > 0
+    assert 0 < sources["A"]["rows_after_filter"] < sources["A"]["rows_before_filter"]
+    assert test_db.query(Record).filter(Record.task_id == task.id).count() == task.trace["rows_written"]
+    assert stand_in.stats()["requests"] == 2
+
+@pytest.mark.asyncio
+async def test_stand_in_answers_revalidation_without_a_body(stand_in):
+    with patch.object(source_cache, "ttl_seconds", 0):
+        first = await fetch_source_a_frame_async({})
+        bytes_sent = stand_in.bytes_sent
+        second = await fetch_source_a_frame_async({})
+
+    assert stand_in.requests == 2
+    assert stand_in.bytes_sent == bytes_sent
+    assert source_cache.stats()["revalidations"] == 1
+    assert second.bytes_downloaded == 0
+    assert len(second) == len(first)
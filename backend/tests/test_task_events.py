@@ -0,0 +1,97 @@
+import asyncio
+import json
+import sys
+import os
+import threading
+import time
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, TaskStatus
+from app.services.task_events import TaskEventBroker, task_events
+
+def _create_task(db, status=TaskStatus.PENDING, parameters=None):
+    task = Task(name=f"events-{status}", parameters=parameters or {}, status=status)
+    db.add(task)
+    db.flush()
+    return task
+
+def _read_events(lines):
+    events = []
+    for line in lines:
+        if line.startswith("data: "):
+            events.append(json.loads(line[len("data: "):]))
+    return events
+
+def test_publish_merges_progress_and_forgets_finished_tasks():
+    broker = TaskEventBroker(queue_size=4)
+    broker.publish(1, TaskStatus.IN_PROGRESS, rows_fetched=0, rows_written=0)
+    broker.publish(1, TaskStatus.IN_PROGRESS, rows_fetched=500)
+
+    assert broker.latest(1) == {"task_id": 1, "status": TaskStatus.IN_PROGRESS, "rows_fetched": 500, "rows_written": 0}
+
+    event = broker.publish(1, TaskStatus.COMPLETED)
+    assert event["rows_fetched"] == 500 and event["status"] == TaskStatus.COMPLETED
+    assert broker.latest(1) is None
+
+@pytest.mark.asyncio
+async def test_events_from_another_thread_fan_out_to_every_subscriber():
+    broker = TaskEventBroker(queue_size=4)
+    with broker.subscribe(7) as first, broker.subscribe(7) as second, broker.subscribe(8) as other:
+        publisher = threading.Thread(target=broker.publish, args=(7, TaskStatus.IN_PROGRESS), kwargs={"rows_written": 10})
+        publisher.start()
+        publisher.join()
+
+        received = await asyncio.wait_for(asyncio.gather(first.get(), second.get()), 1)
+        assert [event["rows_written"] for event in received] == [10, 10]
+        assert other.empty()
+        assert broker.stats()["subscribers"] == 3
+
+    assert broker.stats()["subscribers"] == 0
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_keeps_only_the_newest_events():
+    broker = TaskEventBroker(queue_size=2)
+    with broker.subscribe(1) as queue:
+        for written in (1, 2, 3):
+            broker.publish(1, TaskStatus.IN_PROGRESS, rows_written=written)
+        await asyncio.sleep(0)
+
+        assert [queue.get_nowait()["rows_written"] for _ in range(queue.qsize())] == [2, 3]
+        assert broker.dropped == 1
+
+def test_stream_of_finished_task_sends_one_event_and_closes(client, test_db):
+    task = _create_task(test_db, TaskStatus.FAILED, {"error_message": "Source A data fetch failed"})
+
+    with client.stream("GET", f"/api/tasks/{task.id}/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _read_events(response.iter_lines())
+
+    assert events == [{"task_id": task.id, "status": "failed", "error_message": "Source A data fetch failed"}]
+
+def test_stream_pushes_progress_until_the_task_finishes(client, test_db):
+    task = _create_task(test_db)
+
+    def run_task():
+        # The test client buffers the whole stream, so publish once it has subscribed
+        while task_events.stats()["subscribers"] == 0:
+            time.sleep(0.01)
+        task_events.publish(task.id, TaskStatus.IN_PROGRESS, rows_fetched=1200, rows_written=0)
+        task_events.publish(task.id, TaskStatus.IN_PROGRESS, rows_written=1200)
+        task_events.publish(task.id, TaskStatus.COMPLETED, reused_dataset=False)
+
+    worker = threading.Thread(target=run_task)
+    worker.start()
+    with client.stream("GET", f"/api/tasks/{task.id}/events") as response:
+        events = _read_events(response.iter_lines())
+    worker.join()
+
+    assert events[0] == {"task_id": task.id, "status": "pending"}
+    assert events[-1] == {"task_id": task.id, "status": "completed", "rows_fetched": 1200, "rows_written": 1200, "reused_dataset": False}
+    assert [event["status"] for event in events[1:-1]] == ["in_progress"] * (len(events) - 2)
+
+def test_stream_for_unknown_task_is_404(client):
+    response = client.get("/api/tasks/999999/events")
+    assert response.status_code == 404
@@ -0,0 +1,74 @@
+import datetime
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, TaskStatus
+from app.services import task_service
+
+CREATED_AT = datetime.datetime(2024, 5, 1, 12, 0, 0)
+
+@pytest.fixture
+def tasks(test_db):
+    statuses = [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.PENDING]
+    tasks = []
+    for i in range(12):
+        # Pairs share a created_at so the id has to break ties
+        task = Task(
+            name=f"{'report' if i % 2 else 'import'}-{i:02d}",
+            parameters={},
+            status=statuses[i % 3],
+            created_at=CREATED_AT + datetime.timedelta(minutes=i // 2)
+        )
+        test_db.add(task)
+        tasks.append(task)
+    test_db.flush()
+    return tasks
+
+def _newest_first(tasks):
+    return [task.id for task in sorted(tasks, key=lambda task: (task.created_at, task.id), reverse=True)]
+
+def test_cursor_pages_walk_every_task_once(test_db, tasks):
+    seen, cursor = [], None
+    while True:
+        page = task_service.get_tasks(0, 5, test_db, cursor=cursor)
+        seen.extend(task.id for task in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == _newest_first(tasks)
+    assert page["total"] == len(tasks)
+
+def test_status_and_name_prefix_filters(test_db, tasks):
+    failed = task_service.get_tasks(0, 100, test_db, status=TaskStatus.FAILED)
+    assert [task.id for task in failed["items"]] == _newest_first([task for task in tasks if task.status == TaskStatus.FAILED])
+    assert failed["total"] == 4 and failed["next_cursor"] is None
+
+    reports = task_service.get_tasks(0, 3, test_db, name_prefix="report")
+    assert reports["total"] == 6
+    assert all(task.name.startswith("report") for task in reports["items"])
+    rest = task_service.get_tasks(0, 100, test_db, cursor=reports["next_cursor"], name_prefix="report")
+    assert len(rest["items"]) == 3
+
+def test_status_counts_follow_inserts_updates_and_deletes(test_db, tasks):
+    assert task_service.get_task_status_counts(test_db) == {"completed": 4, "failed": 4, "pending": 4}
+
+    tasks[2].status = TaskStatus.IN_PROGRESS
+    test_db.delete(tasks[0])
+    test_db.add(Task(name="late", parameters={}, status=TaskStatus.PENDING))
+    test_db.flush()
+
+    assert task_service.get_task_status_counts(test_db) == {"completed": 3, "failed": 4, "pending": 4, "in_progress": 1}
+
+def test_task_list_endpoint(client, tasks):
+    response = client.get("/api/tasks/?limit=4&status=completed")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 4 and body["counts"]["failed"] == 4
+    assert body["next_cursor"] is not None
+
+    assert client.get("/api/tasks/?cursor=not-a-cursor").status_code == 400
+    assert client.get("/api/tasks/?status=unknown").status_code == 422
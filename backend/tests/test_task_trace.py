@@ -0,0 +1,94 @@
+import sys
+import os
+import pytest
+from unittest.mock import patch, AsyncMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, TaskStatus
+from app.services import task_service
+from app.services.job_queue import process_task_async
+from app.services.normalization import normalize_records
+from app.services.task_trace import summarize_traces, percentile
+
+SOURCE_A = [
+    {"company": "Toyota", "model": "Camry", "sale_date": "2022-01-15", "price": "100.50"},
+    {"company": "Honda", "model": "Civic", "sale_date": "2022-02-20", "price": "200.75"},
+    {"company": "Toyota", "model": "Corolla", "sale_date": "2022-03-01", "price": "not a price"},
+]
+SOURCE_B = [{"company": "Ford", "model": "F150", "sale_date": "2022-03-10", "price": "300.00"}]
+
+async def _process(db, name):
+    task = Task(name=name, parameters={}, status=TaskStatus.PENDING)
+    db.add(task)
+    db.commit()
+    source_a = normalize_records("A", SOURCE_A).filter(companies=["Toyota"]).with_origin("a-v1", 2048, True, 0.01)
+    with patch('app.services.job_queue.asyncio.sleep', new=AsyncMock()), \
+         patch('app.services.job_queue.fetch_source_a_frame_async', new=AsyncMock(return_value=source_a)), \
+         patch('app.services.job_queue.fetch_source_b_frame_async', new=AsyncMock(return_value=normalize_records("B", SOURCE_B))):
+        await process_task_async(task.id, db)
+    return task
+
+@pytest.mark.asyncio
+async def test_processing_stores_a_trace(test_db):
+    task = await _process(test_db, "traced-task")
+
+    trace = task_service.get_task_trace(task.id, test_db)["trace"]
+
+    assert trace["outcome"] == "completed" and not trace["reused_dataset"]
+    assert [stage["stage"] for stage in trace["stages"]] == [
+        "queue_wait", "pending_delay", "processing_delay", "fetch_a", "fetch_b", "dataset", "insert", "rollups", "commit"
+    ]
+    assert trace["sources"]["A"] == {
+        "bytes_downloaded": 2048, "payload_bytes": 2048, "parse_seconds": 0.01,
+        "rows_rejected": 1, "rows_before_filter": 2, "rows_after_filter": 1
+    }
+    assert trace["sources"]["B"]["rows_after_filter"] == 1
+    assert trace["rows_written"] == 2 and trace["insert_rows_per_second"] > 0
+    assert trace["total_seconds"] >= sum(stage["duration_seconds"] for stage in trace["stages"][1:])
+
+@pytest.mark.asyncio
+async def test_failed_task_trace_keeps_the_error(test_db):
+    task = Task(name="traced-failure", parameters={}, status=TaskStatus.PENDING)
+    test_db.add(task)
+    test_db.commit()
+
+    with patch('app.services.job_queue.asyncio.sleep', new=AsyncMock()), \
+         patch('app.services.job_queue.fetch_source_a_frame_async', new=AsyncMock(side_effect=RuntimeError("gist is down"))), \
+         patch('app.services.job_queue.fetch_source_b_frame_async', new=AsyncMock(return_value=normalize_records("B", SOURCE_B))):
+        await process_task_async(task.id, test_db)
+
+    trace = task_service.get_task_trace(task.id, test_db)["trace"]
+    assert trace["outcome"] == "failed" and "gist is down" in trace["error_message"]
+    assert trace["stages"][-1]["stage"] == "fetch_b" and trace["rows_written"] == 0
+
+def test_summary_percentiles_per_stage():
+    traces = [
+        {"outcome": "completed", "total_seconds": float(i), "insert_rows_per_second": 1000.0 * i,
+         "stages": [{"stage": "insert", "duration_seconds": float(i)}, {"stage": "fetch_a", "duration_seconds": 0.5}]}
+        for i in range(1, 21)
+    ] + [{"outcome": "failed", "total_seconds": 1.0, "insert_rows_per_second": None, "stages": []}]
+
+    summary = summarize_traces(traces)
+
+    assert summary["tasks"] == 21 and summary["outcomes"] == {"completed": 20, "failed": 1}
+    assert summary["stages"]["insert"] == {"count": 20, "p50": 10.5, "p95": 19.05, "max": 20.0}
+    assert summary["stages"]["fetch_a"]["p95"] == 0.5
+    assert summary["insert_rows_per_second"]["max"] == 20000.0
+    assert percentile([3.0], 95) == 3.0
+
+@pytest.mark.asyncio
+async def test_trace_endpoints(client, test_db):
+    task = await _process(test_db, "traced-endpoint")
+    untraced = Task(name="untraced", parameters={}, status=TaskStatus.PENDING)
+    test_db.add(untraced)
+    test_db.flush()
+
+    body = client.get(f"/api/tasks/{task.id}/trace").json()
+    assert body["status"] == TaskStatus.COMPLETED and body["trace"]["rows_written"] == 2
+    assert client.get(f"/api/tasks/{untraced.id}/trace").json()["trace"] is None
+    assert client.get("/api/tasks/987654/trace").status_code == 404
+
+    summary = client.get("/api/tasks/traces/summary?limit=10").json()
+    assert summary["limit"] == 10 and summary["tasks"] == 1
+    assert summary["stages"]["insert"]["count"] == 1
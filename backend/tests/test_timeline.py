@@ -0,0 +1,92 @@
+import datetime
+import sys
+import os
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.models import Task, Record, TaskStatus
+from app.services import task_service
+from app.services.downsampling import lttb_indices
+from app.services.rollups import build_rollups, delete_rollups
+
+SALES = [
+    ("Toyota", datetime.datetime(2021, 12, 30), 100.0),
+    ("Toyota", datetime.datetime(2022, 1, 3), 200.0),
+    ("Toyota", datetime.datetime(2022, 1, 9), 300.0),
+    ("Honda", datetime.datetime(2022, 2, 14), 50.0),
+    ("Honda", datetime.datetime(2022, 4, 1), 70.0),
+    ("Ford", datetime.datetime(2023, 7, 20), 90.0),
+]
+
+@pytest.fixture
+def task(test_db):
+    task = Task(name="timeline-test", parameters={}, status=TaskStatus.COMPLETED)
+    test_db.add(task)
+    test_db.flush()
+    for company, sale_date, price in SALES:
+        test_db.add(Record(task_id=task.id, source="A", company=company, model="X", sale_date=sale_date, price=price))
+    test_db.flush()
+    build_rollups(task.id, test_db)
+    return task
+
+def _points(result):
+    return [(point["date"], point["company"], point["total_sales"], point["total_revenue"]) for point in result]
+
+@pytest.mark.parametrize("bucket, expected", [
+    ("day", [("2021-12-30", "Toyota", 1, 100.0), ("2022-01-03", "Toyota", 1, 200.0), ("2022-01-09", "Toyota", 1, 300.0),
+             ("2022-02-14", "Honda", 1, 50.0), ("2022-04-01", "Honda", 1, 70.0), ("2023-07-20", "Ford", 1, 90.0)]),
+    ("week", [("2021-12-27", "Toyota", 1, 100.0), ("2022-01-03", "Toyota", 2, 500.0),
+              ("2022-02-14", "Honda", 1, 50.0), ("2022-03-28", "Honda", 1, 70.0), ("2023-07-17", "Ford", 1, 90.0)]),
+    ("quarter", [("2021-Q4", "Toyota", 1, 100.0), ("2022-Q1", "Honda", 1, 50.0), ("2022-Q1", "Toyota", 2, 500.0),
+                 ("2022-Q2", "Honda", 1, 70.0), ("2023-Q3", "Ford", 1, 90.0)]),
+    ("year", [("2021", "Toyota", 1, 100.0), ("2022", "Honda", 2, 120.0), ("2022", "Toyota", 2, 500.0), ("2023", "Ford", 1, 90.0)]),
+])
+def test_buckets_match_with_and_without_rollups(test_db, task, bucket, expected):
+    assert _points(task_service.get_timeline_analytics(task.id, test_db, bucket=bucket)) == expected
+
+    delete_rollups(task.id, test_db)
+    task_service.analytics_cache.clear()
+    assert _points(task_service.get_timeline_analytics(task.id, test_db, bucket=bucket)) == expected
+
+def test_date_range_and_companies_filter(test_db, task):
+    # Month-aligned ranges are answered from the rollups, others from the records
+    whole_months = task_service.get_timeline_analytics(task.id, test_db, start_date="2022-01", end_date="2022-02", companies=["Toyota", "Honda"])
+    assert _points(whole_months) == [("2022-01", "Toyota", 2, 500.0), ("2022-02", "Honda", 1, 50.0)]
+
+    partial = task_service.get_timeline_analytics(task.id, test_db, bucket="year", start_date="2022-01-05", end_date="2022", companies=["Toyota"])
+    assert _points(partial) == [("2022", "Toyota", 1, 300.0)]
+
+def test_empty_rollup_match_does_not_scan_records(test_db, task):
+    with patch("app.services.task_service.iter_timeline_buckets") as scan:
+        assert task_service.get_timeline_analytics(task.id, test_db, companies=["Tesla"]) == []
+        assert task_service.get_timeline_analytics(task.id, test_db, bucket="year", start_date="2030") == []
+    scan.assert_not_called()
+
+def test_parse_date_bound_expands_partial_dates():
+    assert task_service.parse_date_bound("2024-02", end=True) == datetime.datetime(2024, 2, 29)
+    assert task_service.parse_date_bound("2023", end=True) == datetime.datetime(2023, 12, 31)
+    assert task_service.parse_date_bound("2023-05") == datetime.datetime(2023, 5, 1)
+    assert task_service.parse_date_bound("May 2023") is None
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 40)
+    y[613] = 25.0
+
+    kept = lttb_indices(x, y, 40)
+
+    assert len(kept) == 40 and kept[0] == 0 and kept[-1] == 999
+    assert 613 in kept
+    assert np.all(np.diff(kept) > 0)
+    assert list(lttb_indices(x[:10], y[:10], 20)) == list(range(10))
+
+def test_timeline_endpoint_downsamples_each_company(client, test_db, task):
+    response = client.get(f"/api/tasks/{task.id}/analytics/timeline?bucket=day&max_points=3&companies=Toyota&companies=Honda")
+    assert response.status_code == 200
+    points = [(point["date"], point["company"]) for point in response.json()]
+    assert points == [("2021-12-30", "Toyota"), ("2022-01-03", "Toyota"), ("2022-01-09", "Toyota"), ("2022-02-14", "Honda"), ("2022-04-01", "Honda")]
+
+    assert client.get(f"/api/tasks/{task.id}/analytics/timeline?bucket=hour").status_code == 422
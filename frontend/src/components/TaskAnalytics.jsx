@@ -14,6 +14,7 @@ const TaskAnalytics = () => {
   const { id } = useParams();
   const [task, setTask] = useState(null);
   const [timelineData, setTimelineData] = useState([]);
+  const [distributionData, setDistributionData] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [kpis, setKpis] = useState(null);
@@ -54,32 +55,6 @@ const TaskAnalytics = () => {
     light: ["#C7D2FE", "#BAE6FD", "#DDD6FE", "#FED7AA", "#A7F3D0", "#FBCFE8"],
   };
 
-  const filterDataByTimeRange = (data) => {
-    if (!data || timeRange === "all") return data;
-
-    const now = new Date();
-    let cutoffDate;
-
-    switch (timeRange) {
-      case "6m":
-        cutoffDate = new Date(now.setMonth(now.getMonth() - 6));
-        break;
-      case "1y":
-        cutoffDate = new Date(now.setFullYear(now.getFullYear() - 1));
-        break;
-      case "3y":
-        cutoffDate = new Date(now.setFullYear(now.getFullYear() - 3));
-        break;
-      case "5y":
-        cutoffDate = new Date(now.setFullYear(now.getFullYear() - 5));
-        break;
-      default:
-        return data;
-    }
-
-    return data.filter((item) => new Date(item.date) >= cutoffDate);
-  };
-
   useEffect(() => {
     const fetchData = async () => {
       try {
@@ -97,13 +72,18 @@ const TaskAnalytics = () => {
 
         const companyAnalytics = await api.getCompanyAnalytics(id);
 
-        const timelineAnalytics = await api.getTimelineAnalytics(id);
-        const filteredTimelineData = filterDataByTimeRange(timelineAnalytics);
-        setTimelineData(filteredTimelineData);
+        // The server filters the range; start on a month boundary so it is served from rollups
+        const startDate = getStartDateFromTimeRange(timeRange);
+        const timelineAnalytics = await api.getTimelineAnalytics(id, {
+          bucket: "month",
+          start_date: startDate ? startDate.slice(0, 7) : null,
+        });
+        setDistributionData(await api.getPriceDistribution(id, "model"));
+        setTimelineData(timelineAnalytics);
 
         setSelectedCompanies([...allCompanies]);
 
-        const kpiData = calculateKPIs(filteredTimelineData);
+        const kpiData = calculateKPIs(timelineAnalytics);
         setKpis(kpiData);
       } catch (err) {
         setError("Failed to fetch analytics data");
@@ -559,7 +539,7 @@ const TaskAnalytics = () => {
                 </div>
                 <div className="h-64">
                   <BoxPlot
-                    data={timelineData}
+                    data={distributionData}
                     selectedCompanies={selectedCompanies}
                     colorPalette={colorPalette}
                   />
@@ -8,31 +8,66 @@ const TaskDetail = () => {
   const [task, setTask] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [progress, setProgress] = useState(null);
 
   useEffect(() => {
+    const isFinished = (status) => status === 'completed' || status === 'failed' || status === 'deleting';
+    let cancelled = false;
+    let unsubscribe = null;
+    let interval = null;
+
     const fetchTaskData = async () => {
       try {
         const taskData = await api.getTask(id);
         setTask(taskData);
+        return taskData;
       } catch (err) {
         setError('Failed to fetch task data');
         console.error(err);
+        return null;
       } finally {
         setLoading(false);
       }
     };
 
-    fetchTaskData();
+    // Fallback when the status stream is unavailable
+    const startPolling = () => {
+      interval = setInterval(async () => {
+        const taskData = await fetchTaskData();
+        if (taskData && isFinished(taskData.status)) {
+          clearInterval(interval);
+          interval = null;
+        }
+      }, 2000);
+    };
 
-    let interval;
-    if (task && task.status !== 'completed' && task.status !== 'failed') {
-      interval = setInterval(() => fetchTaskData(), 2000);
-    }
+    fetchTaskData().then((taskData) => {
+      if (cancelled || !taskData || isFinished(taskData.status)) return;
+      unsubscribe = api.subscribeTaskEvents(
+        id,
+        (event) => {
+          setProgress(event);
+          setTask((current) => current && { ...current, status: event.status });
+          if (isFinished(event.status)) {
+            unsubscribe();
+            unsubscribe = null;
+            // Reload the task for its final timestamps and error message
+            fetchTaskData();
+          }
+        },
+        () => {
+          unsubscribe = null;
+          if (!cancelled) startPolling();
+        }
+      );
+    });
 
     return () => {
+      cancelled = true;
+      if (unsubscribe) unsubscribe();
       if (interval) clearInterval(interval);
     };
-  }, [id, task?.status]);
+  }, [id]);
 
   const getStatusBadge = (status) => {
     const statusMap = {
@@ -242,6 +277,13 @@ const TaskDetail = () => {
                     Task #{task.id}
                   </h1>
                   {getStatusBadge(task.status)}
+                  {task.status === 'in_progress' && progress && (
+                    <span className="ml-3 text-sm text-gray-500">
+                      {(progress.rows_fetched ?? 0).toLocaleString()} rows fetched
+                      {' · '}
+                      {(progress.rows_written ?? 0).toLocaleString()} written
+                    </span>
+                  )}
                 </div>
               </div>
             </div>
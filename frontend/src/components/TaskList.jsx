@@ -12,6 +12,9 @@ const TaskList = () => {
   const [currentPage, setCurrentPage] = useState(1);
   const [tasksPerPage] = useState(10);
   const [totalTasks, setTotalTasks] = useState(0);
+  const [statusCounts, setStatusCounts] = useState({});
+  // cursors[n] starts page n + 1; page 1 needs none
+  const [cursors, setCursors] = useState([null]);
 
   const getStatusColor = (status) => {
     switch (status) {
@@ -32,18 +35,20 @@ const TaskList = () => {
     const fetchTasks = async () => {
       try {
         setLoading(true);
-        const skip = (statusFilter === 'all' && searchTerm === '') 
-          ? (currentPage - 1) * tasksPerPage 
-          : 0;
-        
-        const limit = (statusFilter === 'all' && searchTerm === '') 
-          ? tasksPerPage 
-          : 1000;
-        
-        const response = await api.getTasks(skip, limit);
+        const response = await api.getTasks(0, tasksPerPage, {
+          cursor: currentPage > 1 ? cursors[currentPage - 1] : null,
+          status: statusFilter !== 'all' ? statusFilter : null,
+          name_prefix: searchTerm,
+        });
         
         setTasks(response.items);
         setTotalTasks(response.total);
+        setStatusCounts(response.counts || {});
+        setCursors((known) => {
+          const next = known.slice(0, currentPage);
+          next[currentPage] = response.next_cursor;
+          return next;
+        });
       } catch (err) {
         setError('Failed to fetch tasks');
         console.error(err);
@@ -55,25 +60,16 @@ const TaskList = () => {
     fetchTasks();
   }, [currentPage, statusFilter, searchTerm, tasksPerPage]);
 
-  const statusCounts = tasks.reduce((acc, task) => {
-    acc[task.status] = (acc[task.status] || 0) + 1;
-    return acc;
-  }, {});
-
-  const filteredTasks = tasks
-    .filter(task => task.name.toLowerCase().includes(searchTerm.toLowerCase()))
-    .filter(task => statusFilter === 'all' || task.status === statusFilter);
-  
-  const paginatedTasks = (statusFilter !== 'all' || searchTerm !== '')
-    ? filteredTasks.slice((currentPage - 1) * tasksPerPage, currentPage * tasksPerPage)
-    : filteredTasks;
-  
-  const totalPages = statusFilter !== 'all' || searchTerm !== '' 
-    ? Math.max(1, Math.ceil(filteredTasks.length / tasksPerPage))
-    : Math.max(1, Math.ceil(totalTasks / tasksPerPage));
+  // Filtering and paging happen on the server
+  const filteredTasks = tasks;
+  const paginatedTasks = tasks;
+  const totalPages = Math.max(1, Math.ceil(totalTasks / tasksPerPage));
+  const hasNextPage = Boolean(cursors[currentPage]);
+  const allTasksCount = Object.values(statusCounts).reduce((sum, count) => sum + count, 0);
 
   useEffect(() => {
     setCurrentPage(1);
+    setCursors([null]);
   }, [statusFilter, searchTerm]);
 
   const handlePageChange = (pageNumber) => {
@@ -99,29 +95,15 @@ const TaskList = () => {
             </svg>
           </button>
           
-          {/* Page numbers */}
-          {[...Array(totalPages)].map((_, index) => {
-            const pageNumber = index + 1;
-            return (
-              <button
-                key={pageNumber}
-                onClick={() => handlePageChange(pageNumber)}
-                className={`relative inline-flex items-center px-4 py-2 border text-sm font-medium ${
-                  currentPage === pageNumber
-                    ? 'z-10 bg-indigo-50 border-indigo-500 text-indigo-600'
-                    : 'bg-white border-gray-300 text-gray-500 hover:bg-gray-50'
-                }`}
-              >
-                {pageNumber}
-              </button>
-            );
-          })}
+          <span className="relative inline-flex items-center px-4 py-2 border border-gray-300 bg-white text-sm font-medium text-gray-700">
+            Page {currentPage} of {totalPages}
+          </span>
           
           <button
-            onClick={() => handlePageChange(Math.min(totalPages, currentPage + 1))}
-            disabled={currentPage === totalPages}
+            onClick={() => handlePageChange(currentPage + 1)}
+            disabled={!hasNextPage}
             className={`relative inline-flex items-center px-2 py-2 rounded-r-md border border-gray-300 bg-white text-sm font-medium ${
-              currentPage === totalPages ? 'text-gray-300 cursor-not-allowed' : 'text-gray-500 hover:bg-gray-50'
+              !hasNextPage ? 'text-gray-300 cursor-not-allowed' : 'text-gray-500 hover:bg-gray-50'
             }`}
           >
             <span className="sr-only">Next</span>
@@ -189,7 +171,7 @@ const TaskList = () => {
                 statusFilter === 'all' ? 'bg-gray-800 text-white' : 'bg-gray-200 text-gray-700 hover:bg-gray-300'
               }`}
             >
-              All ({tasks.length})
+              All ({allTasksCount})
             </button>
             <button 
               onClick={() => setStatusFilter('completed')} 
@@ -226,7 +208,7 @@ const TaskList = () => {
             <input
               type="text"
               className="block w-full pl-10 pr-4 py-2 border border-gray-300 rounded-md bg-white focus:outline-none focus:ring-2 focus:ring-blue-500 focus:border-blue-500"
-              placeholder="Search tasks..."
+              placeholder="Tasks starting with..."
               value={searchTerm}
               onChange={(e) => setSearchTerm(e.target.value)}
               onKeyDown={(e) => {
@@ -325,7 +307,7 @@ const TaskList = () => {
       <Pagination />
       
       <div className="mt-6 flex justify-between items-center text-sm text-gray-500">
-        <p>Showing {paginatedTasks.length} of {filteredTasks.length} 
+        <p>Showing {paginatedTasks.length} of {totalTasks} 
           {statusFilter !== 'all' ? ` ${statusFilter}` : ''} tasks
           {totalPages > 1 && ` (page ${currentPage} of ${totalPages})`}
         </p>
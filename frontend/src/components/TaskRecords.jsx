@@ -1,9 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import api from '../services/api';
 
+const PAGE_SIZE = 500;
+
 const TaskRecords = ({ taskId }) => {
   const [records, setRecords] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextAfterId, setNextAfterId] = useState(null);
   const [error, setError] = useState('');
 
   // Filters
@@ -22,8 +26,9 @@ const TaskRecords = ({ taskId }) => {
     const fetchRecords = async () => {
       try {
         setLoading(true);
-        const recordsData = await api.getTaskRecords(taskId, activeFilters);
-        setRecords(recordsData);
+        const page = await api.getTaskRecordsPage(taskId, activeFilters, null, PAGE_SIZE);
+        setRecords(page.records);
+        setNextAfterId(page.nextAfterId);
       } catch (err) {
         setError('Failed to fetch records');
         console.error(err);
@@ -35,6 +40,21 @@ const TaskRecords = ({ taskId }) => {
     fetchRecords();
   }, [taskId, activeFilters]);
 
+  const loadMore = async () => {
+    if (nextAfterId === null) return;
+    try {
+      setLoadingMore(true);
+      const page = await api.getTaskRecordsPage(taskId, activeFilters, nextAfterId, PAGE_SIZE);
+      setRecords(prev => [...prev, ...page.records]);
+      setNextAfterId(page.nextAfterId);
+    } catch (err) {
+      setError('Failed to fetch records');
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCompanyToggle = (companyName) => {
     setSelectedCompanies(prev => 
       prev.includes(companyName) 
@@ -306,6 +326,19 @@ const TaskRecords = ({ taskId }) => {
             </tbody>
           </table>
         </div>
+        {nextAfterId !== null && (
+          <div className="px-6 py-3 border-t border-gray-200 bg-gray-50 flex items-center justify-between">
+            <span className="text-sm text-gray-500">Showing {records.length} records</span>
+            <button
+              type="button"
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="inline-flex items-center px-4 py-2 border border-gray-300 shadow-sm text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -60,35 +60,17 @@ const BoxPlot = ({ data, selectedCompanies, colorPalette }) => {
       return;
     }
     
-    const modelGroups = d3.group(filteredData, d => d.model);
-    
-    const boxPlotData = Array.from(modelGroups, ([model, values]) => {
-      const prices = values.map(d => +d.price || +d.total_revenue / +d.total_sales || 0).filter(p => p > 0);
-      
-      if (prices.length === 0) return null;
-      
-      prices.sort((a, b) => a - b);
-      
-      const q1 = d3.quantile(prices, 0.25);
-      const median = d3.quantile(prices, 0.5);
-      const q3 = d3.quantile(prices, 0.75);
-      const iqr = q3 - q1;
-      const min = Math.max(d3.min(prices), q1 - 1.5 * iqr);
-      const max = Math.min(d3.max(prices), q3 + 1.5 * iqr);
-      
-      const outliers = prices.filter(p => p < min || p > max);
-      
-      return {
-        model,
-        company: values[0].company,
-        min,
-        q1,
-        median,
-        q3,
-        max,
-        outliers
-      };
-    }).filter(d => d !== null);
+    // Quartiles, whiskers and outliers come precomputed from /analytics/distribution
+    const boxPlotData = filteredData.map(d => ({
+      model: d.model,
+      company: d.company,
+      min: d.whisker_low,
+      q1: d.q1,
+      median: d.median,
+      q3: d.q3,
+      max: d.whisker_high,
+      outliers: d.outliers
+    }));
     
     if (boxPlotData.length === 0) {
       const containerWidth = containerRef.current.clientWidth;
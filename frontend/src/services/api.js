@@ -2,6 +2,40 @@ import axios from 'axios';
 
 const API_URL = 'http://localhost:8000/api';
 
+const buildRecordParams = (filters) => {
+  const params = {};
+  
+  Object.entries(filters).forEach(([key, value]) => {
+    if (key !== 'companies' && value) {
+      params[key] = value;
+    }
+  });
+  
+  if (filters.companies && filters.companies.length > 0) {
+    params.companies = filters.companies;
+  }
+  
+  return params;
+};
+
+const serializeRecordParams = (params) => {
+  const queryParams = new URLSearchParams();
+  
+  Object.entries(params).forEach(([key, value]) => {
+    if (key !== 'companies') {
+      queryParams.append(key, value);
+    }
+  });
+  
+  if (params.companies) {
+    params.companies.forEach(company => {
+      queryParams.append('companies', company);
+    });
+  }
+  
+  return queryParams.toString();
+};
+
 const api = {
   // Task endpoints
   createTask: async (taskData) => {
@@ -9,8 +43,11 @@ const api = {
     return response.data;
   },
   
-  getTasks: async (skip = 0, limit = 10) => {
-    const response = await axios.get(`${API_URL}/tasks/?skip=${skip}&limit=${limit}`);
+  // filters: { cursor, status, name_prefix }; pass the previous page's next_cursor as cursor
+  getTasks: async (skip = 0, limit = 10, filters = {}) => {
+    const response = await axios.get(`${API_URL}/tasks/`, {
+      params: buildRecordParams({ skip, limit, ...filters })
+    });
     return response.data;
   },
   
@@ -19,44 +56,59 @@ const api = {
     return response.data;
   },
   
+  // Push status updates; returns a function that closes the stream.
+  // onUnavailable is called when the browser cannot (or stops trying to) stream.
+  subscribeTaskEvents: (taskId, onEvent, onUnavailable) => {
+    if (typeof EventSource === 'undefined') {
+      onUnavailable();
+      return () => {};
+    }
+    const source = new EventSource(`${API_URL}/tasks/${taskId}/events`);
+    source.addEventListener('status', (message) => onEvent(JSON.parse(message.data)));
+    source.onerror = () => {
+      // EventSource reconnects dropped streams itself; CLOSED means it gave up
+      if (source.readyState === EventSource.CLOSED) {
+        onUnavailable();
+      }
+    };
+    return () => source.close();
+  },
+  
   getTaskRecords: async (taskId, filters = {}) => {
     try {
-      const params = {};
-      
-      Object.entries(filters).forEach(([key, value]) => {
-        if (key !== 'companies' && value) {
-          params[key] = value;
-        }
+      const response = await axios.get(`${API_URL}/tasks/${taskId}/records`, {
+        params: buildRecordParams(filters),
+        paramsSerializer: serializeRecordParams
       });
       
-      if (filters.companies && filters.companies.length > 0) {
-        params.companies = filters.companies;
+      return response.data;
+    } catch (error) {
+      console.error('Error fetching task records:', error);
+      throw error;
+    }
+  },
+  
+  // Fetch one keyset page of records; pass the returned nextAfterId to get the next page
+  getTaskRecordsPage: async (taskId, filters = {}, afterId = null, limit = 500) => {
+    try {
+      const params = buildRecordParams(filters);
+      params.limit = limit;
+      if (afterId !== null) {
+        params.after_id = afterId;
       }
       
-      const response = await axios.get(`${API_URL}/tasks/${taskId}/records`, { 
+      const response = await axios.get(`${API_URL}/tasks/${taskId}/records`, {
         params,
-        paramsSerializer: params => {
-          const queryParams = new URLSearchParams();
-          
-          Object.entries(params).forEach(([key, value]) => {
-            if (key !== 'companies') {
-              queryParams.append(key, value);
-            }
-          });
-          
-          if (params.companies) {
-            params.companies.forEach(company => {
-              queryParams.append('companies', company);
-            });
-          }
-          
-          return queryParams.toString();
-        }
+        paramsSerializer: serializeRecordParams
       });
       
-      return response.data;
+      const nextAfterId = response.headers['x-next-after-id'];
+      return {
+        records: response.data,
+        nextAfterId: nextAfterId ? Number(nextAfterId) : null
+      };
     } catch (error) {
-      console.error('Error fetching task records:', error);
+      console.error('Error fetching task records page:', error);
       throw error;
     }
   },
@@ -66,9 +118,20 @@ const api = {
     return response.data;
   },
   
-  getTimelineAnalytics: async (taskId) => {
+  getPriceDistribution: async (taskId, groupBy = 'company', bins = 20) => {
+    const response = await axios.get(`${API_URL}/tasks/${taskId}/analytics/distribution`, {
+      params: { group_by: groupBy, bins }
+    });
+    return response.data;
+  },
+  
+  // filters: { bucket, start_date, end_date, companies, max_points }
+  getTimelineAnalytics: async (taskId, filters = {}) => {
     try {
-      const response = await axios.get(`${API_URL}/tasks/${taskId}/analytics/timeline`);
+      const response = await axios.get(`${API_URL}/tasks/${taskId}/analytics/timeline`, {
+        params: buildRecordParams(filters),
+        paramsSerializer: serializeRecordParams
+      });
       
       const formattedData = response.data.map(item => ({
         ...item,